@@ -1,8 +1,31 @@
 
-import flask, json, random
+import flask, json, random, os, struct, time
+import concurrent.futures
+import numpy as np
 from py3dbp import Packer, Bin, Item
+from py3dbp.serialize import RawJSON, boxJSON, itemJSON, itemsJSON, dumps
 from flask_cors import cross_origin
 
+# calPacking options
+PACK_MODES = ('best','distribute')
+OBJECTIVES = ('unfit','utilization','cost')
+# worker processes used to pack candidate boxes concurrently
+PACK_WORKERS = int(os.environ.get('PACK_WORKERS',os.cpu_count() or 1))
+# default packing time limit in seconds, a request can lower or raise it with "timeout"
+PACK_TIMEOUT = float(os.environ['PACK_TIMEOUT']) if os.environ.get('PACK_TIMEOUT') else None
+_pool = None
+# response formats, picked from the Accept header
+MIME_ROWS = 'application/json'
+MIME_COLUMNS = 'application/vnd.py3dbp.columns+json'
+MIME_MSGPACK = 'application/x-msgpack'
+MIME_BINARY = 'application/octet-stream'
+try :
+    import msgpack
+except ImportError :
+    msgpack = None
+# index of width/height/depth for each rotation type, same as Item.getDimension
+ROTATION_AXES = np.array([[0,1,2],[1,0,2],[1,2,0],[2,1,0],[2,0,1],[0,2,1]])
+
 # init flask
 app = flask.Flask(__name__)
 
@@ -49,39 +72,46 @@ def mkResultAPI():
     '''
     '''
     res = {"Success": False}
+    # the time limit counts from the request arrival, not from when a worker picks a box up
+    arrival = time.time()
     if flask.request.method == "POST":
+        mime = getResponseMime(flask.request)
+        fmt = 'rows' if mime == MIME_ROWS else 'columns'
         q= eval(flask.request.data.decode('utf-8'))
         if 'box' in q.keys() and 'item' in q.keys() and 'binding' in q.keys():
+            mode = q.get('mode','best')
+            objective = q.get('objective','unfit')
+            if mode not in PACK_MODES or objective not in OBJECTIVES:
+                res["Reason"] = "input data err"
+                return res
             try :
-                packer,box,binding = getBoxAndItem(q)
+                box_data = list(q['box'])
+                item_data = q['item']
+                binding = getBinding(q)
+                timeout = float(q['timeout']) if q.get('timeout') is not None else PACK_TIMEOUT
+                deadline = arrival + timeout if timeout is not None else None
+                # validate input before handing it to the workers
+                if not box_data:
+                    raise ValueError('no box')
+                for b in box_data:
+                    makeBox(b)
+                makeItems(item_data)
             except :
                 res["Reason"] = "input data err"
                 return res
             try :
                 # calculate packing
-                packer.pack(bigger_first=True,distribute_items=False,fix_point=True,binding=binding,
-                number_of_decimals=0)
-                box = packer.bins[0]
-                # make box dict
-                box_r = makeDictBox(box)
-                # make item dict
-                fitItem,unfitItem = [],[]
-                for item in box.items:
-                    fitItem.append(makeDictItem(item))
-                
-                for item in box.unfitted_items:
-                    unfitItem.append(makeDictItem(item))
-
-                # for unfitem in box
-                # make response
+                if mode == 'distribute' and len(box_data) > 1:
+                    res["data"] = packDistribute(box_data,item_data,binding,deadline,fmt)
+                else :
+                    candidates = packCandidates(box_data,item_data,binding,deadline,fmt)
+                    best = chooseBest(candidates,objective)
+                    res["data"] = best["data"]
+                    if len(candidates) > 1:
+                        res["data"]["objective"] = objective
+                        res["data"]["candidates"] = [c["summary"] for c in candidates]
                 res["Success"] = True
-                res["data"] = {
-                    "box" : box_r,
-                    "fitItem" : fitItem,
-                    "unfitItem": unfitItem
-                }
-                # print(len(res["data"]["unfitItem"]))
-                return res
+                return makeResponse(res,mime)
             except Exception as e:
                 res['Reason'] = 'cal packing err'
                 return res
@@ -93,82 +123,23 @@ def mkResultAPI():
         return res
 
 
-def makeDictBox(box):
-    position = (int(box.width)/2,int(box.height)/2,int(box.depth)/2)
-    r = {
-            "partNumber" : box.partno,
-            "position" : position,
-            "WHD" : (int(box.width),int(box.height),int(box.depth)),
-            "weight" : int(box.max_weight),
-            "gravity" : box.gravity
-        }
-    return [r]
-
-
-def makeDictItem(item):
-    ''' '''
-
-    if item.rotation_type == 0:
-        pos = (int(item.position[0]) + int(item.width)//2,int(item.position[1])+ int(item.height)//2,int(item.position[2])+ int(item.depth)//2)
-        whd = (int(item.width),int(item.height),int(item.depth))
-    elif item.rotation_type == 1:
-        pos = (int(item.position[0])+ int(item.height)//2,int(item.position[1]) + int(item.width)//2,int(item.position[2])+ int(item.depth)//2)
-        whd = (int(item.height),int(item.width),int(item.depth))
-    elif item.rotation_type == 2:
-        pos = (int(item.position[0])+ int(item.height)//2,int(item.position[1])+ int(item.depth)//2,int(item.position[2]) + int(item.width)//2)
-        whd = (int(item.height),int(item.depth),int(item.width))
-    elif item.rotation_type == 3:
-        pos = (int(item.position[0])+ int(item.depth)//2,int(item.position[1])+ int(item.height)//2,int(item.position[2]) + int(item.width)//2)
-        whd = (int(item.depth),int(item.height),int(item.width))
-    elif item.rotation_type == 4:
-        pos = (int(item.position[0])+ int(item.depth)//2,int(item.position[1]) + int(item.width)//2,int(item.position[2])+ int(item.height)//2)
-        whd = (int(item.depth),int(item.width),int(item.height))
-    elif item.rotation_type == 5:
-        pos = (int(item.position[0]) + int(item.width)//2,int(item.position[1])+ int(item.depth)//2,int(item.position[2])+ int(item.height)//2)
-        whd = (int(item.width),int(item.depth),int(item.height))
-    
-    r = {
-        "partNumber" : item.partno,
-        "name" : item.name,
-        "type" : item.typeof,
-        "color" : item.color,
-        "position" : pos,
-        "rotationType" : item.rotation_type,
-        "WHD" : whd,
-        "weight" : int(item.weight)
-    }
-
-    return r
-
-
-def getBoxAndItem(data):
+def makeBox(box_data):
     ''' '''
-    # init packer
-    packer = Packer()
-    # get bin data
-    box_data = data["box"][0]
-    box = Bin(
+    return Bin(
         partno=box_data['name'],
         WHD=box_data['WHD'],
         max_weight=box_data['weight'],
         corner=box_data['coner'],
         put_type=box_data['openTop'][0]
         )
-    packer.addBin(box)
-    # get item data  TODO
-    item_data = data["item"]
-    color_dict = {
-        1:'red',
-        2:'yellow',
-        3:'blue',
-        4:'green',
-        5:'purple',
-        6:'brown',
-        7:'orange'
-    }
+
+
+def makeItems(item_data):
+    ''' '''
+    items = []
     for i in item_data :
         for j in range(i['count']) :
-            packer.addItem(Item(
+            items.append(Item(
             partno = i['name']+'-{}'.format(str(j+1)),
             name = i['name'],
             typeof = 'cylinder' if i['type'] == 2 else 'cube',
@@ -179,13 +150,207 @@ def getBoxAndItem(data):
             updown = bool(i['updown']),
             color = randColor(i['color']))
         )
+    return items
+
+
+def getBinding(data):
+    ''' '''
     binding_data = data['binding']
     binding = []
     if len(binding_data) != 0:
         for i in binding_data :
             binding.append(tuple(i))
+    return binding
+
+
+def makeColumnItem(items):
+    ''' parallel arrays of items, same values as the rows format, centers computed in one pass '''
+    n = len(items)
+    position = np.array([[float(i) for i in item.position] for item in items],dtype=float).reshape(n,3).astype(np.int32)
+    whd = np.array([[float(item.width),float(item.height),float(item.depth)] for item in items],dtype=float).reshape(n,3).astype(np.int32)
+    rotation = np.array([item.rotation_type for item in items],dtype=np.uint8)
+    # rotate WHD and move to the center
+    whd = np.take_along_axis(whd,ROTATION_AXES[rotation],axis=1)
+    return {
+        "partNumber" : [item.partno for item in items],
+        "name" : [item.name for item in items],
+        "type" : [item.typeof for item in items],
+        "color" : [item.color for item in items],
+        "position" : position + whd // 2,
+        "rotationType" : rotation,
+        "WHD" : whd,
+        "weight" : np.array([float(item.weight) for item in items],dtype=float).astype(np.int32)
+    }
+
+
+def makeDictBox(box):
+    ''' box as a list of one dict, the values of py3dbp.serialize.boxJSON '''
+    return [json.loads(boxJSON(box))]
+
+
+def makeDictItem(item):
+    ''' item as a dict, the values of py3dbp.serialize.itemJSON '''
+    return json.loads(itemJSON(item))
+
+
+def makeDictResult(box,fmt='rows'):
+    ''' box, fitItem and unfitItem of a packed bin '''
+    make = makeColumnItem if fmt == 'columns' else makeRowItems
+    return {
+        # already encoded for the rows response, plain values for the formats that go through toList
+        "box" : RawJSON('[' + boxJSON(box) + ']') if fmt == 'rows' else makeDictBox(box),
+        "fitItem" : make(box.items),
+        "unfitItem": make(box.unfitted_items)
+    }
+
+
+def makeRowItems(items):
+    ''' items as a json array of rows, already encoded by py3dbp.serialize '''
+    return RawJSON(itemsJSON(items))
+
+
+def getResponseMime(request):
+    ''' response format asked for in the Accept header, rows of dicts by default '''
+    offers = [MIME_ROWS,MIME_COLUMNS,MIME_BINARY]
+    if msgpack is not None:
+        offers.append(MIME_MSGPACK)
+    return request.accept_mimetypes.best_match(offers,default=MIME_ROWS)
+
+
+def toList(data):
+    ''' numpy arrays in data -> lists '''
+    if isinstance(data,dict):
+        return {k : toList(v) for k,v in data.items()}
+    elif isinstance(data,(list,tuple)):
+        return [toList(v) for v in data]
+    elif isinstance(data,np.ndarray):
+        return data.tolist()
+    return data
+
+
+def packBinary(data):
+    ''' 
+    raw little-endian arrays : b'P3DB' + uint32 header length + json header + arrays.
+    In the header every array is replaced by {"dtype","shape","offset"}, offset counts from the end of the header.
+    '''
+    blobs = []
+    size = [0]
+    def walk(v):
+        if isinstance(v,dict):
+            return {k : walk(i) for k,i in v.items()}
+        elif isinstance(v,(list,tuple)):
+            return [walk(i) for i in v]
+        elif isinstance(v,np.ndarray):
+            a = np.ascontiguousarray(v,dtype=v.dtype.newbyteorder('<'))
+            r = {"dtype" : a.dtype.str,"shape" : list(a.shape),"offset" : size[0]}
+            blobs.append(a.tobytes())
+            size[0] += a.nbytes
+            return r
+        return v
+    header = json.dumps(walk(data)).encode('utf-8')
+    return b''.join([b'P3DB',struct.pack('<I',len(header)),header] + blobs)
+
+
+def makeResponse(res,mime):
+    ''' encode a successful result in the negotiated format '''
+    if mime == MIME_BINARY:
+        return flask.Response(packBinary(res),mimetype=MIME_BINARY)
+    elif mime == MIME_MSGPACK:
+        return flask.Response(msgpack.packb(toList(res)),mimetype=MIME_MSGPACK)
+    elif mime == MIME_COLUMNS:
+        return flask.Response(json.dumps(toList(res)),mimetype=MIME_COLUMNS)
+    return flask.Response(dumps(res),mimetype=MIME_ROWS)
+
+
+def packOneBox(box_data,item_data,binding,deadline=None,fmt='rows'):
+    '''
+    pack every item into one candidate box, run inside a worker process.
+    deadline : time.time() of the request time limit, a box picked up after it is not packed (complete false)
+    '''
+    packer = Packer()
+    box = makeBox(box_data)
+    packer.addBin(box)
+    for item in makeItems(item_data):
+        packer.addItem(item)
+    timeout = deadline - time.time() if deadline is not None else None
+    if timeout is not None and timeout <= 0:
+        # queued past the deadline : no item tried, all unfit
+        box.unfitted_items = list(packer.items)
+        packer.complete = False
+    else:
+        packer.pack(bigger_first=True,distribute_items=False,fix_point=True,binding=binding,
+        number_of_decimals=0,timeout=timeout)
+    box = packer.bins[0]
+
+    fit_volume = sum(float(item.getVolume()) for item in box.items)
+    summary = {
+        "partNumber" : box.partno,
+        "fitCount" : len(box.items),
+        "unfitCount" : len(box.unfitted_items),
+        "utilization" : round(fit_volume / float(box.getVolume()) * 100,2),
+        "cost" : box_data.get('cost',0),
+        "complete" : packer.complete
+    }
+    data = makeDictResult(box,fmt)
+    data["complete"] = packer.complete
+    return {"summary" : summary, "data" : data}
+
+
+def packCandidates(box_data,item_data,binding,deadline=None,fmt='rows'):
+    ''' pack the items into each candidate box concurrently, every box gets the time left to deadline '''
+    if len(box_data) == 1:
+        return [packOneBox(box_data[0],item_data,binding,deadline,fmt)]
+
+    pool = getPool()
+    futures = [pool.submit(packOneBox,b,item_data,binding,deadline,fmt) for b in box_data]
+    return [f.result() for f in futures]
+
+
+def chooseBest(candidates,objective='unfit'):
+    ''' pick a candidate by objective, ties are broken by the other two objectives '''
+    def key(c):
+        s = c["summary"]
+        # a pack cut off by the timeout comes after every complete one
+        if objective == 'utilization':
+            return (not s["complete"],-s["utilization"],s["unfitCount"],s["cost"])
+        elif objective == 'cost':
+            # a box that holds everything always beats one that does not
+            return (not s["complete"],s["unfitCount"] != 0,s["cost"],s["unfitCount"],-s["utilization"])
+        return (not s["complete"],s["unfitCount"],-s["utilization"],s["cost"])
+
+    return min(candidates,key=key)
+
+
+def packDistribute(box_data,item_data,binding,deadline=None,fmt='rows'):
+    ''' distribute the items over all boxes in order, distribute_items=True semantics '''
+    timeout = max(0.0,deadline - time.time()) if deadline is not None else None
+    packer = Packer()
+    for b in box_data:
+        packer.addBin(makeBox(b))
+    for item in makeItems(item_data):
+        packer.addItem(item)
+    packer.pack(bigger_first=True,distribute_items=True,fix_point=True,binding=binding,
+    number_of_decimals=0,timeout=timeout)
+
+    bins = []
+    for box in packer.bins:
+        r = makeDictResult(box,fmt)
+        del r["unfitItem"]
+        bins.append(r)
+
+    return {
+        "bins" : bins,
+        "unfitItem" : makeColumnItem(packer.unfit_items) if fmt == 'columns' else makeRowItems(packer.unfit_items),
+        "complete" : packer.complete
+    }
+
 
-    return packer,box,binding
+def getPool():
+    ''' process pool shared by all requests, created on first multi-box request '''
+    global _pool
+    if _pool is None:
+        _pool = concurrent.futures.ProcessPoolExecutor(max_workers=PACK_WORKERS)
+    return _pool
 
 
 def randColor(s):
@@ -0,0 +1,111 @@
+'''
+Benchmark scenarios built from the example scripts.
+
+Every case is a function (n, seed) -> (bins, items, pack_kwargs) that builds fresh Bin and
+Item objects for n items, so the same case can be packed again for timing and memory runs.
+'''
+import random
+
+from py3dbp import Bin, Item
+from py3dbp.instances import makeEcommerce, makeMPV
+
+
+def _item(partno, name, whd, weight, updown=True, color='skyblue', loadbear=100, level=1):
+    ''' '''
+    return Item(partno=partno, name=name, typeof='cube', WHD=whd, weight=weight,
+                level=level, loadbear=loadbear, updown=updown, color=color)
+
+
+def _container():
+    ''' Evergreen 20ft steel dry cargo container of example0 / example4 '''
+    return Bin(partno='container', WHD=(589.8, 243.8, 259.1), max_weight=28080, corner=15, put_type=0)
+
+
+def _pallet():
+    ''' pallet of example_pallet / example_monosku '''
+    return Bin('pallet', (1000, 1200, 1800), max_weight=10000, corner=0, put_type=0)
+
+
+# SKUs of example0 / example4 : name, WHD, weight, color
+CONTAINER_SKUS = [
+    ('Dyson', (170, 82, 46), 85.12, '#FF0000'),
+    ('wash', (85, 60, 60), 10, '#FFFF37'),
+    ('cabint', (60, 80, 200), 80, '#842B00'),
+    ('server', (70, 100, 30), 20, '#0000E3'),
+]
+
+
+def mixedContainer(n, seed=0):
+    ''' example0/example4 : mixed SKUs in a 20ft container, shuffled '''
+    rng = random.Random(seed)
+    items = []
+    for i in range(n):
+        name, whd, weight, color = rng.choice(CONTAINER_SKUS)
+        items.append(_item('{}-{}'.format(name, i), name, whd, weight, color=color))
+    return [_container()], items, {'bigger_first' : True, 'distribute_items' : False}
+
+
+def monoSkuPallet(n, seed=0):
+    ''' example_monosku : one SKU laid flat on a pallet '''
+    items = [_item('BenchmarkBox-{}'.format(i), 'BenchmarkBox', (400, 200, 250), 5) for i in range(n)]
+    return [_pallet()], items, {'bigger_first' : True, 'distribute_items' : True}
+
+
+def crossLayerPallet(n, seed=0):
+    '''
+    example_monosku_crossed : one SKU in the two planar orientations.
+    updown=False keeps every box flat, so the packer has to interlock the orientations itself.
+    '''
+    rotations = [(300, 150, 200), (150, 300, 200)]
+    items = [
+        _item('BenchmarkBox-{}'.format(i), 'BenchmarkBox', rotations[i % 2], 5, updown=False)
+        for i in range(n)
+    ]
+    return [_pallet()], items, {'bigger_first' : True, 'distribute_items' : True}
+
+
+def binding(n, seed=0):
+    ''' example4 with binding : servers and cabinets packed as sets, washing machines fill the rest '''
+    rng = random.Random(seed)
+    items = []
+    for i in range(n):
+        name, whd, weight, color = rng.choice(CONTAINER_SKUS[1:])
+        items.append(_item('{}-{}'.format(name, i), name, whd, weight, color=color))
+    return [_container()], items, {'bigger_first' : True, 'distribute_items' : False, 'binding' : [('server', 'cabint')]}
+
+
+def multiBinDistribute(n, seed=0):
+    ''' example7 : small boxes distributed over several bins of two sizes '''
+    rng = random.Random(seed)
+    bins = []
+    for i in range(max(2, n // 20)):
+        whd = (5, 5, 5) if i % 2 == 0 else (3, 3, 5)
+        bins.append(Bin('bin-{}'.format(i), whd, 100, 0, 0))
+    items = [
+        _item('Box-{}'.format(i), 'test', (rng.randint(1, 3), rng.randint(1, 2), rng.randint(1, 4)), 1)
+        for i in range(n)
+    ]
+    return bins, items, {'bigger_first' : True, 'distribute_items' : True}
+
+
+def ecommerce(n, seed=0):
+    ''' py3dbp.instances e-commerce carton mix in one cage '''
+    inst = makeEcommerce(n, seed)
+    return inst.makeBins(), inst.makeItems(), {'bigger_first' : True, 'distribute_items' : True}
+
+
+def mpvClass1(n, seed=0):
+    ''' py3dbp.instances Martello-Pisinger-Vigo class 1, as many 100^3 bins as needed '''
+    inst = makeMPV(1, n, seed)
+    return inst.makeBins(), inst.makeItems(), {'bigger_first' : True, 'distribute_items' : True}
+
+
+CASES = {
+    'mixed_container' : mixedContainer,
+    'mono_sku_pallet' : monoSkuPallet,
+    'cross_layer_pallet' : crossLayerPallet,
+    'binding' : binding,
+    'multi_bin_distribute' : multiBinDistribute,
+    'ecommerce' : ecommerce,
+    'mpv_class1' : mpvClass1,
+}
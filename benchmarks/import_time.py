@@ -0,0 +1,77 @@
+'''
+Cold import time of py3dbp.
+
+Every sample runs in a fresh interpreter so nothing is cached in sys.modules.
+
+    python -m benchmarks.import_time --repeat 10 --output import_time.json
+'''
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name -> statement timed in the child interpreter
+CASES = {
+    'py3dbp' : 'import py3dbp',
+    'py3dbp.Packer' : 'from py3dbp import Packer, Bin, Item',
+    'py3dbp.Painter' : 'from py3dbp import Painter',
+}
+
+CHILD = '''
+import sys, time
+st = time.perf_counter()
+{stmt}
+t = time.perf_counter() - st
+print(t, int('matplotlib' in sys.modules))
+'''
+
+
+def timeImport(stmt, repeat=5):
+    ''' run stmt in `repeat` fresh interpreters, return seconds and whether matplotlib got loaded '''
+    samples = []
+    matplotlib_loaded = False
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, '-c', CHILD.format(stmt=stmt)],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.split()
+        samples.append(float(out[0]))
+        matplotlib_loaded = bool(int(out[1]))
+
+    return {
+        'statement' : stmt,
+        'median' : statistics.median(samples),
+        'min' : min(samples),
+        'max' : max(samples),
+        'repeat' : repeat,
+        'matplotlib_loaded' : matplotlib_loaded,
+    }
+
+
+def run(repeat=5):
+    ''' time every case '''
+    return {name : timeImport(stmt, repeat) for name, stmt in CASES.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='cold import time of py3dbp')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', default=None, help='write results as json')
+    args = parser.parse_args(argv)
+
+    result = run(args.repeat)
+    for name, r in result.items():
+        print("%-16s median %.4fs  min %.4fs  matplotlib loaded: %s" % (name, r['median'], r['min'], r['matplotlib_loaded']))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'import_time' : result}, f, indent=2)
+    return result
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,218 @@
+'''
+Load test for the packing API (api.py).
+
+Starts api.app in-process on a free localhost port (or targets --url), replays payloads
+at a fixed concurrency and writes latency percentiles, throughput, error rate and CPU per
+request as json, so runs of different versions can be compared with --compare.
+
+    python -m benchmarks.loadtest --requests 200 --concurrency 8 --output loadtest.json
+    python -m benchmarks.loadtest --payload allData.json --orders 0 --requests 20
+    python -m benchmarks.loadtest --url http://127.0.0.1:5050 --server-pid 1234
+    python -m benchmarks.loadtest --compare loadtest.json
+'''
+import argparse
+import concurrent.futures
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CATALOG = os.path.join(ROOT, 'widadvance.json')
+
+
+def loadPayloads(path):
+    ''' calPacking request bodies from a .json (one request) or .jsonl (one per line) file '''
+    with open(path, encoding='utf-8') as f:
+        if path.endswith('.jsonl'):
+            payloads = [json.loads(line) for line in f if line.strip()]
+        else:
+            payloads = [json.load(f)]
+    for p in payloads:
+        p.setdefault('binding', [])
+    return payloads
+
+
+def makeOrders(catalog, n, seed=0, max_lines=4, max_count=5):
+    ''' n seeded random orders : one box and a few catalog items with random counts '''
+    rng = random.Random(seed)
+    orders = []
+    for _ in range(n):
+        lines = rng.sample(catalog['item'], min(len(catalog['item']), rng.randint(1, max_lines)))
+        item = []
+        for line in lines:
+            line = dict(line)
+            line['count'] = rng.randint(1, max_count)
+            item.append(line)
+        orders.append({
+            'box' : [rng.choice(catalog['box'])],
+            'item' : item,
+            'binding' : []
+        })
+    return orders
+
+
+def startServer():
+    ''' serve api.app on a free localhost port in a background thread, return (url, server) '''
+    from werkzeug.serving import make_server
+    # api.py reads widadvance.json relative to the working directory
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+    import api
+
+    # no access log per request
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, api.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return 'http://127.0.0.1:{}'.format(server.server_port), server
+
+
+def cpuSeconds(pid=None):
+    ''' user + system cpu seconds of this process, or of pid (linux /proc) '''
+    if pid is None:
+        t = os.times()
+        return t.user + t.system
+    with open('/proc/{}/stat'.format(pid)) as f:
+        fields = f.read().rsplit(')', 1)[1].split()
+    # utime and stime are fields 14 and 15 of stat, counted after the command name
+    return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+
+
+def post(url, body, timeout):
+    ''' one request, return (seconds, ok) '''
+    st = time.perf_counter()
+    try:
+        req = urllib.request.Request(url + '/calPacking', data=body, method='POST', headers={'Content-Type' : 'application/json'})
+        with urllib.request.urlopen(req, timeout=timeout) as r:
+            ok = r.status == 200 and json.loads(r.read()).get('Success', False)
+    except Exception:
+        ok = False
+    return time.perf_counter() - st, ok
+
+
+def run(url, payloads, requests=100, concurrency=4, warmup=0, timeout=120, server_pid=None):
+    ''' replay payloads round-robin, return the report dict '''
+    bodies = [json.dumps(p).encode('utf-8') for p in payloads]
+    for i in range(warmup):
+        post(url, bodies[i % len(bodies)], timeout)
+
+    cpu_st = cpuSeconds(server_pid)
+    st = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda i: post(url, bodies[i % len(bodies)], timeout), range(requests)))
+    elapsed = time.perf_counter() - st
+    cpu = cpuSeconds(server_pid) - cpu_st
+
+    latency = np.array([r[0] for r in results])
+    errors = sum(1 for r in results if not r[1])
+    return {
+        'requests' : requests,
+        'concurrency' : concurrency,
+        'payloads' : len(payloads),
+        'elapsed' : elapsed,
+        'throughput' : requests / elapsed,
+        'error_rate' : errors / requests,
+        'latency' : {
+            'mean' : float(latency.mean()),
+            'p50' : float(np.percentile(latency, 50)),
+            'p95' : float(np.percentile(latency, 95)),
+            'p99' : float(np.percentile(latency, 99)),
+            'max' : float(latency.max()),
+        },
+        # in-process runs also count the client threads
+        'cpu_per_request' : cpu / requests,
+        'cpu_scope' : 'server' if server_pid is not None else 'process',
+    }
+
+
+def gitRevision():
+    ''' '''
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+def compare(report, baseline):
+    ''' print the change of each headline figure against a previous report '''
+    rows = [
+        ('throughput', report['throughput'], baseline['throughput']),
+        ('error_rate', report['error_rate'], baseline['error_rate']),
+        ('cpu_per_request', report['cpu_per_request'], baseline['cpu_per_request']),
+    ] + [('latency.' + k, report['latency'][k], baseline['latency'][k]) for k in ('p50', 'p95', 'p99')]
+    print("%-18s %12s %12s %8s" % ('', 'baseline', 'current', 'change'))
+    for name, cur, base in rows:
+        change = (cur - base) / base * 100 if base else 0.0
+        print("%-18s %12.4f %12.4f %+7.1f%%" % (name, base, cur, change))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='load test the calPacking API')
+    parser.add_argument('--url', default=None, help='target a running server instead of starting api.app in-process')
+    parser.add_argument('--server-pid', type=int, default=None, help='pid of the --url server, to measure its cpu')
+    parser.add_argument('--payload', action='append', default=[], help='.json or .jsonl file of request bodies')
+    parser.add_argument('--catalog', default=CATALOG, help='box and item catalog for generated orders')
+    parser.add_argument('--orders', type=int, default=20, help='number of generated orders')
+    parser.add_argument('--max-lines', type=int, default=4)
+    parser.add_argument('--max-count', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--warmup', type=int, default=2)
+    parser.add_argument('--timeout', type=float, default=120)
+    parser.add_argument('--output', default=None, help='write the report as json')
+    parser.add_argument('--compare', default=None, help='previous report to compare against')
+    args = parser.parse_args(argv)
+
+    payloads = []
+    for path in args.payload:
+        payloads += loadPayloads(path)
+    if args.orders:
+        with open(args.catalog, encoding='utf-8') as f:
+            catalog = json.load(f)
+        payloads += makeOrders(catalog, args.orders, args.seed, args.max_lines, args.max_count)
+    if not payloads:
+        parser.error('no payloads, use --payload or --orders')
+
+    # startServer changes the working directory
+    output = os.path.abspath(args.output) if args.output else None
+    baseline = os.path.abspath(args.compare) if args.compare else None
+
+    server = None
+    url = args.url
+    if url is None:
+        url, server = startServer()
+
+    try:
+        report = run(url, payloads, args.requests, args.concurrency, args.warmup, args.timeout, args.server_pid)
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    report['version'] = gitRevision()
+    report['url'] = args.url or 'in-process'
+    report['seed'] = args.seed
+
+    l = report['latency']
+    print("requests %d  concurrency %d  errors %.1f%%" % (report['requests'], report['concurrency'], report['error_rate'] * 100))
+    print("throughput %.2f req/s  cpu/request %.4fs (%s)" % (report['throughput'], report['cpu_per_request'], report['cpu_scope']))
+    print("latency p50 %.4fs  p95 %.4fs  p99 %.4fs  max %.4fs" % (l['p50'], l['p95'], l['p99'], l['max']))
+
+    if baseline:
+        with open(baseline) as f:
+            compare(report, json.load(f))
+    if output:
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == '__main__':
+    main()
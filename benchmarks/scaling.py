@@ -0,0 +1,161 @@
+'''
+Scaling benchmark of Packer.pack.
+
+Sweeps the cases of benchmarks/cases.py over item counts and pack settings and records time,
+peak memory, utilization and placements per second. Results are written as json and can be
+checked against a stored baseline.
+
+    python -m benchmarks.scaling --sizes 10,100,1000 --output bench.json
+    python -m benchmarks.scaling --case mono_sku_pallet --fix-point 0,1 --check-stable 0,1
+    python -m benchmarks.scaling --baseline bench.json --threshold 1.2
+
+The default sweep goes up to 10000 items, every run is bounded by --max-seconds (DEFAULT_MAX_SECONDS)
+through the pack timeout, such rows have complete = false. --max-seconds 0 removes the bound.
+'''
+import argparse
+import itertools
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from py3dbp import Packer
+
+from . import import_time
+from .cases import CASES
+
+DEFAULT_SIZES = [10, 30, 100, 1000, 10000]
+# seconds per pack of the default sweep, large sizes stop there instead of running for hours
+DEFAULT_MAX_SECONDS = 60.0
+
+
+def packCase(case, n, fix_point=True, check_stable=True, number_of_decimals=0, seed=0, max_seconds=None):
+    ''' build and pack one case, return (packer, seconds) '''
+    bins, items, kwargs = CASES[case](n, seed)
+    packer = Packer()
+    for b in bins:
+        packer.addBin(b)
+    for item in items:
+        packer.addItem(item)
+
+    st = time.perf_counter()
+    packer.pack(fix_point=fix_point, check_stable=check_stable, support_surface_ratio=0.75,
+                number_of_decimals=number_of_decimals, timeout=max_seconds, **kwargs)
+    return packer, time.perf_counter() - st
+
+
+def measure(case, n, fix_point=True, check_stable=True, number_of_decimals=0, seed=0, max_seconds=None, memory=True):
+    ''' one row of results '''
+    packer, seconds = packCase(case, n, fix_point, check_stable, number_of_decimals, seed, max_seconds)
+
+    placed = [b.items for b in packer.bins]
+    fitted = sum(len(p) for p in placed)
+    bin_volume = sum(float(b.getVolume()) for b, p in zip(packer.bins, placed) if p)
+    item_volume = sum(float(i.getVolume()) for p in placed for i in p)
+
+    peak = None
+    if memory:
+        # separate run, tracemalloc slows packing down too much to time both at once
+        tracemalloc.start()
+        packCase(case, n, fix_point, check_stable, number_of_decimals, seed, max_seconds)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {
+        'case' : case,
+        'n' : n,
+        'fix_point' : fix_point,
+        'check_stable' : check_stable,
+        'number_of_decimals' : number_of_decimals,
+        'time' : seconds,
+        'peak_memory' : peak,
+        'fitted' : fitted,
+        # with distribute_items=False unfit_items holds every item, count the ones no bin took
+        'unfit' : n - fitted,
+        'utilization' : round(item_volume / bin_volume * 100, 2) if bin_volume else 0.0,
+        'placements_per_sec' : fitted / seconds if seconds else None,
+        'complete' : packer.complete,
+    }
+
+
+def rowKey(row):
+    ''' '''
+    return (row['case'], row['n'], row['fix_point'], row['check_stable'], row['number_of_decimals'])
+
+
+def compareBaseline(results, baseline, threshold=1.2):
+    ''' print time ratios against a baseline, return the rows slower than threshold '''
+    base = {rowKey(r) : r for r in baseline['results']}
+    slower = []
+    print("\n%-22s %6s %5s %10s %10s %7s" % ('case', 'n', 'fp/cs', 'baseline', 'current', 'ratio'))
+    for r in results:
+        b = base.get(rowKey(r))
+        if b is None or not b['time']:
+            continue
+        ratio = r['time'] / b['time']
+        flag = '  <-- slower' if ratio > threshold else ''
+        print("%-22s %6d %2d/%-2d %10.4f %10.4f %7.2f%s" % (
+            r['case'], r['n'], r['fix_point'], r['check_stable'], b['time'], r['time'], ratio, flag))
+        if ratio > threshold:
+            slower.append(r)
+    return slower
+
+
+def _ints(s):
+    ''' "10,100" -> [10, 100] '''
+    return [int(i) for i in s.split(',') if i]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='scaling benchmark of Packer.pack')
+    parser.add_argument('--case', action='append', choices=sorted(CASES), help='default: every case')
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)), help='item counts, e.g. 10,100,1000,10000')
+    parser.add_argument('--fix-point', default='1', help='0,1')
+    parser.add_argument('--check-stable', default='1', help='0,1')
+    parser.add_argument('--decimals', default='0', help='number_of_decimals, e.g. 0,2')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-seconds', type=float, default=DEFAULT_MAX_SECONDS, help='pack timeout per run, 0 for none')
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc run')
+    parser.add_argument('--no-import-time', action='store_true')
+    parser.add_argument('--output', default=None, help='write results as json')
+    parser.add_argument('--baseline', default=None, help='results json to compare against')
+    parser.add_argument('--threshold', type=float, default=1.2, help='time ratio counted as a regression')
+    args = parser.parse_args(argv)
+
+    results = []
+    print("%-22s %6s %5s %3s %10s %12s %8s %8s %10s" % ('case', 'n', 'fp/cs', 'dec', 'time', 'peak_mem', 'fitted', 'util%', 'place/s'))
+    for case, n, fp, cs, dec in itertools.product(args.case or sorted(CASES), _ints(args.sizes),
+                                                 _ints(args.fix_point), _ints(args.check_stable), _ints(args.decimals)):
+        r = measure(case, n, bool(fp), bool(cs), dec, args.seed, args.max_seconds or None, not args.no_memory)
+        results.append(r)
+        print("%-22s %6d %2d/%-2d %3d %10.4f %12s %8d %8.2f %10.1f%s" % (
+            case, n, fp, cs, dec, r['time'], r['peak_memory'], r['fitted'], r['utilization'],
+            r['placements_per_sec'] or 0, '' if r['complete'] else '  (timeout)'))
+
+    report = {
+        'version' : subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=import_time.ROOT, capture_output=True, text=True).stdout.strip(),
+        'python' : platform.python_version(),
+        'seed' : args.seed,
+        'results' : results,
+    }
+    if not args.no_import_time:
+        report['import_time'] = import_time.run(repeat=3)
+        for name, r in report['import_time'].items():
+            print("import %-16s median %.4fs" % (name, r['median']))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            slower = compareBaseline(results, json.load(f), args.threshold)
+        if slower:
+            sys.exit(1)
+    return report
+
+
+if __name__ == '__main__':
+    main()
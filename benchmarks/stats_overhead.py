@@ -0,0 +1,61 @@
+'''
+Overhead of PackStats in Packer.pack.
+
+Packs the same case with stats off and on, alternating runs, and prints the medians.
+The cost of the disabled checks shows up against a baseline taken with benchmarks.scaling
+on a build without instrumentation.
+
+    python -m benchmarks.stats_overhead --case mixed_container --n 60 --repeat 7
+'''
+import argparse
+import json
+import statistics
+import time
+
+from py3dbp import Packer
+
+from .cases import CASES
+
+
+def run(case, n, repeat=5):
+    ''' median seconds with stats off and on '''
+    times = {'off' : [], 'on' : []}
+    for _ in range(repeat):
+        for mode in ('off', 'on'):
+            bins, items, kwargs = CASES[case](n)
+            times[mode].append(_pack(bins, items, kwargs, mode == 'on'))
+    off = statistics.median(times['off'])
+    on = statistics.median(times['on'])
+    return {'case' : case, 'n' : n, 'repeat' : repeat, 'off' : off, 'on' : on, 'overhead' : on / off - 1}
+
+
+def _pack(bins, items, kwargs, stats):
+    ''' '''
+    packer = Packer()
+    for b in bins:
+        packer.addBin(b)
+    for item in items:
+        packer.addItem(item)
+    st = time.perf_counter()
+    packer.pack(stats=stats, **kwargs)
+    return time.perf_counter() - st
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='PackStats overhead')
+    parser.add_argument('--case', default='mixed_container', choices=sorted(CASES))
+    parser.add_argument('--n', type=int, default=60)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args(argv)
+
+    r = run(args.case, args.n, args.repeat)
+    print("%s n=%d  stats off %.4fs  on %.4fs  overhead when on %+.1f%%" % (r['case'], r['n'], r['off'], r['on'], r['overhead'] * 100))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(r, f, indent=2)
+    return r
+
+
+if __name__ == '__main__':
+    main()
@@ -1 +1,11 @@
-from .main import Packer, Bin, Item, Painter
+from .main import Packer, Bin, Item, CancelToken
+from .stats import PackStats
+from .online import OnlinePacker
+
+
+def __getattr__(name):
+    ''' load Painter (and matplotlib) on first use only '''
+    if name == 'Painter':
+        from .painter import Painter
+        return Painter
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
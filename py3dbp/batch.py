@@ -0,0 +1,340 @@
+'''
+Batch packing of many independent orders.
+
+    python -m py3dbp orders.csv --catalog widadvance.json --output results.jsonl
+
+Orders are streamed from CSV or JSONL :
+    CSV    columns order_id, sku, count (or qty), optional box ; consecutive rows with the same order_id are one order.
+    JSONL  the same rows as objects, or one order per line : {"order_id" : .., "items" : [{"sku" : .., "count" : ..}], "box" : ..}
+sku is an item name of the catalog (same format as widadvance.json), box a box name or a list of names.
+Orders without a box use --box (repeatable), else every box of the catalog ; the best box is kept
+(fewest unfit items, then highest utilization), like calPacking of api.py.
+
+Results are JSONL, one line per order with seq (position in the input), in input order or with
+--unordered as they complete. The output file is the checkpoint : --resume skips the orders already in it.
+'''
+import argparse
+import collections
+import concurrent.futures
+import csv
+import json
+import os
+import random
+import sys
+import time
+
+from .main import Packer, Bin, Item
+from .serialize import RawJSON, itemsJSON, dumps
+
+_catalog = None
+
+
+def loadCatalog(path):
+    ''' {"box" : {name : box}, "item" : {name : item}} of a widadvance.json style file '''
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    return {
+        'box' : {b['name'] : b for b in data.get('box', [])},
+        'item' : {i['name'] : i for i in data.get('item', [])},
+    }
+
+
+def catalogColor(s):
+    ''' same color as api.randColor, without touching the global random state '''
+    rng = random.Random(s)
+    return "#" + ''.join([rng.choice('0123456789ABCDEF') for j in range(6)])
+
+
+def _boxNames(box):
+    ''' '''
+    if box is None or box == '':
+        return []
+    if isinstance(box, str):
+        return [b for b in box.split('|') if b]
+    return list(box)
+
+
+def _count(row):
+    ''' '''
+    for key in ('count', 'qty', 'quantity'):
+        if row.get(key) not in (None, ''):
+            return int(row[key])
+    return 1
+
+
+def _rows(path):
+    ''' input rows as dicts, CSV or JSONL by extension '''
+    if path.endswith('.csv'):
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                yield row
+    else:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def readOrders(path):
+    ''' stream (order_id, [(sku, count)], [box names]), consecutive rows of one order_id are grouped '''
+    current, lines, boxes = None, [], []
+    for row in _rows(path):
+        order_id = str(row['order_id'])
+        if 'items' in row:
+            if current is not None:
+                yield current, lines, boxes
+                current = None
+            yield order_id, [(i.get('sku', i.get('name')), _count(i)) for i in row['items']], _boxNames(row.get('box'))
+            continue
+        if order_id != current:
+            if current is not None:
+                yield current, lines, boxes
+            current, lines, boxes = order_id, [], []
+        lines.append((row.get('sku', row.get('name')), _count(row)))
+        for b in _boxNames(row.get('box')):
+            if b not in boxes:
+                boxes.append(b)
+    if current is not None:
+        yield current, lines, boxes
+
+
+def _initWorker(catalog):
+    ''' '''
+    global _catalog
+    _catalog = catalog
+
+
+def makeBin(box):
+    ''' Bin of a catalog box, as api.makeBox '''
+    return Bin(partno=box['name'], WHD=box['WHD'], max_weight=box['weight'], corner=box.get('coner', 0), put_type=box.get('openTop', [1])[0])
+
+
+def makeItems(sku, count):
+    ''' count Items of a catalog item, as api.makeItems '''
+    return [Item(
+        partno=sku['name'] + '-{}'.format(str(j + 1)),
+        name=sku['name'],
+        typeof='cylinder' if sku.get('type') == 2 else 'cube',
+        WHD=sku['WHD'],
+        weight=sku['weight'],
+        level=1 if sku.get('level') == 1 else 2,
+        loadbear=sku.get('loadbear', 100),
+        updown=bool(sku.get('updown', 1)),
+        color=catalogColor(sku.get('color', 0)))
+        for j in range(count)]
+
+
+def packOrder(task):
+    '''
+    pack one order into each of its boxes and keep the best,
+    returns (seq, json line, item count, seconds, error : the order failed, its line holds "error")
+    '''
+    seq, order_id, lines, boxes, timeout = task
+    st = time.perf_counter()
+    result = {'seq' : seq, 'order_id' : order_id}
+    try:
+        missing = [sku for sku, _ in lines if sku not in _catalog['item']]
+        if missing:
+            raise KeyError('unknown sku ' + ', '.join(map(str, missing)))
+        boxes = boxes or list(_catalog['box'])
+        best = None
+        for name in boxes:
+            if name not in _catalog['box']:
+                raise KeyError('unknown box ' + str(name))
+            packer = Packer()
+            packer.addBin(makeBin(_catalog['box'][name]))
+            for sku, count in lines:
+                for item in makeItems(_catalog['item'][sku], count):
+                    packer.addItem(item)
+            packer.pack(bigger_first=True, distribute_items=False, fix_point=True, number_of_decimals=0, timeout=timeout)
+            bin = packer.bins[0]
+            fit_volume = sum(float(item.getVolume()) for item in bin.items)
+            key = (len(bin.unfitted_items), -fit_volume / float(bin.getVolume()))
+            if best is None or key < best[0]:
+                best = (key, bin, packer.complete)
+        key, bin, complete = best
+        result.update({
+            'box' : bin.partno,
+            'fitCount' : len(bin.items),
+            'unfitCount' : len(bin.unfitted_items),
+            'utilization' : round(-key[1] * 100, 2),
+            'complete' : complete,
+            'fitItem' : RawJSON(itemsJSON(bin.items)),
+            'unfitItem' : RawJSON(itemsJSON(bin.unfitted_items)),
+        })
+    except Exception as e:
+        result['error'] = '{}: {}'.format(type(e).__name__, e)
+    n = sum(count for _, count in lines)
+    return seq, dumps(result), n, time.perf_counter() - st, 'error' in result
+
+
+def doneOrders(path):
+    '''
+    seq of the orders already in an output file, for --resume.
+    A partly written last line is cut off.
+    '''
+    done = set()
+    if not os.path.exists(path):
+        return done
+    good = 0
+    with open(path, 'rb') as f:
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            try:
+                done.add(json.loads(line)['seq'])
+            except ValueError:
+                break
+            good += len(line)
+    if good != os.path.getsize(path):
+        with open(path, 'r+b') as f:
+            f.truncate(good)
+    return done
+
+
+class Report:
+
+    def __init__(self, workers):
+        ''' throughput of a batch run '''
+        self.workers = workers
+        self.start = time.perf_counter()
+        self.orders = 0
+        self.items = 0
+        self.errors = 0
+        self.skipped = 0
+        self.seconds = []
+
+
+    def add(self, items, seconds, error=False):
+        ''' one written order, error : packOrder failed on it '''
+        self.orders += 1
+        self.items += items
+        self.seconds.append(seconds)
+        if error:
+            self.errors += 1
+
+
+    def asDict(self):
+        ''' '''
+        elapsed = time.perf_counter() - self.start
+        s = sorted(self.seconds)
+        pct = lambda p : round(s[min(len(s) - 1, int(p * len(s)))], 4) if s else None
+        return {
+            'orders' : self.orders,
+            'items' : self.items,
+            'errors' : self.errors,
+            'skipped' : self.skipped,
+            'workers' : self.workers,
+            'elapsed' : round(elapsed, 3),
+            'orders_per_second' : round(self.orders / elapsed, 2) if elapsed else None,
+            'items_per_second' : round(self.items / elapsed, 2) if elapsed else None,
+            'order_seconds' : {'p50' : pct(0.5), 'p95' : pct(0.95), 'max' : round(s[-1], 4) if s else None},
+        }
+
+
+    def string(self):
+        ''' '''
+        r = self.asDict()
+        return "%d orders (%d errors, %d skipped) %d items in %.1fs : %s orders/s %s items/s, per order p50 %ss p95 %ss" % (
+            r['orders'], r['errors'], r['skipped'], r['items'], r['elapsed'], r['orders_per_second'], r['items_per_second'],
+            r['order_seconds']['p50'], r['order_seconds']['p95'])
+
+
+
+def run(input_path, catalog_path, output_path, boxes=(), workers=None, max_in_flight=None, ordered=True,
+        resume=False, timeout=None, flush_every=100, progress=None, log=sys.stderr):
+    ''' pack every order of input_path into output_path (JSONL), return the Report '''
+    catalog = loadCatalog(catalog_path)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    max_in_flight = max_in_flight or 2 * max(workers, 1)
+    done = doneOrders(output_path) if resume else set()
+    report = Report(workers)
+    out = open(output_path, 'a' if resume else 'w', encoding='utf-8')
+
+    def tasks():
+        for seq, (order_id, lines, order_boxes) in enumerate(readOrders(input_path)):
+            if seq in done:
+                report.skipped += 1
+                continue
+            yield (seq, order_id, lines, order_boxes or list(boxes), timeout)
+
+    pending = {}
+    written = [0]
+    last_progress = [time.perf_counter()]
+
+    def write(seq, line, items, seconds, error):
+        report.add(items, seconds, error)
+        out.write(line + '\n')
+        written[0] += 1
+        if written[0] % flush_every == 0:
+            out.flush()
+            os.fsync(out.fileno())
+        if progress and time.perf_counter() - last_progress[0] >= progress:
+            last_progress[0] = time.perf_counter()
+            log.write(report.string() + '\n')
+
+    try:
+        if workers <= 1:
+            _initWorker(catalog)
+            for task in tasks():
+                write(*packOrder(task))
+        else:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_initWorker, initargs=(catalog,)) as pool:
+                # ordered output : results wait in `ready` for the orders before them, they count as in flight
+                ready = {}
+                order = collections.deque()
+                it = iter(tasks())
+                exhausted = False
+                while True:
+                    while not exhausted and len(pending) + len(ready) < max_in_flight:
+                        task = next(it, None)
+                        if task is None:
+                            exhausted = True
+                            break
+                        pending[pool.submit(packOrder, task)] = task[0]
+                        order.append(task[0])
+                    if not pending:
+                        break
+                    finished, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                    for f in finished:
+                        del pending[f]
+                        r = f.result()
+                        if ordered:
+                            ready[r[0]] = r
+                        else:
+                            write(*r)
+                    if ordered:
+                        # order holds the submitted seqs in input order
+                        while order and order[0] in ready:
+                            write(*ready.pop(order.popleft()))
+    finally:
+        out.flush()
+        os.fsync(out.fileno())
+        out.close()
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m py3dbp', description='pack orders from CSV / JSONL into JSONL results')
+    parser.add_argument('input', help='orders, .csv or .jsonl')
+    parser.add_argument('--catalog', default='widadvance.json', help='boxes and SKUs, widadvance.json format')
+    parser.add_argument('--output', '-o', default='results.jsonl')
+    parser.add_argument('--box', action='append', default=[], help='candidate box name for orders without one (repeatable, default : all)')
+    parser.add_argument('--workers', type=int, default=None, help='processes, default cpu count, 1 packs in this process')
+    parser.add_argument('--max-in-flight', type=int, default=None, help='orders submitted and not written yet, default 2 x workers')
+    parser.add_argument('--unordered', action='store_true', help='write results as they complete')
+    parser.add_argument('--resume', action='store_true', help='keep the orders already in --output and pack the rest')
+    parser.add_argument('--timeout', type=float, default=None, help='seconds per box of an order')
+    parser.add_argument('--flush-every', type=int, default=100, help='fsync the output every N results')
+    parser.add_argument('--progress', type=float, default=None, help='print throughput every N seconds')
+    parser.add_argument('--report', default=None, help='write the throughput report as json')
+    args = parser.parse_args(argv)
+
+    report = run(args.input, args.catalog, args.output, args.box, args.workers, args.max_in_flight, not args.unordered,
+                 args.resume, args.timeout, args.flush_every, args.progress)
+    print(report.string(), file=sys.stderr)
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report.asDict(), f, indent=2)
+    return report
@@ -17,3 +17,24 @@ class Axis:
 
     ALL = [WIDTH, HEIGHT, DEPTH]
 
+
+class TraceKind:
+    BIN = 0         # packing into a bin starts
+    CORNER = 1      # static box of the bin (container corner, obstacle)
+    REJECT = 2      # pivot / rotation rejected, see TraceReason
+    COMMIT = 3      # item placed at position
+    UNFIT = 4       # no pivot of the bin fits the item
+    RESET = 5       # bin cleared (binding repack)
+
+    NAMES = ['bin','corner','reject','commit','unfit','reset']
+
+
+class TraceReason:
+    OK = 0
+    OUT_OF_BIN = 1
+    COLLISION = 2
+    WEIGHT = 3
+    UNSTABLE = 4
+    LOADBEAR = 5
+
+    NAMES = ['ok','out_of_bin','collision','weight','unstable','loadbear']
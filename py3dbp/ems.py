@@ -0,0 +1,178 @@
+'''
+Empty maximal space (EMS) placement engine, Packer.pack(engine='ems').
+
+Every bin keeps the maximal empty boxes left in it as [x0,x1,y0,y1,z0,z1] rows of a numpy array.
+An item is tried at the back-bottom-left corner of the spaces it fits in, in the order of a rule :
+    'dftrc'     distance to the front-top-right corner : the far corner of the item as far as possible
+                from (W, H, D), fills the back bottom first (Goncalves & Resende)
+    'best_fit'  smallest space left over, space volume - item volume
+    'bbl'       back-bottom-left : smallest x, then z, then y
+The first candidate Bin.putItem accepts (fix_point, stability, weight, loadbear as usual) is kept.
+After a placement every space the box cuts is split into the up to 6 spaces around it
+(difference), and spaces inside another one or thinner than the smallest item are dropped (prune).
+It is fast, not always tighter than the pivot engine : it wins on mixed cartons and loses on
+loads of one box size, where engine='layer' (or the default pivots) should be used.
+'''
+import numpy as np
+
+from .constants import RotationType
+from .auxiliary_methods import set2Decimal
+
+RULES = ('dftrc', 'best_fit', 'bbl')
+
+
+class EmptySpaces:
+
+    def __init__(self, bin, min_dim=0.0):
+        '''
+        maximal empty spaces of bin, static boxes (corners, obstacles) already taken out.
+        min_dim : spaces with a side below it can hold no item and are dropped.
+        '''
+        self.size = (float(bin.width), float(bin.height), float(bin.depth))
+        self.min_dim = min_dim
+        self.spaces = np.array([[0, self.size[0], 0, self.size[1], 0, self.size[2]]])
+        for box in bin.static_array:
+            self.subtract(box)
+
+
+    def subtract(self, box):
+        ''' take box [x0,x1,y0,y1,z0,z1] out of the spaces : difference, then prune '''
+        s = self.spaces
+        box = np.asarray(box, dtype=float)
+        cut = (s[:, 0] < box[1]) & (box[0] < s[:, 1]) & (s[:, 2] < box[3]) & (box[2] < s[:, 3]) & (s[:, 4] < box[5]) & (box[4] < s[:, 5])
+        if not cut.any():
+            return
+        keep, parents = s[~cut], s[cut]
+        children = []
+        for axis in range(3):
+            lo, hi = 2 * axis, 2 * axis + 1
+            # the part of the space before the box along axis, then the part after it
+            before = parents.copy()
+            before[:, hi] = np.minimum(before[:, hi], box[lo])
+            after = parents.copy()
+            after[:, lo] = np.maximum(after[:, lo], box[hi])
+            children.append(before)
+            children.append(after)
+        children = np.concatenate(children)
+        sides = children[:, 1::2] - children[:, 0::2]
+        children = children[(sides > 0).all(axis=1) & (sides >= self.min_dim).all(axis=1)]
+        if len(children):
+            children = children[self._maximal(children, keep)]
+        self.spaces = np.concatenate([keep, children])
+
+
+    def _maximal(self, children, others):
+        ''' mask of the children inside no other child (first copy of equal ones kept) and no other space '''
+        def inside(a, b):
+            # a[i] inside b[j]
+            return (b[None, :, 0] <= a[:, None, 0]) & (a[:, None, 1] <= b[None, :, 1]) & \
+                   (b[None, :, 2] <= a[:, None, 2]) & (a[:, None, 3] <= b[None, :, 3]) & \
+                   (b[None, :, 4] <= a[:, None, 4]) & (a[:, None, 5] <= b[None, :, 5])
+        n = len(children)
+        within = inside(children, children)
+        equal = within & within.T
+        # inside another child, or equal to an earlier one
+        order = np.arange(n)
+        dominated = (within & ~equal).any(axis=1) | (equal & (order[None, :] < order[:, None])).any(axis=1)
+        if len(others):
+            dominated |= inside(children, others).any(axis=1)
+        return ~dominated
+
+
+    def candidates(self, dims, rule='dftrc', support=None):
+        '''
+        (space index, rotation index) pairs where a box of dims[r] = (w, h, d) fits, best first for rule.
+        The box goes to the (x0, y0, z0) corner of the space.
+        support : (fit_items, support_surface_ratio) to keep only the corners where the box would
+        stand, by the rules of Bin.putItem's check_stable.
+        '''
+        if rule not in RULES:
+            raise ValueError("rule must be one of %s, got %r" % (', '.join(RULES), rule))
+        s = self.spaces
+        if not len(s):
+            return []
+        sides = s[:, 1::2] - s[:, 0::2]
+        dims = np.asarray(dims, dtype=float)
+        # spaces x rotations
+        fits = (sides[:, None, :] >= dims[None, :, :]).all(axis=2)
+        space, rotation = np.nonzero(fits)
+        if not len(space):
+            return []
+        corner = s[space][:, 0::2]
+        if support is not None:
+            ok = standing(corner, dims[rotation], *support)
+            space, rotation, corner = space[ok], rotation[ok], corner[ok]
+            if not len(space):
+                return []
+        if rule == 'dftrc':
+            far = corner + dims[rotation]
+            score = -((np.array(self.size) - far) ** 2).sum(axis=1)
+            # score first, the rotation only breaks ties
+            keys = [rotation, score]
+        elif rule == 'best_fit':
+            score = sides[space].prod(axis=1) - dims[rotation].prod(axis=1)
+            keys = [rotation, corner[:, 1], corner[:, 2], corner[:, 0], score]
+        else:
+            keys = [rotation, corner[:, 1], corner[:, 2], corner[:, 0]]
+        # np.lexsort : last key first
+        order = np.lexsort(keys)
+        return list(zip(space[order].tolist(), rotation[order].tolist()))
+
+
+
+def standing(corner, dims, fit_items, ratio):
+    '''
+    mask of the boxes at corner (x, y, z) with dims (w, h, d) that check_stable accepts : on the floor,
+    or resting on tops at z that cover at least ratio of the base, or under all 4 base vertices.
+    '''
+    tops = fit_items[1:]
+    x, y, z = corner[:, 0:1], corner[:, 1:2], corner[:, 2:3]
+    w, h = dims[:, 0:1], dims[:, 1:2]
+    level = tops[None, :, 5] == z
+    area = (np.clip(np.minimum(x + w, tops[None, :, 1]) - np.maximum(x, tops[None, :, 0]), 0, None) *
+            np.clip(np.minimum(y + h, tops[None, :, 3]) - np.maximum(y, tops[None, :, 2]), 0, None) * level).sum(axis=1)
+    ok = (corner[:, 2] == 0) | (area >= ratio * (w * h)[:, 0])
+    vertices = True
+    for vx, vy in ((x, y), (x + w, y), (x, y + h), (x + w, y + h)):
+        vertices = vertices & ((tops[None, :, 0] <= vx) & (vx <= tops[None, :, 1]) & (tops[None, :, 2] <= vy) & (vy <= tops[None, :, 3]) & level).any(axis=1)
+    return ok | vertices
+
+
+def itemRotations(item):
+    ''' rotation types allowed for item and the (w, h, d) of each '''
+    rotations = RotationType.ALL if item.updown == True else RotationType.Notupdown
+    dims = []
+    current = item.rotation_type
+    for r in rotations:
+        item.rotation_type = r
+        dims.append([float(v) for v in item.getDimension()])
+    item.rotation_type = current
+    return list(rotations), dims
+
+
+def placeItem(bin, item, rule='dftrc', max_candidates=None, cancel_token=None):
+    '''
+    put item in bin at the best empty space corner putItem accepts. Returns (placed, candidates tried).
+    bin.empty_spaces (an EmptySpaces) is updated with the final box.
+    cancel_token : checked before every candidate like the pivot loop, raises main.PackCancelled when it fires.
+    '''
+    spaces = bin.empty_spaces
+    rotations, dims = itemRotations(item)
+    # fix_point drops the box, check_stable then wants it standing : skip corners it would fall from
+    support = (bin.fit_items, bin.support_surface_ratio) if bin.fix_point == True and bin.check_stable == True else None
+    tried = 0
+    for space, r in spaces.candidates(dims, rule, support):
+        if max_candidates is not None and tried >= max_candidates:
+            break
+        if cancel_token is not None and cancel_token.isCancelled():
+            from .main import PackCancelled
+            raise PackCancelled(cancel_token.reason)
+        tried += 1
+        x0, y0, z0 = spaces.spaces[space][0::2]
+        pivot = [set2Decimal(x0, bin.number_of_decimals), set2Decimal(y0, bin.number_of_decimals), set2Decimal(z0, bin.number_of_decimals)]
+        if bin.putItem(item, pivot, rotations=[rotations[r]]):
+            x, y, z = (float(v) for v in item.position)
+            w, h, d = dims[r]
+            spaces.subtract([x, x + w, y, y + h, z, z + d])
+            return True, tried
+    return False, tried
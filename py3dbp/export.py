@@ -0,0 +1,370 @@
+'''
+Static 3D export of a packed Bin, no matplotlib figure involved.
+
+    writeGLB(bin, 'load.glb')      binary glTF, one unit box mesh instanced per color (EXT_mesh_gpu_instancing)
+    writeOBJ(bin, 'load.obj')      Wavefront OBJ + MTL, one group per item
+    writeHTML(bin, 'load.html')    self-contained WebGL2 viewer, works offline
+    export(bin, path)              picks one of the above from the extension
+
+Boxes come from item.position and item.getDimension(), so rotation_type is already applied.
+py3dbp uses z (depth) as the vertical axis, glTF and OBJ are y-up : glTF gets a root node rotation,
+OBJ vertices are written as (x, z, -y).
+'''
+import json
+import struct
+
+import numpy as np
+
+# 24 vertices (4 per face, flat normals) and 36 indices of a unit box, counter-clockwise seen from outside
+_FACES = [
+    ((1,0,0), [(1,0,0),(1,1,0),(1,1,1),(1,0,1)]),
+    ((-1,0,0), [(0,1,0),(0,0,0),(0,0,1),(0,1,1)]),
+    ((0,1,0), [(1,1,0),(0,1,0),(0,1,1),(1,1,1)]),
+    ((0,-1,0), [(0,0,0),(1,0,0),(1,0,1),(0,0,1)]),
+    ((0,0,1), [(0,0,1),(1,0,1),(1,1,1),(0,1,1)]),
+    ((0,0,-1), [(0,1,0),(1,1,0),(1,0,0),(0,0,0)]),
+]
+BOX_POSITIONS = np.array([v for _, quad in _FACES for v in quad], dtype=np.float32)
+BOX_NORMALS = np.array([n for n, quad in _FACES for _ in quad], dtype=np.float32)
+BOX_INDICES = np.array([[4*f, 4*f+1, 4*f+2, 4*f, 4*f+2, 4*f+3] for f in range(6)], dtype=np.uint16).ravel()
+
+# 8 corners and 12 edges of a unit box, for the bin outline
+BOX_CORNERS = np.array([[0,0,0],[1,0,0],[1,1,0],[0,1,0],[0,0,1],[1,0,1],[1,1,1],[0,1,1]], dtype=np.float32)
+BOX_EDGES = np.array([[0,1],[1,2],[2,3],[3,0],[4,5],[5,6],[6,7],[7,4],[0,4],[1,5],[2,6],[3,7]], dtype=np.uint16)
+# OBJ quads over BOX_CORNERS, outward winding
+OBJ_QUADS = np.array([[0,3,2,1],[4,5,6,7],[0,1,5,4],[1,2,6,5],[2,3,7,6],[3,0,4,7]])
+
+# quaternion (x,y,z,w) turning z-up into y-up
+Z_UP_TO_Y_UP = [-0.7071067811865476, 0.0, 0.0, 0.7071067811865476]
+
+_GLTF_FLOAT = 5126
+_GLTF_USHORT = 5123
+_GLTF_ARRAY_BUFFER = 34962
+_GLTF_ELEMENT_ARRAY_BUFFER = 34963
+
+_rgb_cache = {}
+
+
+def colorRGB(color):
+    ''' '#RRGGBB' or a matplotlib color name -> (r,g,b) in 0..1 '''
+    if color not in _rgb_cache:
+        if isinstance(color, str) and color.startswith('#') and len(color) == 7:
+            rgb = tuple(int(color[i:i+2], 16) / 255 for i in (1, 3, 5))
+        else:
+            # names like 'olive' or 'skyblue', matplotlib.colors does not load pyplot
+            from matplotlib.colors import to_rgb
+            rgb = tuple(to_rgb(color))
+        _rgb_cache[color] = rgb
+    return _rgb_cache[color]
+
+
+def binBoxes(bin):
+    ''' (boxes, colors, partnos) of the items in bin, boxes is a float32 (n,6) array of x,y,z,w,h,d '''
+    items = bin.items
+    boxes = np.zeros((len(items), 6), dtype=np.float32)
+    for i, item in enumerate(items):
+        boxes[i, :3] = [float(v) for v in item.position]
+        boxes[i, 3:] = [float(v) for v in item.getDimension()]
+    return boxes, [item.color for item in items], [str(item.partno) for item in items]
+
+
+def _colorGroups(colors):
+    ''' color -> indices of the items with that color, in first seen order '''
+    groups = {}
+    for i, color in enumerate(colors):
+        groups.setdefault(color, []).append(i)
+    return groups
+
+
+class _GLTFBuffer:
+
+    def __init__(self):
+        ''' binary chunk, buffer views and accessors of a glTF file '''
+        self.data = bytearray()
+        self.views = []
+        self.accessors = []
+
+
+    def add(self, array, type_, component, target=None, bounds=False):
+        ''' append array as its own buffer view, return the accessor index '''
+        self.data += b'\0' * (-len(self.data) % 4)
+        view = {'buffer' : 0, 'byteOffset' : len(self.data), 'byteLength' : array.nbytes}
+        if target is not None:
+            view['target'] = target
+        self.data += array.tobytes()
+        self.views.append(view)
+        accessor = {'bufferView' : len(self.views) - 1, 'componentType' : component, 'count' : len(array), 'type' : type_}
+        if bounds:
+            accessor['min'] = array.min(axis=0).tolist()
+            accessor['max'] = array.max(axis=0).tolist()
+        self.accessors.append(accessor)
+        return len(self.accessors) - 1
+
+
+
+def gltfDocument(bin):
+    ''' (glTF json dict, binary chunk) of bin '''
+    boxes, colors, partnos = binBoxes(bin)
+    buf = _GLTFBuffer()
+    position = buf.add(BOX_POSITIONS, 'VEC3', _GLTF_FLOAT, _GLTF_ARRAY_BUFFER, bounds=True)
+    normal = buf.add(BOX_NORMALS, 'VEC3', _GLTF_FLOAT, _GLTF_ARRAY_BUFFER)
+    indices = buf.add(BOX_INDICES, 'SCALAR', _GLTF_USHORT, _GLTF_ELEMENT_ARRAY_BUFFER)
+
+    materials, meshes, nodes = [], [], []
+    for color, idx in _colorGroups(colors).items():
+        idx = np.asarray(idx)
+        translation = buf.add(np.ascontiguousarray(boxes[idx, :3]), 'VEC3', _GLTF_FLOAT)
+        scale = buf.add(np.ascontiguousarray(boxes[idx, 3:]), 'VEC3', _GLTF_FLOAT)
+        materials.append({'name' : str(color), 'pbrMetallicRoughness' : {
+            'baseColorFactor' : list(colorRGB(color)) + [1.0], 'metallicFactor' : 0.0, 'roughnessFactor' : 0.9}})
+        meshes.append({'name' : str(color), 'primitives' : [{
+            'attributes' : {'POSITION' : position, 'NORMAL' : normal}, 'indices' : indices, 'material' : len(materials) - 1}]})
+        nodes.append({'name' : str(color), 'mesh' : len(meshes) - 1,
+                      'extensions' : {'EXT_mesh_gpu_instancing' : {'attributes' : {'TRANSLATION' : translation, 'SCALE' : scale}}},
+                      'extras' : {'items' : [partnos[i] for i in idx]}})
+
+    # bin outline
+    corners = BOX_CORNERS * np.array([float(bin.width), float(bin.height), float(bin.depth)], dtype=np.float32)
+    outline = buf.add(corners, 'VEC3', _GLTF_FLOAT, _GLTF_ARRAY_BUFFER, bounds=True)
+    edges = buf.add(BOX_EDGES.ravel(), 'SCALAR', _GLTF_USHORT, _GLTF_ELEMENT_ARRAY_BUFFER)
+    materials.append({'name' : 'bin', 'pbrMetallicRoughness' : {'baseColorFactor' : [0.0, 0.0, 0.0, 1.0]}})
+    meshes.append({'name' : 'bin', 'primitives' : [{'attributes' : {'POSITION' : outline}, 'indices' : edges, 'mode' : 1, 'material' : len(materials) - 1}]})
+    nodes.append({'name' : 'bin', 'mesh' : len(meshes) - 1})
+
+    nodes.append({'name' : str(bin.partno), 'rotation' : Z_UP_TO_Y_UP, 'children' : list(range(len(nodes)))})
+    doc = {
+        'asset' : {'version' : '2.0', 'generator' : 'py3dbp'},
+        'extensionsUsed' : ['EXT_mesh_gpu_instancing'],
+        'scene' : 0,
+        'scenes' : [{'nodes' : [len(nodes) - 1]}],
+        'nodes' : nodes,
+        'meshes' : meshes,
+        'materials' : materials,
+        'accessors' : buf.accessors,
+        'bufferViews' : buf.views,
+        'buffers' : [{'byteLength' : len(buf.data)}],
+    }
+    return doc, bytes(buf.data)
+
+
+def writeGLB(bin, path):
+    ''' binary glTF of bin '''
+    doc, data = gltfDocument(bin)
+    js = json.dumps(doc, separators=(',', ':')).encode('utf-8')
+    js += b' ' * (-len(js) % 4)
+    data += b'\0' * (-len(data) % 4)
+    with open(path, 'wb') as f:
+        f.write(struct.pack('<4sII', b'glTF', 2, 12 + 8 + len(js) + 8 + len(data)))
+        f.write(struct.pack('<I4s', len(js), b'JSON'))
+        f.write(js)
+        f.write(struct.pack('<I4s', len(data), b'BIN\0'))
+        f.write(data)
+
+
+def writeOBJ(bin, path, mtl_path=None):
+    ''' OBJ of bin with a sibling .mtl (one material per color), y-up '''
+    boxes, colors, partnos = binBoxes(bin)
+    if mtl_path is None:
+        mtl_path = path.rsplit('.', 1)[0] + '.mtl'
+    groups = _colorGroups(colors)
+    material = {color : 'color%d' % i for i, color in enumerate(groups)}
+
+    # 8 corners per box, then z-up -> y-up
+    corners = boxes[:, None, :3] + BOX_CORNERS[None, :, :] * boxes[:, None, 3:]
+    corners = corners.reshape(-1, 3)[:, [0, 2, 1]] * np.array([1, 1, -1], dtype=np.float32) + 0.0
+    faces = (OBJ_QUADS[None, :, :] + 1 + 8 * np.arange(len(boxes))[:, None, None]).reshape(len(boxes), -1)
+    lines = ['mtllib %s' % mtl_path.replace('\\', '/').rsplit('/', 1)[-1]]
+    lines.append(('v %g %g %g\n' * len(corners) % tuple(corners.ravel().tolist())).rstrip('\n'))
+    face_block = 'f %d %d %d %d\n' * 6
+    for partno, color, face in zip(partnos, colors, faces.tolist()):
+        lines.append('g %s\nusemtl %s' % (partno.replace(' ', '_'), material[color]))
+        lines.append((face_block % tuple(face)).rstrip('\n'))
+    with open(path, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+    with open(mtl_path, 'w') as f:
+        for color, name in material.items():
+            f.write('newmtl %s\nKd %.4f %.4f %.4f\n' % ((name,) + colorRGB(color)))
+
+
+def viewerData(bin):
+    ''' compact dict the HTML viewer reads '''
+    boxes, colors, partnos = binBoxes(bin)
+    rgb = np.array([colorRGB(c) for c in colors], dtype=np.float32).reshape(-1, 3)
+    return {
+        'name' : str(bin.partno),
+        'bin' : [float(bin.width), float(bin.height), float(bin.depth)],
+        'boxes' : np.round(boxes, 4).ravel().tolist(),
+        'colors' : np.round(rgb, 3).ravel().tolist(),
+        'items' : partnos,
+    }
+
+
+def writeHTML(bin, path, title=None):
+    ''' offline WebGL2 viewer with the load embedded, drag to orbit, wheel to zoom, slider to cut away the top '''
+    data = json.dumps(viewerData(bin), separators=(',', ':')).replace('</', '<\\/')
+    title = title or str(bin.partno)
+    html = VIEWER_HTML.replace('__TITLE__', title.replace('<', '&lt;')).replace('__DATA__', data)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(html)
+
+
+def export(bin, path):
+    ''' write bin to path as .glb, .obj or .html '''
+    ext = path.rsplit('.', 1)[-1].lower()
+    if ext == 'glb':
+        writeGLB(bin, path)
+    elif ext == 'obj':
+        writeOBJ(bin, path)
+    elif ext in ('html', 'htm'):
+        writeHTML(bin, path)
+    else:
+        raise ValueError('unknown export format {!r}, use .glb, .obj or .html'.format(ext))
+
+
+VIEWER_HTML = '''<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>__TITLE__</title>
+<style>
+body { margin:0; overflow:hidden; font:13px sans-serif; }
+canvas { display:block; width:100vw; height:100vh; }
+#panel { position:absolute; top:8px; left:8px; background:rgba(255,255,255,.85); padding:6px 10px; border-radius:4px; }
+</style>
+</head>
+<body>
+<canvas id="view"></canvas>
+<div id="panel"><b>__TITLE__</b> <span id="info"></span><br>
+cut at z <input id="cut" type="range" min="0" max="1000" value="1000"> <span id="cutv"></span></div>
+<script>
+const DATA = __DATA__;
+const canvas = document.getElementById('view');
+const gl = canvas.getContext('webgl2', {antialias:true});
+if (!gl) { document.getElementById('info').textContent = 'WebGL2 is not available'; throw new Error('no webgl2'); }
+
+const VS = `#version 300 es
+in vec3 aPos; in vec3 aNormal; in vec3 iOffset; in vec3 iScale; in vec3 iColor;
+uniform mat4 uMVP; uniform float uCut;
+out vec3 vColor; out vec3 vNormal;
+void main() {
+  vColor = iColor; vNormal = aNormal;
+  gl_Position = iOffset.z >= uCut ? vec4(2.0, 2.0, 2.0, 1.0) : uMVP * vec4(iOffset + aPos * iScale, 1.0);
+}`;
+const FS = `#version 300 es
+precision mediump float;
+in vec3 vColor; in vec3 vNormal; uniform vec3 uLight; out vec4 outColor;
+void main() {
+  float l = length(vNormal) > 0.5 ? 0.45 + 0.55 * max(dot(normalize(vNormal), uLight), 0.0) : 0.45;
+  outColor = vec4(vColor * l, 1.0);
+}`;
+function shader(type, src) {
+  const s = gl.createShader(type); gl.shaderSource(s, src); gl.compileShader(s);
+  if (!gl.getShaderParameter(s, gl.COMPILE_STATUS)) throw new Error(gl.getShaderInfoLog(s));
+  return s;
+}
+const prog = gl.createProgram();
+gl.attachShader(prog, shader(gl.VERTEX_SHADER, VS));
+gl.attachShader(prog, shader(gl.FRAGMENT_SHADER, FS));
+gl.linkProgram(prog);
+gl.useProgram(prog);
+const loc = n => gl.getAttribLocation(prog, n);
+const uni = n => gl.getUniformLocation(prog, n);
+
+// unit box : triangles with flat normals, and its 12 edges
+const F = [[[1,0,0],[[1,0,0],[1,1,0],[1,1,1],[1,0,1]]], [[-1,0,0],[[0,1,0],[0,0,0],[0,0,1],[0,1,1]]],
+           [[0,1,0],[[1,1,0],[0,1,0],[0,1,1],[1,1,1]]], [[0,-1,0],[[0,0,0],[1,0,0],[1,0,1],[0,0,1]]],
+           [[0,0,1],[[0,0,1],[1,0,1],[1,1,1],[0,1,1]]], [[0,0,-1],[[0,1,0],[1,1,0],[1,0,0],[0,0,0]]]];
+const tri = [], nrm = [];
+for (const [n, q] of F) for (const k of [0,1,2,0,2,3]) { tri.push(...q[k]); nrm.push(...n); }
+const C = [[0,0,0],[1,0,0],[1,1,0],[0,1,0],[0,0,1],[1,0,1],[1,1,1],[0,1,1]];
+const E = [[0,1],[1,2],[2,3],[3,0],[4,5],[5,6],[6,7],[7,4],[0,4],[1,5],[2,6],[3,7]];
+const edge = [];
+for (const [a, b] of E) edge.push(...C[a], ...C[b]);
+
+function buffer(data) {
+  const b = gl.createBuffer(); gl.bindBuffer(gl.ARRAY_BUFFER, b);
+  gl.bufferData(gl.ARRAY_BUFFER, new Float32Array(data), gl.STATIC_DRAW); return b;
+}
+function attrib(name, buf, size, stride, offset, divisor) {
+  const l = loc(name); if (l < 0) return;
+  gl.bindBuffer(gl.ARRAY_BUFFER, buf); gl.enableVertexAttribArray(l);
+  gl.vertexAttribPointer(l, size, gl.FLOAT, false, stride, offset); gl.vertexAttribDivisor(l, divisor);
+}
+function vao(shape, normals, boxes, colors) {
+  const v = gl.createVertexArray(); gl.bindVertexArray(v);
+  attrib('aPos', buffer(shape), 3, 0, 0, 0);
+  if (normals) attrib('aNormal', buffer(normals), 3, 0, 0, 0);
+  else { gl.disableVertexAttribArray(loc('aNormal')); }
+  const inst = buffer(boxes);
+  attrib('iOffset', inst, 3, 24, 0, 1);
+  attrib('iScale', inst, 3, 24, 12, 1);
+  attrib('iColor', buffer(colors), 3, 0, 0, 1);
+  gl.bindVertexArray(null); return v;
+}
+const n = DATA.boxes.length / 6;
+const dark = DATA.colors.map(c => c * 0.6);
+const faces = vao(tri, nrm, DATA.boxes, DATA.colors);
+const lines = vao(edge, null, DATA.boxes, dark);
+const [W, H, D] = DATA.bin;
+const outline = vao(edge, null, [0, 0, 0, W, H, D], [0, 0, 0]);
+document.getElementById('info').textContent = n + ' items, bin ' + W + ' x ' + H + ' x ' + D;
+
+// camera : orbit around the bin center, z up
+let theta = -0.8, phi = 0.5, dist = 2.2 * Math.max(W, H, D), cut = Infinity;
+const center = [W / 2, H / 2, D / 2];
+function perspective(fovy, aspect, near, far) {
+  const f = 1 / Math.tan(fovy / 2), nf = 1 / (near - far);
+  return [f / aspect,0,0,0, 0,f,0,0, 0,0,(far + near) * nf,-1, 0,0,2 * far * near * nf,0];
+}
+function lookAt(eye, at, up) {
+  const sub = (a, b) => [a[0]-b[0], a[1]-b[1], a[2]-b[2]];
+  const cross = (a, b) => [a[1]*b[2]-a[2]*b[1], a[2]*b[0]-a[0]*b[2], a[0]*b[1]-a[1]*b[0]];
+  const norm = a => { const l = Math.hypot(a[0], a[1], a[2]); return [a[0]/l, a[1]/l, a[2]/l]; };
+  const dot = (a, b) => a[0]*b[0] + a[1]*b[1] + a[2]*b[2];
+  const z = norm(sub(eye, at)), x = norm(cross(up, z)), y = cross(z, x);
+  return [x[0],y[0],z[0],0, x[1],y[1],z[1],0, x[2],y[2],z[2],0, -dot(x,eye),-dot(y,eye),-dot(z,eye),1];
+}
+function multiply(a, b) {
+  const r = new Array(16).fill(0);
+  for (let i = 0; i < 4; i++) for (let j = 0; j < 4; j++) for (let k = 0; k < 4; k++) r[j*4+i] += a[k*4+i] * b[j*4+k];
+  return r;
+}
+function draw() {
+  const w = canvas.clientWidth * devicePixelRatio, h = canvas.clientHeight * devicePixelRatio;
+  if (canvas.width !== w || canvas.height !== h) { canvas.width = w; canvas.height = h; }
+  gl.viewport(0, 0, w, h);
+  gl.clearColor(1, 1, 1, 1); gl.clear(gl.COLOR_BUFFER_BIT | gl.DEPTH_BUFFER_BIT);
+  gl.enable(gl.DEPTH_TEST); gl.enable(gl.POLYGON_OFFSET_FILL); gl.polygonOffset(1, 1);
+  const eye = [center[0] + dist * Math.cos(phi) * Math.cos(theta), center[1] + dist * Math.cos(phi) * Math.sin(theta), center[2] + dist * Math.sin(phi)];
+  const mvp = multiply(perspective(0.8, w / h, dist / 100, dist * 10), lookAt(eye, center, [0, 0, 1]));
+  gl.uniformMatrix4fv(uni('uMVP'), false, mvp);
+  gl.uniform3fv(uni('uLight'), [0.3, -0.5, 0.81]);
+  gl.uniform1f(uni('uCut'), cut);
+  gl.vertexAttrib3f(loc('aNormal'), 0, 0, 0);
+  gl.bindVertexArray(faces); gl.drawArraysInstanced(gl.TRIANGLES, 0, 36, n);
+  gl.bindVertexArray(lines); gl.drawArraysInstanced(gl.LINES, 0, 24, n);
+  gl.uniform1f(uni('uCut'), Infinity);
+  gl.bindVertexArray(outline); gl.drawArraysInstanced(gl.LINES, 0, 24, 1);
+}
+let drag = null;
+canvas.addEventListener('mousedown', e => { drag = [e.clientX, e.clientY]; });
+window.addEventListener('mouseup', () => { drag = null; });
+window.addEventListener('mousemove', e => {
+  if (!drag) return;
+  theta -= (e.clientX - drag[0]) * 0.01;
+  phi = Math.max(-1.5, Math.min(1.5, phi + (e.clientY - drag[1]) * 0.01));
+  drag = [e.clientX, e.clientY]; draw();
+});
+canvas.addEventListener('wheel', e => { e.preventDefault(); dist *= Math.exp(e.deltaY * 0.001); draw(); }, {passive:false});
+const slider = document.getElementById('cut');
+slider.addEventListener('input', () => {
+  cut = slider.value >= 1000 ? Infinity : D * slider.value / 1000;
+  document.getElementById('cutv').textContent = cut === Infinity ? '' : cut.toFixed(1);
+  draw();
+});
+window.addEventListener('resize', draw);
+draw();
+</script>
+</body>
+</html>
+'''
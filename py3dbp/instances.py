@@ -0,0 +1,281 @@
+'''
+Seeded benchmark instances and loaders for public instance files.
+
+Generators :
+    makeBR(k, seed)        Bischoff & Ratcliff style BR1-BR15, k = class
+    makeMPV(k, n, seed)    Martello, Pisinger & Vigo classes 1-8
+    makeEcommerce(n, seed) e-commerce orders of common carton sizes
+    makeInstance('BR7' / 'MPV3' / 'ecommerce', ...)
+
+Loaders (local files) :
+    loadBR(path)   OR-Library thpack format, one Instance per problem
+    loadMPV(path)  "n W H D" followed by n lines "w h d"
+
+Every Instance can build a ready to pack Packer with toPacker().
+'''
+import random
+
+from .main import Packer, Bin, Item
+
+# BR class -> number of box types (weakly to strongly heterogeneous)
+BR_BOX_TYPES = {1:3, 2:5, 3:8, 4:10, 5:12, 6:15, 7:20, 8:30, 9:40, 10:50, 11:60, 12:70, 13:80, 14:90, 15:100}
+# container of the BR instances, length x width x height
+BR_CONTAINER = (587, 233, 220)
+# MPV class -> bin size, classes 1-5 use the five item types below
+MPV_BIN = {1:100, 2:100, 3:100, 4:100, 5:100, 6:10, 7:40, 8:100}
+# e-commerce carton sizes (cm) and relative popularity
+ECOMMERCE_CARTONS = [
+    ('mailer-S', (22, 16, 8), 30),
+    ('mailer-M', (31, 22, 10), 25),
+    ('box-S', (25, 20, 15), 20),
+    ('box-M', (35, 25, 20), 12),
+    ('box-L', (45, 35, 25), 6),
+    ('box-XL', (60, 40, 40), 3),
+    ('tube', (70, 10, 10), 2),
+    ('flat', (50, 40, 5), 2),
+]
+COLORS = ['red','yellow','blue','green','purple','brown','orange','pink','olive','gray']
+
+
+class Instance:
+
+    def __init__(self, name, bins, skus):
+        '''
+        bins : list of dict(partno, WHD, max_weight, count)
+        skus : list of dict(name, WHD, weight, count, level, loadbear, updown, typeof, color)
+        '''
+        self.name = name
+        self.bins = bins
+        self.skus = skus
+
+
+    def string(self):
+        ''' '''
+        return "%s(%s bin types, %s skus, %s items)" % (self.name, len(self.bins), len(self.skus), self.getItemCount())
+
+
+    def getItemCount(self):
+        ''' '''
+        return sum(s['count'] for s in self.skus)
+
+
+    def getItemVolume(self):
+        ''' '''
+        return sum(s['WHD'][0] * s['WHD'][1] * s['WHD'][2] * s['count'] for s in self.skus)
+
+
+    def makeBins(self):
+        ''' fresh Bin objects '''
+        bins = []
+        for b in self.bins:
+            for i in range(b.get('count', 1)):
+                bins.append(Bin('{}-{}'.format(b['partno'], i + 1) if b.get('count', 1) > 1 else b['partno'],
+                                b['WHD'], b['max_weight'], b.get('corner', 0), b.get('put_type', 1)))
+        return bins
+
+
+    def makeItems(self):
+        ''' fresh Item objects, partno is "<sku name>-<n>" '''
+        items = []
+        for s in self.skus:
+            for i in range(s['count']):
+                items.append(Item(
+                    partno='{}-{}'.format(s['name'], i + 1),
+                    name=s['name'],
+                    typeof=s.get('typeof', 'cube'),
+                    WHD=s['WHD'],
+                    weight=s['weight'],
+                    level=s.get('level', 1),
+                    loadbear=s.get('loadbear', 100),
+                    updown=s.get('updown', True),
+                    color=s.get('color', 'red')))
+        return items
+
+
+    def toPacker(self):
+        ''' Packer with the bins and items of this instance added '''
+        packer = Packer()
+        for b in self.makeBins():
+            packer.addBin(b)
+        for item in self.makeItems():
+            packer.addItem(item)
+        return packer
+
+
+
+def makeBR(k, seed=0, density=(0.0001, 0.0005), container=BR_CONTAINER):
+    '''
+    Bischoff & Ratcliff style instance of class k (1-15).
+    Box types are drawn from L in [30,120], W in [25,100], H in [20,80]; quantities are raised until
+    the cargo volume exceeds the container. About half the box types must stay upright (updown=False).
+    Weights are volume * a random density (kg/cm3), loadbear is a multiple of the weight.
+    '''
+    if k not in BR_BOX_TYPES:
+        raise ValueError('BR class must be 1-15')
+    rng = random.Random(seed * 100 + k)
+    n = BR_BOX_TYPES[k]
+    skus = []
+    for i in range(n):
+        whd = (rng.randint(30, 120), rng.randint(25, 100), rng.randint(20, 80))
+        weight = round(whd[0] * whd[1] * whd[2] * rng.uniform(*density), 2)
+        skus.append({
+            'name' : 'BR{}-{}'.format(k, i + 1),
+            'WHD' : whd,
+            'weight' : weight,
+            'count' : 1,
+            'level' : 1,
+            'loadbear' : round(weight * rng.choice([2, 5, 10, 20])),
+            'updown' : rng.random() < 0.5,
+            'color' : COLORS[i % len(COLORS)],
+        })
+    # add copies at random until the cargo is bigger than the container
+    volume = container[0] * container[1] * container[2]
+    inst = Instance('BR{}-{}'.format(k, seed), [{'partno' : 'container', 'WHD' : container, 'max_weight' : 10**7}], skus)
+    while inst.getItemVolume() < volume:
+        rng.choice(skus)['count'] += 1
+    return inst
+
+
+def _mpvItem(rng, t, W, H, D):
+    ''' one item of MPV type t (1-5) for a W x H x D bin '''
+    if t == 1:
+        return (rng.randint(1, W // 2), rng.randint(2 * H // 3, H), rng.randint(2 * D // 3, D))
+    elif t == 2:
+        return (rng.randint(2 * W // 3, W), rng.randint(1, H // 2), rng.randint(2 * D // 3, D))
+    elif t == 3:
+        return (rng.randint(2 * W // 3, W), rng.randint(2 * H // 3, H), rng.randint(1, D // 2))
+    elif t == 4:
+        return (rng.randint(W // 2, W), rng.randint(H // 2, H), rng.randint(D // 2, D))
+    return (rng.randint(1, W // 2), rng.randint(1, H // 2), rng.randint(1, D // 2))
+
+
+def makeMPV(k, n, seed=0):
+    '''
+    Martello, Pisinger & Vigo instance of class k (1-8) with n items.
+    Classes 1-5 : bin 100, item type k with probability 60%, each other type 10%.
+    Class 6 : bin 10, items in [1,10]. Class 7 : bin 40, items in [1,35]. Class 8 : bin 100, items in [1,100].
+    MPV forbids rotation, the closest here is updown=False (only the two upright rotations).
+    Items weigh 1 and bins have no weight limit, so weight never decides.
+    '''
+    if k not in MPV_BIN:
+        raise ValueError('MPV class must be 1-8')
+    rng = random.Random(seed * 100 + k)
+    S = MPV_BIN[k]
+    skus = []
+    for i in range(n):
+        if k <= 5:
+            r = rng.random()
+            t = k if r < 0.6 else [j for j in range(1, 6) if j != k][int((r - 0.6) / 0.1)]
+            whd = _mpvItem(rng, t, S, S, S)
+        elif k == 6:
+            whd = (rng.randint(1, 10), rng.randint(1, 10), rng.randint(1, 10))
+        elif k == 7:
+            whd = (rng.randint(1, 35), rng.randint(1, 35), rng.randint(1, 35))
+        else:
+            whd = (rng.randint(1, 100), rng.randint(1, 100), rng.randint(1, 100))
+        skus.append({'name' : 'MPV{}-{}'.format(k, i + 1), 'WHD' : whd, 'weight' : 1, 'count' : 1,
+                     'loadbear' : 100, 'updown' : False, 'color' : COLORS[i % len(COLORS)]})
+    # enough bins for the worst case of one item per bin
+    bins = [{'partno' : 'bin', 'WHD' : (S, S, S), 'max_weight' : 10**7, 'count' : n}]
+    return Instance('MPV{}-{}-{}'.format(k, n, seed), bins, skus)
+
+
+def makeEcommerce(n, seed=0, bin_whd=(120, 100, 150), max_weight=500):
+    '''
+    e-commerce pallet/cage load of n cartons.
+    Carton sizes follow the popularity of ECOMMERCE_CARTONS with +-10% size noise, 10% of the
+    cartons are fragile (low loadbear, must stay upright, packed first with level 1).
+    '''
+    rng = random.Random(seed)
+    sizes = [c[1] for c in ECOMMERCE_CARTONS]
+    weights = [c[2] for c in ECOMMERCE_CARTONS]
+    skus = {}
+    for i in range(n):
+        j = rng.choices(range(len(ECOMMERCE_CARTONS)), weights)[0]
+        whd = tuple(max(1, round(d * rng.uniform(0.9, 1.1))) for d in sizes[j])
+        fragile = rng.random() < 0.1
+        # carton variants repeat, group them into skus
+        key = (ECOMMERCE_CARTONS[j][0], whd, fragile)
+        if key in skus:
+            skus[key]['count'] += 1
+            continue
+        skus[key] = {
+            'name' : '{}-{}'.format(ECOMMERCE_CARTONS[j][0], len(skus) + 1),
+            'WHD' : whd,
+            'weight' : round(whd[0] * whd[1] * whd[2] * rng.uniform(0.0001, 0.0003), 2),
+            'count' : 1,
+            'level' : 1 if fragile else 2,
+            'loadbear' : 5 if fragile else 100,
+            'updown' : not fragile,
+            'color' : COLORS[j % len(COLORS)],
+        }
+    bins = [{'partno' : 'cage', 'WHD' : bin_whd, 'max_weight' : max_weight}]
+    return Instance('ecommerce-{}-{}'.format(n, seed), bins, list(skus.values()))
+
+
+def makeInstance(name, n=100, seed=0):
+    ''' 'BR1'-'BR15', 'MPV1'-'MPV8' (n items) or 'ecommerce' (n items) '''
+    if name.upper().startswith('BR'):
+        return makeBR(int(name[2:]), seed)
+    elif name.upper().startswith('MPV'):
+        return makeMPV(int(name[3:]), n, seed)
+    elif name == 'ecommerce':
+        return makeEcommerce(n, seed)
+    raise ValueError('unknown instance class {}'.format(name))
+
+
+def _tokens(path):
+    ''' whitespace separated numbers of a file '''
+    with open(path) as f:
+        return [int(float(t)) for t in f.read().split()]
+
+
+def loadBR(path):
+    '''
+    OR-Library thpack format (Bischoff & Ratcliff / Loh & Nee files) :
+        P
+        then per problem : "number seed", "L W H", "n",
+        and n lines "type l flag_l w flag_w h flag_h count" (flag 1 = may be vertical)
+    A box that may only stand on one side keeps that side vertical (updown=False).
+    '''
+    t = _tokens(path)
+    pos = 1
+    instances = []
+    for _ in range(t[0]):
+        number, seed = t[pos], t[pos + 1]
+        container = tuple(t[pos + 2:pos + 5])
+        n = t[pos + 5]
+        pos += 6
+        skus = []
+        for i in range(n):
+            _, l, fl, w, fw, h, fh, count = t[pos:pos + 8]
+            pos += 8
+            flags = [(l, fl), (w, fw), (h, fh)]
+            vertical = [d for d, f in flags if f]
+            if len(vertical) == 1:
+                # the only dimension allowed to be vertical goes to depth (z)
+                rest = [d for d, f in flags if not f]
+                whd, updown = (rest[0], rest[1], vertical[0]), False
+            else:
+                whd, updown = (l, w, h), True
+            skus.append({'name' : 'type{}'.format(i + 1), 'WHD' : whd, 'weight' : 1, 'count' : count,
+                         'loadbear' : 100, 'updown' : updown, 'color' : COLORS[i % len(COLORS)]})
+        bins = [{'partno' : 'container', 'WHD' : container, 'max_weight' : 10**7}]
+        instances.append(Instance('{}-{}'.format(number, seed), bins, skus))
+    return instances
+
+
+def loadMPV(path, name=None):
+    '''
+    3D-BPP instance file : "n W H D" then n lines "w h d".
+    Items keep their orientation as far as Item allows (updown=False).
+    '''
+    t = _tokens(path)
+    n, W, H, D = t[:4]
+    skus = []
+    for i in range(n):
+        w, h, d = t[4 + 3 * i:7 + 3 * i]
+        skus.append({'name' : 'item{}'.format(i + 1), 'WHD' : (w, h, d), 'weight' : 1, 'count' : 1,
+                     'loadbear' : 100, 'updown' : False, 'color' : COLORS[i % len(COLORS)]})
+    bins = [{'partno' : 'bin', 'WHD' : (W, H, D), 'max_weight' : 10**7, 'count' : n}]
+    return Instance(name or path, bins, skus)
@@ -0,0 +1,187 @@
+'''
+Layer building engine for loads of a few SKUs, Packer.pack(engine='layer').
+
+The items are grouped by box (same dimensions up to the rotations they allow, George & Robinson) and
+every group is stacked from the floor up in full horizontal layers, one box thick :
+    * a layer's footprint is the best two-block pattern of one box side by side in the two planar
+      orientations (see pattern), the same pattern is computed once per (bin, box, layer side) and kept in a bounded cache,
+    * of the orientations a group allows, the one covering the most of the floor is used, thinner layer first,
+    * a layer is only built when the group still has enough boxes to fill it, so every layer rests on a
+      full one (or the floor) and the next group starts on a flat top,
+    * slots that hit static geometry (corners, obstacles) are left empty.
+Groups are taken in the order their first item comes in the sorted items (level, loadbear, volume).
+Every box goes through Bin.putItem (fix_point, check_stable, max_weight, check_loadbear as usual) at
+its slot, with the rotation the layer uses, so positions and rotation types are the ones of any pack.
+The boxes no layer took are then put with the EMS engine (see py3dbp.ems) into what is left.
+'''
+import functools
+
+from .auxiliary_methods import set2Decimal
+from .ems import EmptySpaces, itemRotations
+
+# decimals of the dimensions a group key and a pattern are made of
+KEY_DECIMALS = 6
+# most (W, H, a, b) patterns kept, a long running service sees an open-ended set of boxes and bins
+PATTERN_CACHE_SIZE = 4096
+
+
+def groupKey(item):
+    ''' items with the same key are the same box for layers : sides it may stand on, then the vertical one '''
+    w, h, d = (round(float(v), KEY_DECIMALS) for v in (item.width, item.height, item.depth))
+    if item.updown == True:
+        return (tuple(sorted((w, h, d))), None)
+    return (tuple(sorted((w, h))), d)
+
+
+def groupItems(items):
+    ''' [(key, items)] in the order of the first item of every group '''
+    groups = {}
+    for item in items:
+        groups.setdefault(groupKey(item), []).append(item)
+    return list(groups.items())
+
+
+def _blocks(W, H, a, b):
+    ''' (count, cut, along x) of the best cut of W x H into a block of a x b boxes and one of b x a boxes '''
+    best = (0, 0, True)
+    # block of a x b columns on the left, b x a ones on the right
+    for i in range(int(W // a) + 1):
+        n = i * int(H // b) + int((W - i * a) // b) * int(H // a)
+        if n > best[0]:
+            best = (n, i, True)
+    # block of a x b rows at the back, b x a ones at the front
+    for j in range(int(H // b) + 1):
+        n = j * int(W // a) + int(W // b) * int((H - j * b) // a)
+        if n > best[0]:
+            best = (n, j, False)
+    return best
+
+
+@functools.lru_cache(maxsize=PATTERN_CACHE_SIZE)
+def pattern(W, H, a, b):
+    '''
+    slots (x, y, turned) of a W x H layer of a x b boxes, turned ones lie b x a. Two-block guillotine
+    pattern : a block of a x b boxes then one of turned boxes, cut across x or y where the count is highest.
+    '''
+    n, cut, along_x = _blocks(W, H, a, b)
+    slots = []
+    if n == 0:
+        return ()
+    if along_x:
+        # cut columns of a x b, then turned boxes right of x = cut * a
+        for i in range(cut):
+            for j in range(int(H // b)):
+                slots.append((i * a, j * b, False))
+        x0 = cut * a
+        for i in range(int((W - x0) // b)):
+            for j in range(int(H // a)):
+                slots.append((x0 + i * b, j * a, True))
+    else:
+        for j in range(cut):
+            for i in range(int(W // a)):
+                slots.append((i * a, j * b, False))
+        y0 = cut * b
+        for j in range(int((H - y0) // a)):
+            for i in range(int(W // b)):
+                slots.append((i * b, y0 + j * a, True))
+    return tuple(slots)
+
+
+def boxDims(item):
+    ''' {(w, h, d) : rotation type} of the rotations item allows, rounded to KEY_DECIMALS '''
+    rotations, dims = itemRotations(item)
+    by_dims = {}
+    for r, dim in zip(rotations, dims):
+        by_dims.setdefault(tuple(round(v, KEY_DECIMALS) for v in dim), r)
+    return by_dims
+
+
+def layerOptions(item, W, H):
+    '''
+    (thickness, footprint fill, a, b, a x b allowed, b x a allowed) of every layer item allows, a >= b,
+    best first : most of the W x H floor covered, then the thinnest.
+    '''
+    by_dims = boxDims(item)
+    options = {}
+    for (w, h, d) in by_dims:
+        a, b = max(w, h), min(w, h)
+        if (d, a, b) in options:
+            continue
+        flat = (a, b, d) in by_dims
+        turned = (b, a, d) in by_dims
+        n = len(pattern(W, H, a, b)) if flat and turned else int(W // w) * int(H // h)
+        options[(d, a, b)] = (d, n * a * b / (W * H), a, b, flat, turned)
+    return sorted(options.values(), key=lambda o : (-o[1], o[0]))
+
+
+def layerSlots(bin, option, z):
+    ''' (x, y, w, h) of the slots of a layer option at height z that miss every static box '''
+    d, fill, a, b, flat, turned = option
+    W, H = float(bin.width), float(bin.height)
+    if flat and turned:
+        slots = [(x, y, b, a) if t else (x, y, a, b) for x, y, t in pattern(W, H, a, b)]
+    else:
+        # one planar orientation only, a plain grid
+        w, h = (a, b) if flat else (b, a)
+        slots = [(i * w, j * h, w, h) for i in range(int(W // w)) for j in range(int(H // h))]
+    return [s for s in slots if not bin.hitsStatic((s[0], s[1], z), (s[2], s[3], d))]
+
+
+def packLayers(packer, bin, items):
+    '''
+    put full layers of items in bin from the floor up, return the items left in their order.
+    bin.empty_spaces is set to what the layers leave for the EMS engine.
+    '''
+    from .main import PackCancelled
+    stats = packer.stats
+    trace = packer.trace
+    W, H, D = float(bin.width), float(bin.height), float(bin.depth)
+    spaces = bin.empty_spaces = EmptySpaces(bin, packer.ems_min_dim)
+    placed = set()
+    z = 0.0
+    for key, group in groupItems(items):
+        todo = list(group)
+        while todo:
+            if packer.cancel_token is not None and packer.cancel_token.isCancelled():
+                raise PackCancelled(packer.cancel_token.reason)
+            layer = None
+            for option in layerOptions(todo[0], W, H):
+                if z + option[0] > D:
+                    continue
+                slots = layerSlots(bin, option, z)
+                if slots and len(slots) <= len(todo):
+                    layer = (option, slots)
+                    break
+            if layer is None:
+                break
+            option, slots = layer
+            d = option[0]
+            put = 0
+            for (x, y, w, h), item in zip(slots, todo[:len(slots)]):
+                if stats is not None:
+                    stats.items += 1
+                    stats.pivots += 1
+                if trace is not None:
+                    trace.setItem(item)
+                # rotation types depend on the dimensions the item was given with
+                r = boxDims(item)[(w, h, d)]
+                pivot = [set2Decimal(x, bin.number_of_decimals), set2Decimal(y, bin.number_of_decimals), set2Decimal(z, bin.number_of_decimals)]
+                if bin.putItem(item, pivot, rotations=[r]):
+                    px, py, pz = (float(v) for v in item.position)
+                    spaces.subtract([px, px + w, py, py + h, pz, pz + d])
+                    placed.add(id(item))
+                    put += 1
+                    if stats is not None:
+                        stats.placed += 1
+            todo = [item for item in todo if id(item) not in placed]
+            if put < len(slots):
+                # weight, stability or loadbear stopped the layer : the rest is left to EMS
+                z = max(z, _top(bin))
+                break
+            z += d
+    return [item for item in items if id(item) not in placed]
+
+
+def _top(bin):
+    ''' highest top of the placed boxes '''
+    return max(float(item.position[2]) + float(item.getDimension()[2]) for item in bin.items) if bin.items else 0.0
@@ -1,13 +1,25 @@
-from .constants import RotationType, Axis
+from .constants import RotationType, Axis, TraceKind, TraceReason
 from .auxiliary_methods import intersect, set2Decimal
+from .stats import PackStats
+from .sequence import loadOrder
+from .ems import EmptySpaces, placeItem, RULES as EMS_RULES
+from .layers import packLayers
 import numpy as np
-# required to plot a representation of Bin and contained items 
-from matplotlib.patches import Rectangle,Circle
-import matplotlib.pyplot as plt
-import mpl_toolkits.mplot3d.art3d as art3d
 from collections import Counter
 import copy
+import itertools
+from decimal import Decimal
+import heapq
+import sys
+import time
+import tracemalloc
+try:
+    import resource
+except ImportError:
+    resource = None
 DEFAULT_NUMBER_OF_DECIMALS = 0
+# share of the bin volume ignored when comparing free volume, for float rounding
+VOLUME_TOLERANCE = 1e-9
 START_POSITION = [0, 0, 0]
 
 
@@ -88,7 +100,7 @@ class Item:
 
 class Bin:
 
-    def __init__(self, partno, WHD, max_weight,corner=0,put_type=1):
+    def __init__(self, partno, WHD, max_weight,corner=0,put_type=1,cost=0):
         ''' '''
         self.partno = partno
         self.width = WHD[0]
@@ -96,16 +108,29 @@ class Bin:
         self.depth = WHD[2]
         self.max_weight = max_weight
         self.corner = corner
+        # static [x0,x1,y0,y1,z0,z1] boxes of the bin besides the corners, see addObstacle
+        self.obstacles = []
         self.items = []
-        self.fit_items = np.array([[0,WHD[0],0,WHD[1],0,0]])
+        # placed boxes as [x0,x1,y0,y1,z0,z1] rows, first row is the floor
+        self.fit_items = None
+        self.clearFitItems()
         self.unfitted_items = []
         self.number_of_decimals = DEFAULT_NUMBER_OF_DECIMALS
         self.fix_point = False
         self.check_stable = False
+        self.check_loadbear = False
         self.support_surface_ratio = 0
         self.put_type = put_type
+        # price of one bin of this type, used by Packer.packCheapest
+        self.cost = cost
         # used to put gravity distribution
         self.gravity = []
+        # PackStats of the running pack, None when stats are off
+        self.stats = None
+        # PackTrace of the running pack, None when not recording
+        self.trace = None
+        # how putItem stores an item, Packer.pack(bounded_memory=True) replaces the deep copy
+        self.copy_item = copy.deepcopy
 
 
     def formatNumbers(self, number_of_decimals):
@@ -115,6 +140,11 @@ class Bin:
         self.depth = set2Decimal(self.depth, number_of_decimals)
         self.max_weight = set2Decimal(self.max_weight, number_of_decimals)
         self.number_of_decimals = number_of_decimals
+        # corners follow the rounded size, the floor row keeps the size given to Bin()
+        if not self.items:
+            floor = self._fit_buffer[0].copy()
+            self.clearFitItems()
+            self._fit_buffer[0] = floor
 
 
     def string(self):
@@ -142,33 +172,50 @@ class Bin:
         return set2Decimal(total_weight, self.number_of_decimals)
 
 
-    def putItem(self, item, pivot,axis=None):
-        ''' put item in bin '''
+    def putItem(self, item, pivot,axis=None,rotations=None):
+        ''' put item in bin, rotations : rotation types to try instead of all the allowed ones '''
         fit = False
         valid_item_position = item.position
         item.position = pivot
         rotate = RotationType.ALL if item.updown == True else RotationType.Notupdown
+        if rotations is not None:
+            rotate = rotations
+        stats = self.stats
+        trace = self.trace
         for i in range(0, len(rotate)):
-            item.rotation_type = i
+            item.rotation_type = rotate[i]
             dimension = item.getDimension()
+            if stats is not None:
+                stats.rotations += 1
             # rotatate
             if (
                 self.width < pivot[0] + dimension[0] or
                 self.height < pivot[1] + dimension[1] or
                 self.depth < pivot[2] + dimension[2]
             ):
+                if trace is not None:
+                    trace.reject(TraceReason.OUT_OF_BIN, item.rotation_type, axis, pivot, dimension)
                 continue
 
-            fit = True
+            fit = not self.hitsStatic(pivot, dimension)
 
-            for current_item_in_bin in self.items:
+            tested = 0
+            for tested,current_item_in_bin in enumerate(self.items if fit else (),1):
                 if intersect(current_item_in_bin, item):
                     fit = False
                     break
+            if stats is not None:
+                stats.collision_tests += tested
+            if trace is not None and not fit:
+                trace.reject(TraceReason.COLLISION, item.rotation_type, axis, pivot, dimension)
 
             if fit:
                 # cal total weight
-                if self.getTotalWeight() + item.weight > self.max_weight:
+                if set2Decimal(self.total_weight, self.number_of_decimals) + item.weight > self.max_weight:
+                    if stats is not None:
+                        stats.weight_rejections += 1
+                    if trace is not None:
+                        trace.reject(TraceReason.WEIGHT, item.rotation_type, axis, pivot, dimension)
                     fit = False
                     return fit
                 
@@ -177,19 +224,19 @@ class Bin:
                         
                     [w,h,d] = dimension
                     [x,y,z] = [float(pivot[0]),float(pivot[1]),float(pivot[2])]
+                    if stats is not None:
+                        st = time.perf_counter()
 
-                    for i in range(3):
-                        # fix height
-                        y = self.checkHeight([x,x+float(w),y,y+float(h),z,z+float(d)])
-                        # fix width
-                        x = self.checkWidth([x,x+float(w),y,y+float(h),z,z+float(d)])
-                        # fix depth
-                        z = self.checkDepth([x,x+float(w),y,y+float(h),z,z+float(d)])
+                    x, y, z, passes = self.dropItem([x,x+float(w),y,y+float(h),z,z+float(d)])
+                    if stats is not None:
+                        stats.fix_point_iterations += passes
 
                     # check stability on item 
                     # rule : 
                     # 1. Define a support ratio, if the ratio below the support surface does not exceed this ratio, compare the second rule.
                     # 2. If there is no support under any vertices of the bottom of the item, then fit = False.
+                    if stats is not None:
+                        st = stats.addTime('fix_point',st)
                     if self.check_stable == True :
                         # Cal the surface area of ​​item.
                         item_area_lower = int(dimension[0] * dimension[1])
@@ -213,15 +260,40 @@ class Bin:
                                         if (i[0] <= j[0] <= i[1]) and (i[2] <= j[1] <= i[3]) :
                                             c[jdx] = True
                             if False in c :
+                                if stats is not None:
+                                    stats.stability_rejections += 1
+                                    stats.addTime('stability',st)
+                                if trace is not None:
+                                    trace.reject(TraceReason.UNSTABLE, item.rotation_type, axis, [x,y,z], dimension)
                                 item.position = valid_item_position
                                 fit = False
                                 return fit
-                        
-                    self.fit_items = np.append(self.fit_items,np.array([[x,x+float(w),y,y+float(h),z,z+float(d)]]),axis=0)
-                    item.position = [set2Decimal(x),set2Decimal(y),set2Decimal(z)]
+                        if stats is not None:
+                            stats.addTime('stability',st)
+
+                    box = [x,x+float(w),y,y+float(h),z,z+float(d)]
+                else :
+                    box = [float(pivot[0]),float(pivot[0])+float(dimension[0]),float(pivot[1]),float(pivot[1])+float(dimension[1]),float(pivot[2]),float(pivot[2])+float(dimension[2])]
+
+                # weight pushed down the stack must not exceed any loadbear
+                if self.check_loadbear == True and not self.bearLoad(box, item):
+                    if stats is not None:
+                        stats.loadbear_rejections += 1
+                    if trace is not None:
+                        trace.reject(TraceReason.LOADBEAR, item.rotation_type, axis, box[0::2], dimension)
+                    item.position = valid_item_position
+                    fit = False
+                    return fit
+
+                if self.fix_point == True :
+                    self.addFitItem(box)
+                    item.position = [set2Decimal(box[0]),set2Decimal(box[2]),set2Decimal(box[4])]
 
                 if fit :
-                    self.items.append(copy.deepcopy(item))
+                    self.items.append(self.copy_item(item))
+                    self.addPlaced(item)
+                    if trace is not None:
+                        trace.commit(item, axis, pivot)
 
             else :
                 item.position = valid_item_position
@@ -235,116 +307,281 @@ class Bin:
 
 
     def checkDepth(self,unfix_point):
-        ''' fix item position z '''
-        z_ = [[0,0],[float(self.depth),float(self.depth)]]
-        for j in self.fit_items:
-            # creat x set
-            x_bottom = set([i for i in range(int(j[0]),int(j[1]))])
-            x_top = set([i for i in range(int(unfix_point[0]),int(unfix_point[1]))])
-            # creat y set
-            y_bottom = set([i for i in range(int(j[2]),int(j[3]))])
-            y_top = set([i for i in range(int(unfix_point[2]),int(unfix_point[3]))])
-            # find intersection on x set and y set.
-            if len(x_bottom & x_top) != 0 and len(y_bottom & y_top) != 0 :
-                z_.append([float(j[4]),float(j[5])])
-        top_depth = unfix_point[5] - unfix_point[4]
-        # find diff set on z_.
-        z_ = sorted(z_, key = lambda z_ : z_[1])
-        for j in range(len(z_)-1):
-            if z_[j+1][0] -z_[j][1] >= top_depth:
-                return z_[j][1]
-        return unfix_point[4]
+        ''' fix item position z : drop it onto the nearest box (or the floor) below '''
+        return self.slide(unfix_point, 4, 0, 2)
 
 
     def checkWidth(self,unfix_point):
-        ''' fix item position x ''' 
-        x_ = [[0,0],[float(self.width),float(self.width)]]
-        for j in self.fit_items:
-            # creat z set
-            z_bottom = set([i for i in range(int(j[4]),int(j[5]))])
-            z_top = set([i for i in range(int(unfix_point[4]),int(unfix_point[5]))])
-            # creat y set
-            y_bottom = set([i for i in range(int(j[2]),int(j[3]))])
-            y_top = set([i for i in range(int(unfix_point[2]),int(unfix_point[3]))])
-            # find intersection on z set and y set.
-            if len(z_bottom & z_top) != 0 and len(y_bottom & y_top) != 0 :
-                x_.append([float(j[0]),float(j[1])])
-        top_width = unfix_point[1] - unfix_point[0]
-        # find diff set on x_bottom and x_top.
-        x_ = sorted(x_,key = lambda x_ : x_[1])
-        for j in range(len(x_)-1):
-            if x_[j+1][0] -x_[j][1] >= top_width:
-                return x_[j][1]
-        return unfix_point[0]
-    
+        ''' fix item position x : push it back against the nearest box (or wall) in -x '''
+        return self.slide(unfix_point, 0, 2, 4)
+
 
     def checkHeight(self,unfix_point):
-        '''fix item position y '''
-        y_ = [[0,0],[float(self.height),float(self.height)]]
-        for j in self.fit_items:
-            # creat x set
-            x_bottom = set([i for i in range(int(j[0]),int(j[1]))])
-            x_top = set([i for i in range(int(unfix_point[0]),int(unfix_point[1]))])
-            # creat z set
-            z_bottom = set([i for i in range(int(j[4]),int(j[5]))])
-            z_top = set([i for i in range(int(unfix_point[4]),int(unfix_point[5]))])
-            # find intersection on x set and z set.
-            if len(x_bottom & x_top) != 0 and len(z_bottom & z_top) != 0 :
-                y_.append([float(j[2]),float(j[3])])
-        top_height = unfix_point[3] - unfix_point[2]
-        # find diff set on y_bottom and y_top.
-        y_ = sorted(y_,key = lambda y_ : y_[1])
-        for j in range(len(y_)-1):
-            if y_[j+1][0] -y_[j][1] >= top_height:
-                return y_[j][1]
-
-        return unfix_point[2]
-
-
-    def addCorner(self):
-        '''add container coner '''
+        ''' fix item position y : push it back against the nearest box (or wall) in -y '''
+        return self.slide(unfix_point, 2, 0, 4)
+
+
+    def slide(self, box, axis, a, b):
+        '''
+        lowest start of box along axis (column 0 x, 2 y, 4 z of [x0,x1,y0,y1,z0,z1]) reached by moving it
+        toward 0 : the largest end, not past the box start, of the fit_items overlapping it on the two
+        other axes (columns a and b). box does not collide with fit_items, so the path is free.
+        '''
+        f = self.fit_items
+        start = box[axis]
+        mask = (f[:, a] < box[a + 1]) & (box[a] < f[:, a + 1]) & (f[:, b] < box[b + 1]) & (box[b] < f[:, b + 1]) & (f[:, axis + 1] <= start)
+        if not mask.any():
+            return 0.0
+        return float(f[mask, axis + 1].max())
+
+
+    def dropItem(self, box):
+        '''
+        compact box [x0,x1,y0,y1,z0,z1] : push it along y, x then z to the nearest obstacle, again
+        until nothing moves. Every move goes toward 0, so the loop ends. Returns (x, y, z, passes).
+        '''
+        x, y, z = box[0], box[2], box[4]
+        w, h, d = box[1] - x, box[3] - y, box[5] - z
+        passes = 0
+        while True:
+            passes += 1
+            moved = False
+            # fix height
+            ny = self.checkHeight([x,x+w,y,y+h,z,z+d])
+            if ny < y:
+                y, moved = ny, True
+            # fix width
+            nx = self.checkWidth([x,x+w,y,y+h,z,z+d])
+            if nx < x:
+                x, moved = nx, True
+            # fix depth
+            nz = self.checkDepth([x,x+w,y,y+h,z,z+d])
+            if nz < z:
+                z, moved = nz, True
+            if not moved:
+                return x, y, z, passes
+
+
+    def addFitItem(self, box):
+        ''' append [x0,x1,y0,y1,z0,z1] to fit_items, the buffer grows by doubling instead of a copy per item '''
+        if self._fit_count == len(self._fit_buffer):
+            buffer = np.zeros((2 * len(self._fit_buffer),6))
+            buffer[:self._fit_count] = self._fit_buffer
+            self._fit_buffer = buffer
+        self._fit_buffer[self._fit_count] = box
+        self._fit_count += 1
+        self.fit_items = self._fit_buffer[:self._fit_count]
+
+
+    def clearFitItems(self):
+        '''
+        only the floor and the static geometry (corners, obstacles) left in fit_items,
+        free volume and weight back to the empty bin
+        '''
+        self.static_boxes = self.staticBoxes()
+        # (position, dimension) of every static box, pivots of pack2Bin
+        self.static_pivots = [([b[0],b[2],b[4]], [b[1]-b[0],b[3]-b[2],b[5]-b[4]]) for b in self.static_boxes]
+        # float rows of static_boxes, for collision tests
+        self.static_array = np.array(self.static_boxes, dtype=float).reshape(-1,6)
+        self._fit_buffer = np.zeros((max(16, 2 * (1 + len(self.static_boxes))),6))
+        self._fit_buffer[0] = [0,float(self.width),0,float(self.height),0,0]
+        self._fit_buffer[1:1 + len(self.static_boxes)] = self.static_array
+        self._fit_count = 1 + len(self.static_boxes)
+        self.fit_items = self._fit_buffer[:self._fit_count]
+        # EmptySpaces of Packer.pack(engine='ems'), built on the first item
+        self.empty_spaces = None
+        # running aggregates of the placed items, see canHold
+        self.total_weight = 0
+        self.free_volume = float(self.width) * float(self.height) * float(self.depth)
+        # support graph of check_loadbear, see bearLoad
+        self.load_boxes = []
+        self.load_carried = []
+        self.load_capacity = []
+        self.load_supporters = []
+        self.load_tops = {}
+        self.free_volume -= self.staticVolume()
+        for box in self.static_array.tolist():
+            self.addSupport(box, None, [])
+
+
+    def staticBoxes(self):
+        ''' [x0,x1,y0,y1,z0,z1] Decimal boxes of the 8 corner posts (when corner != 0) then of the obstacles '''
+        boxes = []
         if self.corner != 0 :
-            corner = set2Decimal(self.corner)
-            corner_list = []
-            for i in range(8):
-                a = Item(
-                    partno='corner{}'.format(i),
-                    name='corner', 
-                    typeof='cube',
-                    WHD=(corner,corner,corner), 
-                    weight=0, 
-                    level=0, 
-                    loadbear=0, 
-                    updown=True, 
-                    color='#000000')
-
-                corner_list.append(a)
-            return corner_list
-
-
-    def putCorner(self,info,item):
-        '''put coner in bin '''
-        fit = False
-        x = set2Decimal(self.width - self.corner)
-        y = set2Decimal(self.height - self.corner)
-        z = set2Decimal(self.depth - self.corner)
-        pos = [[0,0,0],[0,0,z],[0,y,z],[0,y,0],[x,y,0],[x,0,0],[x,0,z],[x,y,z]]
-        item.position = pos[info]
-        self.items.append(item)
-
-        corner = [float(item.position[0]),float(item.position[0])+float(self.corner),float(item.position[1]),float(item.position[1])+float(self.corner),float(item.position[2]),float(item.position[2])+float(self.corner)]
+            c = set2Decimal(self.corner)
+            x = set2Decimal(float(self.width) - float(self.corner))
+            y = set2Decimal(float(self.height) - float(self.corner))
+            z = set2Decimal(float(self.depth) - float(self.corner))
+            for px, py, pz in [[0,0,0],[0,0,z],[0,y,z],[0,y,0],[x,y,0],[x,0,0],[x,0,z],[x,y,z]]:
+                boxes.append([px,px+c,py,py+c,pz,pz+c])
+        for box in self.obstacles:
+            boxes.append([Decimal(str(v)) for v in box])
+        return boxes
+
+
+    def addObstacle(self, box):
+        '''
+        add static geometry to an empty bin (wheel well, overhang limit ...) : [x0,x1,y0,y1,z0,z1].
+        Like the corners, items can not overlap it and may rest on it, it is not in bin.items.
+        It may overlap the corners or other obstacles and stick out of the bin, only the part inside counts.
+        '''
+        box = list(box)
+        if len(box) != 6 or not all(float(box[k]) < float(box[k + 1]) for k in (0, 2, 4)):
+            raise ValueError("obstacle must be [x0,x1,y0,y1,z0,z1] with x0 < x1, y0 < y1, z0 < z1, got %r" % (box,))
+        self.obstacles.append(box)
+        self.clearFitItems()
+
+
+    def staticVolume(self):
+        ''' volume of the union of the static boxes clipped to the bin, overlaps counted once '''
+        f = self.static_array
+        if not len(f):
+            return 0.0
+        size = np.array([float(self.width), float(self.height), float(self.depth)])
+        boxes = f.copy()
+        boxes[:, 0::2] = np.clip(boxes[:, 0::2], 0, size)
+        boxes[:, 1::2] = np.clip(boxes[:, 1::2], 0, size)
+        boxes = boxes[(boxes[:, 1::2] > boxes[:, 0::2]).all(axis=1)]
+        if not len(boxes):
+            return 0.0
+        # cells between the distinct box faces on every axis, covered when their center is in a box
+        edges = [np.unique(boxes[:, 2 * a:2 * a + 2]) for a in range(3)]
+        centers = [(e[1:] + e[:-1]) / 2 for e in edges]
+        cx, cy, cz = np.meshgrid(*centers, indexing='ij')
+        covered = np.zeros(cx.shape, dtype=bool)
+        for x0, x1, y0, y1, z0, z1 in boxes:
+            covered |= (x0 < cx) & (cx < x1) & (y0 < cy) & (cy < y1) & (z0 < cz) & (cz < z1)
+        sides = np.meshgrid(*[np.diff(e) for e in edges], indexing='ij')
+        return float((sides[0] * sides[1] * sides[2])[covered].sum())
+
+
+    def hitsStatic(self, pivot, dimension):
+        ''' item at pivot with dimension overlaps a static box '''
+        f = self.static_array
+        if not len(f):
+            return False
+        x, y, z = float(pivot[0]), float(pivot[1]), float(pivot[2])
+        w, h, d = float(dimension[0]), float(dimension[1]), float(dimension[2])
+        return bool(((f[:,0] < x + w) & (x < f[:,1]) & (f[:,2] < y + h) & (y < f[:,3]) & (f[:,4] < z + d) & (z < f[:,5])).any())
+
+
+    def addPlaced(self, item):
+        ''' update the running aggregates for a placed item '''
+        self.total_weight += item.weight
+        w, h, d = item.getDimension()
+        self.free_volume -= float(w) * float(h) * float(d)
+
+
+    def canHold(self, item):
+        '''
+        O(1) necessary test : False when the weight left, the free volume or the dimensions of the
+        empty bin already rule item out, putItem would then fail on every pivot.
+        '''
+        if set2Decimal(self.total_weight, self.number_of_decimals) + item.weight > self.max_weight:
+            return False
+        if float(item.width) * float(item.height) * float(item.depth) > self.free_volume + VOLUME_TOLERANCE * float(self.width) * float(self.height) * float(self.depth):
+            return False
+        w, h, d = float(item.width), float(item.height), float(item.depth)
+        W, H, D = float(self.width), float(self.height), float(self.depth)
+        if item.updown:
+            return all(a <= b for a, b in zip(sorted((w, h, d)), sorted((W, H, D))))
+        # RotationType.Notupdown keeps depth vertical
+        return d <= D and ((w <= W and h <= H) or (h <= W and w <= H))
+
+
+    def addSupport(self, box, capacity, supporters):
+        ''' add a node of the support graph, capacity None for rigid boxes (container corners) '''
+        self.load_boxes.append(box)
+        self.load_carried.append(0.0)
+        self.load_capacity.append(capacity)
+        self.load_supporters.append(supporters)
+        self.load_tops.setdefault(box[5], []).append(len(self.load_boxes) - 1)
+
+
+    def bearLoad(self, box, item):
+        '''
+        check_loadbear : push the weight of item, placed at box [x0,x1,y0,y1,z0,z1], down to the boxes
+        it rests on in proportion to the contact area, and on down their own supporters.
+        False, and nothing changed, when a box below would carry more than its loadbear.
+        Otherwise the loads are committed and box joins the support graph.
+        Only the boxes on the support paths of box are visited.
+        '''
+        x0, x1, y0, y1, z0 = box[0], box[1], box[2], box[3], box[4]
+        supporters = []
+        if z0 > 0:
+            contact = 0.0
+            for k in self.load_tops.get(z0, ()):
+                b = self.load_boxes[k]
+                area = max(0.0, min(x1, b[1]) - max(x0, b[0])) * max(0.0, min(y1, b[3]) - max(y0, b[2]))
+                if area > 0:
+                    supporters.append([k, area])
+                    contact += area
+            for s in supporters:
+                s[1] /= contact
+
+        # extra load per box, walked top down : a supporter always lies lower than what it carries
+        delta = {}
+        heap = []
+        weight = float(item.weight)
+        for k, share in supporters:
+            if k not in delta:
+                delta[k] = 0.0
+                heapq.heappush(heap, (-self.load_boxes[k][4], k))
+            delta[k] += weight * share
+        while heap:
+            _, k = heapq.heappop(heap)
+            capacity = self.load_capacity[k]
+            # rigid boxes take any load and pass nothing down
+            if capacity is None:
+                continue
+            if self.load_carried[k] + delta[k] > capacity:
+                return False
+            for j, share in self.load_supporters[k]:
+                if j not in delta:
+                    delta[j] = 0.0
+                    heapq.heappush(heap, (-self.load_boxes[j][4], j))
+                delta[j] += delta[k] * share
 
-        self.fit_items = np.append(self.fit_items,np.array([corner]),axis=0)
-        return
+        for k, load in delta.items():
+            self.load_carried[k] += load
+        self.addSupport(box, float(item.loadbear), [tuple(s) for s in supporters])
+        return True
 
 
     def clearBin(self):
         ''' clear item which in bin '''
         self.items = []
-        self.fit_items = np.array([[0,self.width,0,self.height,0,0]])
+        self.clearFitItems()
         return
 
 
+class CancelToken:
+
+    def __init__(self, timeout=None):
+        ''' cooperative cancellation for Packer.pack, optional timeout in seconds '''
+        self.deadline = None if timeout is None else time.monotonic() + timeout
+        self.reason = None
+
+
+    def cancel(self, reason='cancelled'):
+        ''' ask a running pack to stop, safe to call from another thread '''
+        if self.reason is None:
+            self.reason = reason
+
+
+    def isCancelled(self):
+        ''' '''
+        if self.reason is None and self.deadline is not None and time.monotonic() >= self.deadline:
+            self.reason = 'deadline'
+        return self.reason is not None
+
+
+
+class PackCancelled(Exception):
+    ''' raised inside pack2Bin to unwind a cancelled pack '''
+
+
+
 class Packer:
 
     def __init__(self):
@@ -354,6 +591,18 @@ class Packer:
         self.unfit_items = []
         self.total_items = 0
         self.binding = []
+        # False when the last pack was cancelled before every item was tried
+        self.complete = True
+        self.cancel_reason = None
+        self.cancel_token = None
+        # PackStats of the last pack(stats=True), else None
+        self.stats = None
+        self.bounded_memory = False
+        self.check_loadbear = False
+        # placement engine, 'pivot', 'ems' (see py3dbp.ems) or 'layer' (see py3dbp.layers)
+        self.engine = 'pivot'
+        self.ems_rule = 'dftrc'
+        self.ems_min_dim = 0.0
         # self.apex = []
 
 
@@ -374,33 +623,56 @@ class Packer:
         fitted = False
         bin.fix_point = fix_point
         bin.check_stable = check_stable
+        bin.check_loadbear = self.check_loadbear
         bin.support_surface_ratio = support_surface_ratio
+        stats = bin.stats = self.stats
+        if stats is not None:
+            stats.items += 1
+        trace = bin.trace = self.trace
+        if trace is not None:
+            trace.setItem(item)
+
+        if self.engine in ('ems', 'layer'):
+            self.packEMS(bin, item)
+            return
 
-        # first put item on (0,0,0) , if corner exist ,first add corner in box. 
-        if bin.corner != 0 and not bin.items:
-            corner_lst = bin.addCorner()
-            for i in range(len(corner_lst)) :
-                bin.putCorner(i,corner_lst[i])
-
-        elif not bin.items:
+        # first put item on (0,0,0) , unless static geometry (corners) gives the pivots.
+        if not bin.items and not bin.static_boxes:
+            if not bin.canHold(item):
+                self.rejectItem(bin, item)
+                return
             response = bin.putItem(item, item.position)
+            if stats is not None:
+                stats.pivots += 1
+                stats.placed += bool(response)
 
             if not response:
                 bin.unfitted_items.append(item)
+                if trace is not None:
+                    trace.write(TraceKind.UNFIT, 0)
+            return
+
+        if not bin.canHold(item):
+            self.rejectItem(bin, item)
             return
 
         for axis in range(0, 3):
             items_in_bin = bin.items
-            for ib in items_in_bin:
+            # corners and obstacles give pivots before the items
+            for position, (w, h, d) in itertools.chain(bin.static_pivots, ((ib.position, ib.getDimension()) for ib in items_in_bin)):
                 pivot = [0, 0, 0]
-                w, h, d = ib.getDimension()
                 if axis == Axis.WIDTH:
-                    pivot = [ib.position[0] + w,ib.position[1],ib.position[2]]
+                    pivot = [position[0] + w,position[1],position[2]]
                 elif axis == Axis.HEIGHT:
-                    pivot = [ib.position[0],ib.position[1] + h,ib.position[2]]
+                    pivot = [position[0],position[1] + h,position[2]]
                 elif axis == Axis.DEPTH:
-                    pivot = [ib.position[0],ib.position[1],ib.position[2] + d]
-                    
+                    pivot = [position[0],position[1],position[2] + d]
+
+                if self.cancel_token is not None and self.cancel_token.isCancelled():
+                    raise PackCancelled(self.cancel_token.reason)
+
+                if stats is not None:
+                    stats.pivots += 1
                 if bin.putItem(item, pivot, axis):
                     fitted = True
                     break
@@ -408,20 +680,59 @@ class Packer:
                 break
         if not fitted:
             bin.unfitted_items.append(item)
+            if trace is not None:
+                trace.write(TraceKind.UNFIT, 0)
+        elif stats is not None:
+            stats.placed += 1
+
+
+    def packLayers(self, bin, items, fix_point, check_stable, support_surface_ratio):
+        ''' stack full layers of items in bin, return the items left, see py3dbp.layers '''
+        bin.fix_point = fix_point
+        bin.check_stable = check_stable
+        bin.check_loadbear = self.check_loadbear
+        bin.support_surface_ratio = support_surface_ratio
+        bin.stats = self.stats
+        bin.trace = self.trace
+        return packLayers(self, bin, items)
+
+
+    def packEMS(self, bin, item):
+        ''' pack item to bin at the best empty maximal space, see py3dbp.ems '''
+        if not bin.canHold(item):
+            self.rejectItem(bin, item)
+            return
+        if self.cancel_token is not None and self.cancel_token.isCancelled():
+            raise PackCancelled(self.cancel_token.reason)
+        if bin.empty_spaces is None:
+            bin.empty_spaces = EmptySpaces(bin, self.ems_min_dim)
+        fitted, tried = placeItem(bin, item, self.ems_rule, cancel_token=self.cancel_token)
+        if self.stats is not None:
+            self.stats.pivots += tried
+            self.stats.placed += fitted
+        if not fitted:
+            bin.unfitted_items.append(item)
+            if self.trace is not None:
+                self.trace.write(TraceKind.UNFIT, 0)
 
 
     def sortBinding(self,bin):
         ''' sorted by binding '''
         b,front,back = [],[],[]
+        # ids of front / back, list membership made this quadratic
+        seen = set()
         for i in range(len(self.binding)):
             b.append([]) 
             for item in self.items:
                 if item.name in self.binding[i]:
                     b[i].append(item)
                 elif item.name not in self.binding:
-                    if len(b[0]) == 0 and item not in front:
+                    if id(item) in seen:
+                        continue
+                    seen.add(id(item))
+                    if len(b[0]) == 0:
                         front.append(item)
-                    elif item not in back and item not in front:
+                    else:
                         back.append(item)
 
         min_c = min([len(i) for i in b])
@@ -431,9 +742,10 @@ class Packer:
             for j in range(len(b)):
                 sort_bind.append(b[j][i])
         
+        bound = set(id(j) for j in sort_bind)
         for i in b:
             for j in i:
-                if j not in sort_bind:
+                if id(j) not in bound:
                     self.unfit_items.append(j)
 
         self.items = front + sort_bind + back
@@ -442,20 +754,19 @@ class Packer:
 
     def putOrder(self):
         '''Arrange the order of items '''
-        r = []
         for i in self.bins:
-            # open top container
-            if i.put_type == 2:
-                i.items.sort(key=lambda item: item.position[0], reverse=False)
-                i.items.sort(key=lambda item: item.position[1], reverse=False)
-                i.items.sort(key=lambda item: item.position[2], reverse=False)
-            # general container
-            elif i.put_type == 1:
-                i.items.sort(key=lambda item: item.position[1], reverse=False)
-                i.items.sort(key=lambda item: item.position[2], reverse=False)
-                i.items.sort(key=lambda item: item.position[0], reverse=False)
-            else :
-                pass
+            self.putOrderBin(i)
+        return
+
+
+    def putOrderBin(self, i):
+        '''
+        Arrange the order of items in one bin : supporting items first, and away from the access side
+        (door for a general container, top for an open top one) first, see py3dbp.sequence.
+        put_type 0 only moves an item after the items it rests on.
+        '''
+        order = loadOrder(i.items, i.put_type)
+        i.items[:] = [i.items[k] for k in order]
         return
 
 
@@ -536,20 +847,111 @@ class Packer:
                     break
             
         r = [area[0][2],area[1][2],area[2][2],area[3][2]]
+        # empty bin (e.g. every item went to an earlier bin)
+        if sum(r) == 0:
+            return [0,0,0,0]
         result = []
         for i in r :
             result.append(round(i / sum(r) * 100,2))
         return result
 
 
-    def pack(self, bigger_first=False,distribute_items=True,fix_point=True,check_stable=True,support_surface_ratio=0.75,binding=[],number_of_decimals=DEFAULT_NUMBER_OF_DECIMALS):
-        '''pack master func '''
+    def pack(self, bigger_first=False,distribute_items=True,fix_point=True,check_stable=True,support_surface_ratio=0.75,binding=[],number_of_decimals=DEFAULT_NUMBER_OF_DECIMALS,cancel_token=None,timeout=None,stats=False,stats_hook=None,trace=None,bounded_memory=False,on_bin=None,check_loadbear=False,engine='pivot',ems_rule='dftrc'):
+        '''pack master func 
+        cancel_token : CancelToken checked in the pivot loop (before every EMS candidate with engine 'ems'), timeout : seconds from now.
+        When either fires, packing stops, items not placed yet go to unfit_items and complete is False.
+        stats : collect a PackStats in self.stats, stats_hook : called with it when the pack ends (turns stats on).
+        trace : file path or PackTrace, records every pivot decision (see py3dbp.trace).
+        bounded_memory : bins keep the added Item objects instead of deep copies (see packIter).
+        on_bin : called with every finished bin, which is then dropped from self.bins.
+        check_loadbear : reject placements that put more weight on an item than its loadbear (see Bin.bearLoad).
+        engine : 'pivot' tries the corners of the placed items, 'ems' the empty maximal spaces of the bin
+        chosen by ems_rule, 'dftrc', 'best_fit' or 'bbl' (see py3dbp.ems). 'layer' stacks full layers
+        of every SKU first, then puts the rest like 'ems' (see py3dbp.layers).
+        '''
+        for bin in self.packIter(bigger_first,distribute_items,fix_point,check_stable,support_surface_ratio,binding,number_of_decimals,
+                                 cancel_token,timeout,stats,stats_hook,trace,bounded_memory,stream=on_bin is not None,check_loadbear=check_loadbear,engine=engine,ems_rule=ems_rule):
+            if on_bin is not None:
+                on_bin(bin)
+
+
+    def packCheapest(self, max_bins=None, max_checks=50, **kwargs):
+        '''
+        pick the cheapest bins for the items : every bin in self.bins is a bin type with a cost (Bin cost=)
+        and any number of copies. Branch-and-bound over the types, see py3dbp.selection.
+        kwargs go to pack (distribute_items is always True).
+        Afterwards self.bins holds the chosen, packed copies, self.total_cost their cost and
+        self.selection what the search did. If no tried set holds every item, the one with the fewest unfit items is kept.
+        '''
+        from .selection import BinSelection
+        kwargs.pop('distribute_items', None)
+        search = BinSelection(self.bins, self.items, kwargs, max_bins, max_checks)
+        found = search.solve()
+        if found is None:
+            counts, bins, unfit, complete, feasible = None, [], list(self.items), True, False
+        else:
+            counts, packer = found
+            bins = [b for b in packer.bins if b.items]
+            unfit = packer.unfit_items + search.unfittable
+            complete = packer.complete
+            feasible = not packer.unfit_items
+        self.bins = bins
+        self.unfit_items = unfit
+        self.items = []
+        self.complete = complete
+        self.total_cost = sum(float(b.cost) for b in bins)
+        self.selection = {
+            'counts' : {t.partno : n for t, n in zip(search.types, counts)} if counts else {},
+            'checks' : search.checks,
+            'nodes' : search.nodes,
+            # every item that fits one of the types was placed
+            'feasible' : feasible,
+        }
+
+
+    def packIter(self, bigger_first=False,distribute_items=True,fix_point=True,check_stable=True,support_surface_ratio=0.75,binding=[],number_of_decimals=DEFAULT_NUMBER_OF_DECIMALS,cancel_token=None,timeout=None,stats=False,stats_hook=None,trace=None,bounded_memory=False,stream=True,check_loadbear=False,engine='pivot',ems_rule='dftrc'):
+        '''
+        pack, yielding every bin as soon as it is finished and its items are in put order.
+        stream : a yielded bin is removed from self.bins, so only the bin being filled stays in the packer.
+        bounded_memory : one record per item. With distribute_items a placed item is the added Item itself,
+        otherwise a shallow copy (an item can sit in every bin), and unfit_items is not deep copied.
+        Other arguments as pack.
+        '''
+        self.stats = PackStats() if stats or stats_hook is not None else None
+        if self.stats is not None:
+            st = time.perf_counter()
+            if tracemalloc.is_tracing():
+                tracemalloc.reset_peak()
+        if timeout is not None:
+            cancel_token = cancel_token or CancelToken()
+            deadline = time.monotonic() + timeout
+            if cancel_token.deadline is None or deadline < cancel_token.deadline:
+                cancel_token.deadline = deadline
+        self.cancel_token = cancel_token
+        self.complete = True
+        self.cancel_reason = None
+        self.bounded_memory = bounded_memory
+        self.check_loadbear = check_loadbear
+        if engine not in ('pivot', 'ems', 'layer'):
+            raise ValueError("engine must be 'pivot', 'ems' or 'layer', got %r" % (engine,))
+        if engine != 'pivot' and ems_rule not in EMS_RULES:
+            raise ValueError("ems_rule must be one of %s, got %r" % (', '.join(EMS_RULES), ems_rule))
+        self.engine = engine
+        self.ems_rule = ems_rule
         # set decimals
         for bin in self.bins:
             bin.formatNumbers(number_of_decimals)
+            if not bounded_memory:
+                bin.copy_item = copy.deepcopy
+            elif distribute_items:
+                bin.copy_item = _sameItem
+            else:
+                bin.copy_item = copy.copy
 
         for item in self.items:
             item.formatNumbers(number_of_decimals)
+        # thinnest side of any item, thinner empty spaces are dropped
+        self.ems_min_dim = min([float(min(item.width, item.height, item.depth)) for item in self.items] or [0.0])
         # add binding attribute
         self.binding = binding
         # Bin : sorted by volumn
@@ -562,27 +964,112 @@ class Packer:
         # sorted by binding
         if binding != []:
             self.sortBinding(bin)
+        if self.stats is not None:
+            st = self.stats.addTime('sort',st)
+        if isinstance(trace,str):
+            from .trace import PackTrace
+            trace = PackTrace(trace)
+        self.trace = trace
+        if self.trace is not None:
+            self.trace.open(self.bins,self.items)
+        try :
+            for bin in self._packBins(bigger_first,distribute_items,fix_point,check_stable,support_surface_ratio,binding):
+                if stream:
+                    self.bins.remove(bin)
+                yield bin
+        finally :
+            if self.trace is not None:
+                self.trace.close()
+                for bin in self.bins:
+                    bin.trace = None
+
+        if self.stats is not None:
+            self.stats.peak_memory = peakMemory()
+            for bin in self.bins:
+                bin.stats = None
+            if stats_hook is not None:
+                stats_hook(self.stats)
+
+
+    def rejectItem(self, bin, item):
+        ''' item can not fit bin whatever the pivot (see Bin.canHold) '''
+        bin.unfitted_items.append(item)
+        if self.stats is not None:
+            self.stats.early_rejections += 1
+        if self.trace is not None:
+            self.trace.write(TraceKind.UNFIT, 0)
+
+
+    def packItems(self, bin, items, fix_point, check_stable, support_surface_ratio):
+        '''
+        pack2Bin every item in order. The bin is closed as soon as its free volume or the weight it
+        can still take is below the smallest of the items left : they all go to bin.unfitted_items.
+        engine 'layer' first stacks full layers, the items left are then packed that way.
+        '''
+        if self.engine == 'layer':
+            items = self.packLayers(bin, items, fix_point, check_stable, support_surface_ratio)
+        n = len(items)
+        # smallest volume / weight of items[i:]
+        min_volume = [float('inf')] * (n + 1)
+        min_weight = [None] * (n + 1)
+        for i in range(n - 1, -1, -1):
+            item = items[i]
+            min_volume[i] = min(min_volume[i + 1], float(item.width) * float(item.height) * float(item.depth))
+            min_weight[i] = item.weight if min_weight[i + 1] is None else min(min_weight[i + 1], item.weight)
+        tolerance = VOLUME_TOLERANCE * float(bin.getVolume())
+        for i, item in enumerate(items):
+            if bin.items and (bin.free_volume + tolerance < min_volume[i] or bin.max_weight - set2Decimal(bin.total_weight, bin.number_of_decimals) < min_weight[i]):
+                for item in items[i:]:
+                    if self.stats is not None:
+                        self.stats.items += 1
+                    if self.trace is not None:
+                        self.trace.setItem(item)
+                    self.rejectItem(bin, item)
+                return
+            self.pack2Bin(bin, item, fix_point, check_stable, support_surface_ratio)
+
+
+    def _packBins(self,bigger_first,distribute_items,fix_point,check_stable,support_surface_ratio,binding):
+        ''' pack the sorted items into every bin, yield each bin when it is done '''
+        st = time.perf_counter()
+        for idx,bin in enumerate(list(self.bins)):
+            if self.trace is not None:
+                self.trace.setBin(idx)
+                for box in bin.static_boxes:
+                    self.trace.corner(box)
+            try :
+                # pack item to bin
+                self.packItems(bin, self.items, fix_point, check_stable, support_surface_ratio)
+
+                if binding != []:
+                    # resorted
+                    self.items.sort(key=lambda item: item.getVolume(), reverse=bigger_first)
+                    self.items.sort(key=lambda item: item.loadbear, reverse=True)
+                    self.items.sort(key=lambda item: item.level, reverse=False)
+                    # clear bin
+                    if self.trace is not None:
+                        self.trace.write(TraceKind.RESET, 0)
+                        for box in bin.static_boxes:
+                            self.trace.corner(box)
+                    bin.items = []
+                    bin.unfitted_items = self.unfit_items
+                    bin.clearFitItems()
+                    # repacking
+                    self.packItems(bin, self.items, fix_point, check_stable, support_surface_ratio)
+            except PackCancelled as e:
+                # keep what is already placed, the items never tried are unfit in this bin and in unfit_items
+                self.complete = False
+                self.cancel_reason = str(e)
+                fitted = set(item.partno for item in bin.items)
+                tried = set(id(item) for item in bin.unfitted_items)
+                bin.unfitted_items.extend(item for item in self.items if item.partno not in fitted and id(item) not in tried)
+            if self.stats is not None:
+                st = self.stats.addTime('pack',st)
 
-        for idx,bin in enumerate(self.bins):
-            # pack item to bin
-            for item in self.items:
-                self.pack2Bin(bin, item, fix_point, check_stable, support_surface_ratio)
-
-            if binding != []:
-                # resorted
-                self.items.sort(key=lambda item: item.getVolume(), reverse=bigger_first)
-                self.items.sort(key=lambda item: item.loadbear, reverse=True)
-                self.items.sort(key=lambda item: item.level, reverse=False)
-                # clear bin
-                bin.items = []
-                bin.unfitted_items = self.unfit_items
-                bin.fit_items = np.array([[0,bin.width,0,bin.height,0,0]])
-                # repacking
-                for item in self.items:
-                    self.pack2Bin(bin, item,fix_point,check_stable,support_surface_ratio)
-            
             # Deviation Of Cargo Gravity Center 
-            self.bins[idx].gravity = self.gravityCenter(bin)
+            bin.gravity = self.gravityCenter(bin)
+            if self.stats is not None:
+                st = self.stats.addTime('gravity',st)
 
             if distribute_items :
                 for bitem in bin.items:
@@ -592,11 +1079,22 @@ class Packer:
                             self.items.remove(item)
                             break
 
-        # put order of items
-        self.putOrder()
+            # put order of items
+            self.putOrderBin(bin)
+            if self.stats is not None:
+                st = self.stats.addTime('put_order',st)
+            bin.stats = None
+            bin.trace = None
+            yield bin
+
+            if not self.complete:
+                break
 
         if self.items != []:
-            self.unfit_items = copy.deepcopy(self.items)
+            if not self.bounded_memory:
+                self.unfit_items = copy.deepcopy(self.items)
+            else:
+                self.unfit_items = self.items
             self.items = []
         # for item in self.items.copy():
         #     if item in bin.unfitted_items:
@@ -604,129 +1102,29 @@ class Packer:
 
 
 
-class Painter:
-
-    def __init__(self,bins):
-        ''' '''
-        self.items = bins.items
-        self.width = bins.width
-        self.height = bins.height
-        self.depth = bins.depth
-
-
-    def _plotCube(self, ax, x, y, z, dx, dy, dz, color='red',mode=2,linewidth=1,text="",fontsize=15,alpha=0.5):
-        """ Auxiliary function to plot a cube. code taken somewhere from the web.  """
-        xx = [x, x, x+dx, x+dx, x]
-        yy = [y, y+dy, y+dy, y, y]
-        
-        kwargs = {'alpha': 1, 'color': color,'linewidth':linewidth }
-        if mode == 1 :
-            ax.plot3D(xx, yy, [z]*5, **kwargs)
-            ax.plot3D(xx, yy, [z+dz]*5, **kwargs)
-            ax.plot3D([x, x], [y, y], [z, z+dz], **kwargs)
-            ax.plot3D([x, x], [y+dy, y+dy], [z, z+dz], **kwargs)
-            ax.plot3D([x+dx, x+dx], [y+dy, y+dy], [z, z+dz], **kwargs)
-            ax.plot3D([x+dx, x+dx], [y, y], [z, z+dz], **kwargs)
-        else :
-            p = Rectangle((x,y),dx,dy,fc=color,ec='black',alpha = alpha)
-            p2 = Rectangle((x,y),dx,dy,fc=color,ec='black',alpha = alpha)
-            p3 = Rectangle((y,z),dy,dz,fc=color,ec='black',alpha = alpha)
-            p4 = Rectangle((y,z),dy,dz,fc=color,ec='black',alpha = alpha)
-            p5 = Rectangle((x,z),dx,dz,fc=color,ec='black',alpha = alpha)
-            p6 = Rectangle((x,z),dx,dz,fc=color,ec='black',alpha = alpha)
-            ax.add_patch(p)
-            ax.add_patch(p2)
-            ax.add_patch(p3)
-            ax.add_patch(p4)
-            ax.add_patch(p5)
-            ax.add_patch(p6)
-            
-            if text != "":
-                ax.text( (x+ dx/2), (y+ dy/2), (z+ dz/2), str(text),color='black', fontsize=fontsize, ha='center', va='center')
-
-            art3d.pathpatch_2d_to_3d(p, z=z, zdir="z")
-            art3d.pathpatch_2d_to_3d(p2, z=z+dz, zdir="z")
-            art3d.pathpatch_2d_to_3d(p3, z=x, zdir="x")
-            art3d.pathpatch_2d_to_3d(p4, z=x + dx, zdir="x")
-            art3d.pathpatch_2d_to_3d(p5, z=y, zdir="y")
-            art3d.pathpatch_2d_to_3d(p6, z=y + dy, zdir="y")
-
-
-    def _plotCylinder(self, ax, x, y, z, dx, dy, dz, color='red',mode=2,text="",fontsize=10,alpha=0.2):
-        """ Auxiliary function to plot a Cylinder  """
-        # plot the two circles above and below the cylinder
-        p = Circle((x+dx/2,y+dy/2),radius=dx/2,color=color,alpha=0.5)
-        p2 = Circle((x+dx/2,y+dy/2),radius=dx/2,color=color,alpha=0.5)
-        ax.add_patch(p)
-        ax.add_patch(p2)
-        art3d.pathpatch_2d_to_3d(p, z=z, zdir="z")
-        art3d.pathpatch_2d_to_3d(p2, z=z+dz, zdir="z")
-        # plot a circle in the middle of the cylinder
-        center_z = np.linspace(0, dz, 10)
-        theta = np.linspace(0, 2*np.pi, 10)
-        theta_grid, z_grid=np.meshgrid(theta, center_z)
-        x_grid = dx / 2 * np.cos(theta_grid) + x + dx / 2
-        y_grid = dy / 2 * np.sin(theta_grid) + y + dy / 2
-        z_grid = z_grid + z
-        ax.plot_surface(x_grid, y_grid, z_grid,shade=False,fc=color,alpha=alpha,color=color)
-        if text != "" :
-            ax.text( (x+ dx/2), (y+ dy/2), (z+ dz/2), str(text),color='black', fontsize=fontsize, ha='center', va='center')
-
-    def plotBoxAndItems(self,title="",alpha=0.2,write_num=False,fontsize=10):
-        """ side effective. Plot the Bin and the items it contains. """
-        fig = plt.figure()
-        axGlob = plt.axes(projection='3d')
-        
-        # plot bin 
-        self._plotCube(axGlob,0, 0, 0, float(self.width), float(self.height), float(self.depth),color='black',mode=1,linewidth=2,text="")
-
-        counter = 0
-        # fit rotation type
-        for item in self.items:
-            rt = item.rotation_type  
-            x,y,z = item.position
-            [w,h,d] = item.getDimension()
-            color = item.color
-            text= item.partno if write_num else ""
-
-            if item.typeof == 'cube':
-                 # plot item of cube
-                self._plotCube(axGlob, float(x), float(y), float(z), float(w),float(h),float(d),color=color,mode=2,text=text,fontsize=fontsize,alpha=alpha)
-            elif item.typeof == 'cylinder':
-                # plot item of cylinder
-                self._plotCylinder(axGlob, float(x), float(y), float(z), float(w),float(h),float(d),color=color,mode=2,text=text,fontsize=fontsize,alpha=alpha)
-            
-            counter = counter + 1  
-
-        
-        plt.title(title)
-        self.setAxesEqual(axGlob)
-        return plt
-
-
-    def setAxesEqual(self,ax):
-        '''Make axes of 3D plot have equal scale so that spheres appear as spheres,
-        cubes as cubes, etc..  This is one possible solution to Matplotlib's
-        ax.set_aspect('equal') and ax.axis('equal') not working for 3D.
+def _sameItem(item):
+    ''' Bin.copy_item of bounded_memory packs, the bin keeps the added Item '''
+    return item
 
-        Input
-        ax: a matplotlib axis, e.g., as output from plt.gca().'''
-        x_limits = ax.get_xlim3d()
-        y_limits = ax.get_ylim3d()
-        z_limits = ax.get_zlim3d()
 
-        x_range = abs(x_limits[1] - x_limits[0])
-        x_middle = np.mean(x_limits)
-        y_range = abs(y_limits[1] - y_limits[0])
-        y_middle = np.mean(y_limits)
-        z_range = abs(z_limits[1] - z_limits[0])
-        z_middle = np.mean(z_limits)
+def peakMemory():
+    '''
+    peak memory in bytes : the tracemalloc peak since the pack started when tracemalloc is tracing,
+    else the peak resident set size of the process (None where the resource module is missing).
+    '''
+    if tracemalloc.is_tracing():
+        return tracemalloc.get_traced_memory()[1]
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on linux, bytes on macOS
+    return rss if sys.platform == 'darwin' else rss * 1024
 
-        # The plot bounding box is a sphere in the sense of the infinity
-        # norm, hence I call half the max range the plot radius.
-        plot_radius = 0.5 * max([x_range, y_range, z_range])
 
-        ax.set_xlim3d([x_middle - plot_radius, x_middle + plot_radius])
-        ax.set_ylim3d([y_middle - plot_radius, y_middle + plot_radius])
-        ax.set_zlim3d([z_middle - plot_radius, z_middle + plot_radius])
 
+def __getattr__(name):
+    ''' Painter lives in painter.py, keep main.Painter importable without loading matplotlib up front '''
+    if name == 'Painter':
+        from .painter import Painter
+        return Painter
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
@@ -0,0 +1,213 @@
+'''
+Online packing : items arrive one at a time (e.g. from a conveyor) and are placed as they come.
+
+    conveyor = OnlinePacker([Bin('pallet', (1000, 1200, 1800), 10000)], lookahead=2, time_budget=0.05)
+    for item in arriving_items:
+        decision = conveyor.place(item)        # None while the lookahead buffer fills up
+        if decision is not None:
+            robot.put(decision.item, decision.position, decision.rotation_type)
+    for decision in conveyor.flush():          # end of the load, decide the buffered items
+        ...
+    conveyor.latency()                         # per decision seconds : p50, p95, p99, max
+
+The bins are never cleared or re-sorted : every decision is pack2Bin on the current bin state,
+so items are placed in the order they are decided, like the robot puts them.
+lookahead : up to k items wait in a buffer, each decision takes the buffered item Packer.pack
+would put first with the same bigger_first : level, then loadbear, then the smallest (the biggest
+with bigger_first=True).
+time_budget : seconds per decision. The budget token's deadline is time_budget from the start of the
+decision less a margin for the work around the pivot loop (choosing the item, the bookkeeping after it),
+and the pivot loop (the candidate loop with engine='ems') stops before a pivot of the expected cost
+would overrun it, the item is then unfit with reason 'deadline'. Pivot cost and margin are running
+estimates, mean + 3 deviations, of the decisions so far ; the margin is at least BUDGET_MARGIN of the budget.
+Failed attempts are not kept in bin.unfitted_items, the unfit items are in unfit_items.
+'''
+import time
+
+from .main import Packer, CancelToken, PackCancelled, DEFAULT_NUMBER_OF_DECIMALS, _sameItem
+
+# least share of time_budget kept for the work of a decision outside the pivot loop
+BUDGET_MARGIN = 0.1
+
+
+class RunningCost:
+
+    def __init__(self, weight=0.05):
+        ''' exponentially weighted mean and mean absolute deviation of a duration '''
+        self.weight = weight
+        self.mean = None
+        self.deviation = 0.0
+
+
+    def add(self, seconds):
+        ''' '''
+        if self.mean is None:
+            self.mean = seconds
+            return
+        self.deviation += self.weight * (abs(seconds - self.mean) - self.deviation)
+        self.mean += self.weight * (seconds - self.mean)
+
+
+    def estimate(self):
+        ''' mean + 3 deviations, 0 before the first sample '''
+        return 0.0 if self.mean is None else self.mean + 3 * self.deviation
+
+
+
+class BudgetToken(CancelToken):
+
+    def __init__(self, deadline, pivot_cost):
+        '''
+        CancelToken of one decision ending at deadline (time.monotonic). pack2Bin checks it before
+        every pivot, the time between two checks is the cost of a pivot and goes to pivot_cost
+        (a RunningCost) : it fires when a pivot of the estimated cost would overrun the deadline.
+        '''
+        CancelToken.__init__(self)
+        self.deadline = deadline
+        self.pivot_cost = pivot_cost
+        self.first = None
+        self.last = None
+
+
+    def isCancelled(self):
+        ''' '''
+        now = time.monotonic()
+        if self.last is not None:
+            self.pivot_cost.add(now - self.last)
+        else:
+            self.first = now
+        self.last = now
+        if self.reason is None and now + self.pivot_cost.estimate() >= self.deadline:
+            self.reason = 'deadline'
+        return self.reason is not None
+
+
+
+class Decision:
+
+    def __init__(self, item, bin, seconds, reason=None):
+        '''
+        bin : the Bin item was put in, None when it is unfit.
+        reason : None when placed, 'unfit' or 'deadline' (time_budget ran out) otherwise.
+        '''
+        self.item = item
+        self.bin = bin
+        self.seconds = seconds
+        self.reason = reason
+        self.position = item.position if bin is not None else None
+        self.rotation_type = item.rotation_type if bin is not None else None
+
+
+    def string(self):
+        ''' '''
+        if self.bin is None:
+            return "%s unfit (%s) %.1fms" % (self.item.partno, self.reason, self.seconds * 1000)
+        return "%s -> %s pos(%s) rt(%s) %.1fms" % (
+            self.item.partno, self.bin.partno, self.position, self.rotation_type, self.seconds * 1000)
+
+
+
+class OnlinePacker:
+
+    def __init__(self, bins, lookahead=0, time_budget=None, fix_point=True, check_stable=True,
+                 support_surface_ratio=0.75, number_of_decimals=DEFAULT_NUMBER_OF_DECIMALS, check_loadbear=False,
+                 engine='pivot', ems_rule='dftrc', bigger_first=False):
+        '''
+        bins : filled in order, an item goes to the first one it fits.
+        lookahead : most items kept waiting before a decision is forced.
+        time_budget : seconds per decision, None for no limit.
+        check_loadbear, engine, ems_rule, bigger_first : as Packer.pack.
+        '''
+        self.packer = Packer()
+        self.packer.trace = None
+        self.packer.check_loadbear = check_loadbear
+        self.packer.engine = engine
+        self.packer.ems_rule = ems_rule
+        self.bins = self.packer.bins
+        for bin in bins:
+            bin.formatNumbers(number_of_decimals)
+            # the placed items are the ones passed to place()
+            bin.copy_item = _sameItem
+            self.packer.addBin(bin)
+        self.lookahead = lookahead
+        self.bigger_first = bigger_first
+        self.time_budget = time_budget
+        self.fix_point = fix_point
+        self.check_stable = check_stable
+        self.support_surface_ratio = support_surface_ratio
+        self.number_of_decimals = number_of_decimals
+        self.buffer = []
+        self.unfit_items = []
+        # seconds of every decision
+        self.seconds = []
+        # seconds between two checks of the budget token, and of a decision outside the pivot loop
+        self.pivot_cost = RunningCost()
+        self.overhead_cost = RunningCost()
+
+
+    def place(self, item):
+        ''' add item, return the Decision made for a buffered item, or None while the buffer is not full '''
+        item.formatNumbers(self.number_of_decimals)
+        self.buffer.append(item)
+        if len(self.buffer) <= self.lookahead:
+            return None
+        return self.decide()
+
+
+    def flush(self):
+        ''' decide every buffered item '''
+        decisions = []
+        while self.buffer:
+            decisions.append(self.decide())
+        return decisions
+
+
+    def decide(self):
+        ''' take the buffered item that goes first and put it in the first bin it fits '''
+        st = time.perf_counter()
+        start = time.monotonic()
+        size = -1 if self.bigger_first else 1
+        item = min(self.buffer, key=lambda item: (item.level, -item.loadbear, size * item.getVolume()))
+        self.buffer.remove(item)
+        packer = self.packer
+        token = None
+        if self.time_budget is not None:
+            margin = max(BUDGET_MARGIN * self.time_budget, self.overhead_cost.estimate())
+            token = packer.cancel_token = BudgetToken(start + self.time_budget - margin, self.pivot_cost)
+        placed, reason = None, 'unfit'
+        try:
+            for bin in self.bins:
+                n, unfit = len(bin.items), len(bin.unfitted_items)
+                try:
+                    packer.pack2Bin(bin, item, self.fix_point, self.check_stable, self.support_surface_ratio)
+                finally:
+                    # a conveyor run would grow it without bound, unfit items are in self.unfit_items
+                    del bin.unfitted_items[unfit:]
+                if len(bin.items) > n:
+                    placed, reason = bin, None
+                    break
+        except PackCancelled as e:
+            reason = str(e)
+        finally:
+            packer.cancel_token = None
+        if placed is None:
+            self.unfit_items.append(item)
+        if token is not None and token.first is not None:
+            # before the first check and after the last one
+            self.overhead_cost.add((token.first - start) + (time.monotonic() - token.last))
+        seconds = time.perf_counter() - st
+        self.seconds.append(seconds)
+        return Decision(item, placed, seconds, reason)
+
+
+    def latency(self):
+        ''' per decision seconds : count, p50, p95, p99, max '''
+        s = sorted(self.seconds)
+        pct = lambda p : s[min(len(s) - 1, int(p * len(s)))] if s else None
+        return {
+            'count' : len(s),
+            'p50' : pct(0.5),
+            'p95' : pct(0.95),
+            'p99' : pct(0.99),
+            'max' : s[-1] if s else None,
+        }
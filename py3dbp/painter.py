@@ -0,0 +1,346 @@
+import numpy as np
+# required to plot a representation of Bin and contained items 
+from matplotlib.patches import Rectangle,Circle
+from matplotlib.colors import to_rgba, to_rgba_array
+from matplotlib.figure import Figure
+import matplotlib.pyplot as plt
+import mpl_toolkits.mplot3d.art3d as art3d
+
+# the 8 corners of a unit cube, and the 4 corners of each of its 6 faces
+CUBE_CORNERS = np.array([[0,0,0],[1,0,0],[1,1,0],[0,1,0],[0,0,1],[1,0,1],[1,1,1],[0,1,1]],dtype=float)
+CUBE_FACES = np.array([[0,1,2,3],[4,5,6,7],[0,3,7,4],[1,2,6,5],[0,1,5,4],[3,2,6,7]])
+# segments of the cylinder outline, as in _plotCylinder
+CYLINDER_SEGMENTS = 9
+
+
+def cubeFaces(boxes):
+    ''' boxes : (n,6) array of x,y,z,dx,dy,dz -> (n*6,4,3) face vertices '''
+    boxes = np.asarray(boxes,dtype=float).reshape(-1,6)
+    corners = boxes[:,None,:3] + CUBE_CORNERS[None,:,:] * boxes[:,None,3:]
+    return corners[:,CUBE_FACES].reshape(-1,4,3)
+
+
+def cylinderFaces(boxes, segments=CYLINDER_SEGMENTS):
+    ''' boxes : (n,6) array of x,y,z,dx,dy,dz -> (caps (n*2,segments,3), sides (n*segments,4,3)) '''
+    boxes = np.asarray(boxes,dtype=float).reshape(-1,6)
+    theta = np.linspace(0, 2*np.pi, segments + 1)[:-1]
+    cx = boxes[:,0:1] + boxes[:,3:4] / 2
+    cy = boxes[:,1:2] + boxes[:,4:5] / 2
+    ring_x = cx + boxes[:,3:4] / 2 * np.cos(theta)
+    ring_y = cy + boxes[:,4:5] / 2 * np.sin(theta)
+    z0 = np.repeat(boxes[:,2:3], segments, axis=1)
+    z1 = z0 + boxes[:,5:6]
+    bottom = np.stack([ring_x,ring_y,z0],axis=-1)
+    top = np.stack([ring_x,ring_y,z1],axis=-1)
+    caps = np.stack([bottom,top],axis=1).reshape(-1,segments,3)
+    nxt = np.roll(np.arange(segments),-1)
+    sides = np.stack([bottom,bottom[:,nxt],top[:,nxt],top],axis=2).reshape(-1,4,3)
+    return caps, sides
+
+
+# edges of a unit cube as pairs of CUBE_CORNERS
+CUBE_EDGES = np.array([[0,1],[1,2],[2,3],[3,0],[4,5],[5,6],[6,7],[7,4],[0,4],[1,5],[2,6],[3,7]])
+
+
+def cubeEdges(boxes):
+    ''' boxes : (n,6) array of x,y,z,dx,dy,dz -> (n*12,2,3) edge segments '''
+    boxes = np.asarray(boxes,dtype=float).reshape(-1,6)
+    corners = boxes[:,None,:3] + CUBE_CORNERS[None,:,:] * boxes[:,None,3:]
+    return corners[:,CUBE_EDGES].reshape(-1,2,3)
+
+
+def mergeBoxes(boxes, keys):
+    '''
+    merge touching boxes with the same key (e.g. color) into blocks, first along x, then y, then z.
+    Two boxes merge when they share the key and the other two extents and one ends where the other starts.
+    Returns (merged boxes, their keys).
+    '''
+    boxes = [list(map(float,b)) for b in boxes]
+    keys = list(keys)
+    for axis in range(3):
+        others = [a for a in range(3) if a != axis]
+        groups = {}
+        for b,k in zip(boxes,keys):
+            groups.setdefault((k,) + tuple(b[a] for a in others) + tuple(b[a+3] for a in others),[]).append(b)
+        boxes,keys = [],[]
+        for g,members in groups.items():
+            members.sort(key=lambda b: b[axis])
+            run = list(members[0])
+            for b in members[1:]:
+                if b[axis] == run[axis] + run[axis+3]:
+                    run[axis+3] += b[axis+3]
+                else:
+                    boxes.append(run)
+                    keys.append(g[0])
+                    run = list(b)
+            boxes.append(run)
+            keys.append(g[0])
+    return np.array(boxes).reshape(-1,6), keys
+
+
+
+class LayerIndex:
+
+    def __init__(self, boxes):
+        ''' z interval index of boxes ((n,6) x,y,z,dx,dy,dz), for layer queries without a scan of every box '''
+        boxes = np.asarray(boxes,dtype=float).reshape(-1,6)
+        self.order = np.argsort(boxes[:,2],kind='stable')
+        self.z0 = boxes[self.order,2]
+        self.z1 = self.z0 + boxes[self.order,5]
+        self.max_height = float(boxes[:,5].max()) if len(boxes) else 0.0
+
+
+    def query(self, z0, z1=None):
+        ''' indices of the boxes cutting the slice [z0, z1), z1=None : the boxes standing on z0 '''
+        if z1 is None:
+            lo = np.searchsorted(self.z0, z0, side='left')
+            hi = np.searchsorted(self.z0, z0, side='right')
+            return np.sort(self.order[lo:hi])
+        # a box starting before z0 - max_height ends before z0
+        lo = np.searchsorted(self.z0, z0 - self.max_height, side='right')
+        hi = np.searchsorted(self.z0, z1, side='left')
+        hit = self.z1[lo:hi] > z0
+        return np.sort(self.order[lo:hi][hit])
+
+
+    def levels(self):
+        ''' distinct bottom z of the boxes '''
+        return np.unique(self.z0)
+
+
+
+
+class Painter:
+
+    def __init__(self,bins):
+        ''' '''
+        self.items = bins.items
+        self.width = bins.width
+        self.height = bins.height
+        self.depth = bins.depth
+        # corner posts and obstacles, drawn as black boxes
+        self.static_boxes = getattr(bins, 'static_boxes', [])
+        # LayerIndex of the items, built on the first layer query
+        self.layer_index = None
+
+
+    def _plotCube(self, ax, x, y, z, dx, dy, dz, color='red',mode=2,linewidth=1,text="",fontsize=15,alpha=0.5):
+        """ Auxiliary function to plot a cube. code taken somewhere from the web.  """
+        xx = [x, x, x+dx, x+dx, x]
+        yy = [y, y+dy, y+dy, y, y]
+        
+        kwargs = {'alpha': 1, 'color': color,'linewidth':linewidth }
+        if mode == 1 :
+            ax.plot3D(xx, yy, [z]*5, **kwargs)
+            ax.plot3D(xx, yy, [z+dz]*5, **kwargs)
+            ax.plot3D([x, x], [y, y], [z, z+dz], **kwargs)
+            ax.plot3D([x, x], [y+dy, y+dy], [z, z+dz], **kwargs)
+            ax.plot3D([x+dx, x+dx], [y+dy, y+dy], [z, z+dz], **kwargs)
+            ax.plot3D([x+dx, x+dx], [y, y], [z, z+dz], **kwargs)
+        else :
+            p = Rectangle((x,y),dx,dy,fc=color,ec='black',alpha = alpha)
+            p2 = Rectangle((x,y),dx,dy,fc=color,ec='black',alpha = alpha)
+            p3 = Rectangle((y,z),dy,dz,fc=color,ec='black',alpha = alpha)
+            p4 = Rectangle((y,z),dy,dz,fc=color,ec='black',alpha = alpha)
+            p5 = Rectangle((x,z),dx,dz,fc=color,ec='black',alpha = alpha)
+            p6 = Rectangle((x,z),dx,dz,fc=color,ec='black',alpha = alpha)
+            ax.add_patch(p)
+            ax.add_patch(p2)
+            ax.add_patch(p3)
+            ax.add_patch(p4)
+            ax.add_patch(p5)
+            ax.add_patch(p6)
+            
+            if text != "":
+                ax.text( (x+ dx/2), (y+ dy/2), (z+ dz/2), str(text),color='black', fontsize=fontsize, ha='center', va='center')
+
+            art3d.pathpatch_2d_to_3d(p, z=z, zdir="z")
+            art3d.pathpatch_2d_to_3d(p2, z=z+dz, zdir="z")
+            art3d.pathpatch_2d_to_3d(p3, z=x, zdir="x")
+            art3d.pathpatch_2d_to_3d(p4, z=x + dx, zdir="x")
+            art3d.pathpatch_2d_to_3d(p5, z=y, zdir="y")
+            art3d.pathpatch_2d_to_3d(p6, z=y + dy, zdir="y")
+
+
+    def _plotCylinder(self, ax, x, y, z, dx, dy, dz, color='red',mode=2,text="",fontsize=10,alpha=0.2):
+        """ Auxiliary function to plot a Cylinder  """
+        # plot the two circles above and below the cylinder
+        p = Circle((x+dx/2,y+dy/2),radius=dx/2,color=color,alpha=0.5)
+        p2 = Circle((x+dx/2,y+dy/2),radius=dx/2,color=color,alpha=0.5)
+        ax.add_patch(p)
+        ax.add_patch(p2)
+        art3d.pathpatch_2d_to_3d(p, z=z, zdir="z")
+        art3d.pathpatch_2d_to_3d(p2, z=z+dz, zdir="z")
+        # plot a circle in the middle of the cylinder
+        center_z = np.linspace(0, dz, 10)
+        theta = np.linspace(0, 2*np.pi, 10)
+        theta_grid, z_grid=np.meshgrid(theta, center_z)
+        x_grid = dx / 2 * np.cos(theta_grid) + x + dx / 2
+        y_grid = dy / 2 * np.sin(theta_grid) + y + dy / 2
+        z_grid = z_grid + z
+        ax.plot_surface(x_grid, y_grid, z_grid,shade=False,fc=color,alpha=alpha,color=color)
+        if text != "" :
+            ax.text( (x+ dx/2), (y+ dy/2), (z+ dz/2), str(text),color='black', fontsize=fontsize, ha='center', va='center')
+
+    def plotBoxAndItems(self,title="",alpha=0.2,write_num=False,fontsize=10,batch=True,detail='full',layer=None,max_items=None,seed=0):
+        """ side effective. Plot the Bin and the items it contains.
+        batch : draw every face in one Poly3DCollection, False draws one patch per face.
+        detail : 'full', 'wireframe' (item outlines, mode=1) or 'merged' (touching same color cubes drawn as one block).
+        layer : z (items standing on it) or (z0, z1) slice, see layers().
+        max_items : above this count draw a random sample of max_items items (seed). """
+        fig = plt.figure()
+        axGlob = plt.axes(projection='3d')
+        self._plotBin(axGlob,title,alpha,write_num,fontsize,batch,detail,layer,max_items,seed)
+        return plt
+
+
+    def savePlot(self,path,title="",alpha=0.2,write_num=False,fontsize=10,batch=True,detail='full',layer=None,max_items=None,seed=0,dpi=100):
+        """ render on a headless Agg canvas and save to path, format from the extension (png, svg, pdf ...) """
+        fig = Figure()
+        axGlob = fig.add_subplot(projection='3d')
+        self._plotBin(axGlob,title,alpha,write_num,fontsize,batch,detail,layer,max_items,seed)
+        fig.savefig(path,dpi=dpi)
+        return fig
+
+
+    def layers(self):
+        """ distinct bottom z of the items, values for layer= """
+        return self._layerIndex().levels().tolist()
+
+
+    def selectItems(self, layer=None, max_items=None, seed=0):
+        """ items of a layer (z or (z0, z1)), sampled down to max_items """
+        items = self.items
+        if layer is not None:
+            z0, z1 = layer if isinstance(layer,(tuple,list)) else (layer,None)
+            items = [self.items[i] for i in self._layerIndex().query(float(z0), None if z1 is None else float(z1))]
+        if max_items is not None and len(items) > max_items:
+            keep = np.sort(np.random.default_rng(seed).choice(len(items),max_items,replace=False))
+            items = [items[i] for i in keep]
+        return items
+
+
+    def _layerIndex(self):
+        """ LayerIndex of the items, built once """
+        if self.layer_index is None:
+            self.layer_index = LayerIndex(self._itemBoxes(self.items))
+        return self.layer_index
+
+
+    def _plotBin(self,ax,title,alpha,write_num,fontsize,batch,detail='full',layer=None,max_items=None,seed=0):
+        """ bin outline, items and title on ax """
+        if detail not in ('full','wireframe','merged'):
+            raise ValueError("detail must be 'full', 'wireframe' or 'merged', got %r" % (detail,))
+        # plot bin 
+        self._plotCube(ax,0, 0, 0, float(self.width), float(self.height), float(self.depth),color='black',mode=1,linewidth=2,text="")
+        if self.static_boxes:
+            b = np.array(self.static_boxes, dtype=float)
+            self._plotCubeBoxes(ax,np.column_stack([b[:,0::2],b[:,1::2] - b[:,0::2]]),['#000000'] * len(b),alpha)
+        items = self.selectItems(layer,max_items,seed)
+
+        if detail == 'wireframe':
+            self._plotWireframe(ax,items,batch)
+        elif detail == 'merged':
+            cubes = [item for item in items if item.typeof == 'cube']
+            boxes, colors = mergeBoxes(self._itemBoxes(cubes),[item.color for item in cubes])
+            self._plotCubeBoxes(ax,boxes,colors,alpha)
+            self._plotItemsBatch(ax,[item for item in items if item.typeof != 'cube'],alpha,write_num,fontsize)
+        elif batch:
+            self._plotItemsBatch(ax,items,alpha,write_num,fontsize)
+        else:
+            # fit rotation type
+            for item in items:
+                x,y,z = item.position
+                [w,h,d] = item.getDimension()
+                color = item.color
+                text= item.partno if write_num else ""
+
+                if item.typeof == 'cube':
+                     # plot item of cube
+                    self._plotCube(ax, float(x), float(y), float(z), float(w),float(h),float(d),color=color,mode=2,text=text,fontsize=fontsize,alpha=alpha)
+                elif item.typeof == 'cylinder':
+                    # plot item of cylinder
+                    self._plotCylinder(ax, float(x), float(y), float(z), float(w),float(h),float(d),color=color,mode=2,text=text,fontsize=fontsize,alpha=alpha)
+
+        ax.set_title(title)
+        self.setAxesEqual(ax)
+
+
+    def _itemBoxes(self, items):
+        """ (n,6) array of x,y,z,dx,dy,dz of items """
+        if not items:
+            return np.zeros((0,6))
+        return np.array([[float(v) for v in item.position] + [float(v) for v in item.getDimension()] for item in items])
+
+
+    def _plotWireframe(self,ax,items,batch):
+        """ item outlines only, as _plotCube mode=1 """
+        if not batch:
+            for item in items:
+                x,y,z = item.position
+                w,h,d = item.getDimension()
+                self._plotCube(ax, float(x), float(y), float(z), float(w),float(h),float(d),color=item.color,mode=1)
+            return
+        if items:
+            colors = np.repeat(to_rgba_array([item.color for item in items]),12,axis=0)
+            ax.add_collection3d(art3d.Line3DCollection(cubeEdges(self._itemBoxes(items)),colors=colors,linewidths=1))
+
+
+    def _plotCubeBoxes(self,ax,boxes,colors,alpha):
+        """ cubes of (n,6) boxes in one Poly3DCollection """
+        if len(boxes):
+            faces = cubeFaces(boxes)
+            facecolors = np.repeat(to_rgba_array(colors,alpha),6,axis=0)
+            ax.add_collection3d(art3d.Poly3DCollection(faces,facecolors=facecolors,edgecolors=to_rgba('black',alpha),linewidths=1))
+
+
+    def _plotItemsBatch(self,ax,items,alpha,write_num,fontsize):
+        """ all cube faces in one Poly3DCollection, all cylinders in another, same colors as _plotCube / _plotCylinder """
+        cubes = [item for item in items if item.typeof == 'cube']
+        cylinders = [item for item in items if item.typeof == 'cylinder']
+
+        self._plotCubeBoxes(ax,self._itemBoxes(cubes),[item.color for item in cubes],alpha)
+        if cylinders:
+            caps, sides = cylinderFaces(self._itemBoxes(cylinders))
+            rgb = [item.color for item in cylinders]
+            cap_colors = np.repeat(to_rgba_array(rgb,0.5),2,axis=0)
+            side_colors = np.repeat(to_rgba_array(rgb,alpha),CYLINDER_SEGMENTS,axis=0)
+            ax.add_collection3d(art3d.Poly3DCollection(list(caps),facecolors=cap_colors,edgecolors='none'))
+            ax.add_collection3d(art3d.Poly3DCollection(sides,facecolors=side_colors,edgecolors='none'))
+
+        if write_num:
+            for item in items:
+                if item.typeof not in ('cube','cylinder'):
+                    continue
+                x,y,z = item.position
+                w,h,d = item.getDimension()
+                ax.text(float(x) + float(w)/2, float(y) + float(h)/2, float(z) + float(d)/2, str(item.partno),
+                        color='black', fontsize=fontsize, ha='center', va='center')
+
+
+    def setAxesEqual(self,ax):
+        '''Make axes of 3D plot have equal scale so that spheres appear as spheres,
+        cubes as cubes, etc..  This is one possible solution to Matplotlib's
+        ax.set_aspect('equal') and ax.axis('equal') not working for 3D.
+
+        Input
+        ax: a matplotlib axis, e.g., as output from plt.gca().'''
+        x_limits = ax.get_xlim3d()
+        y_limits = ax.get_ylim3d()
+        z_limits = ax.get_zlim3d()
+
+        x_range = abs(x_limits[1] - x_limits[0])
+        x_middle = np.mean(x_limits)
+        y_range = abs(y_limits[1] - y_limits[0])
+        y_middle = np.mean(y_limits)
+        z_range = abs(z_limits[1] - z_limits[0])
+        z_middle = np.mean(z_limits)
+
+        # The plot bounding box is a sphere in the sense of the infinity
+        # norm, hence I call half the max range the plot radius.
+        plot_radius = 0.5 * max([x_range, y_range, z_range])
+
+        ax.set_xlim3d([x_middle - plot_radius, x_middle + plot_radius])
+        ax.set_ylim3d([y_middle - plot_radius, y_middle + plot_radius])
+        ax.set_zlim3d([z_middle - plot_radius, z_middle + plot_radius])
+
@@ -0,0 +1,132 @@
+'''
+Cheapest set of bins for a list of items, with unlimited copies of every bin type.
+
+Best-first branch-and-bound over multisets of bin types (counts per type), cheapest first :
+    * a multiset is only packed when its volume and weight cover the items and every item
+      fits (dimensions and weight) in at least one of its types,
+    * the remaining volume and weight are priced at the cheapest cost per volume / per weight
+      of any type, which bounds the cost of every larger multiset from below,
+    * feasibility is a real pack (distribute_items=True) and is cached per multiset.
+The first multiset that packs every item is the cheapest one the packer can fill.
+Used through Packer.packCheapest.
+'''
+import copy
+import heapq
+
+
+def itemFits(item, bin):
+    ''' item fits the empty bin in at least one allowed rotation and by weight '''
+    if float(item.weight) > float(bin.max_weight):
+        return False
+    dims = [float(item.width), float(item.height), float(item.depth)]
+    space = [float(bin.width), float(bin.height), float(bin.depth)]
+    if item.updown:
+        return all(a <= b for a, b in zip(sorted(dims), sorted(space)))
+    # depth stays vertical
+    if dims[2] > space[2]:
+        return False
+    return (dims[0] <= space[0] and dims[1] <= space[1]) or (dims[1] <= space[0] and dims[0] <= space[1])
+
+
+
+class BinSelection:
+
+    def __init__(self, types, items, pack_kwargs=None, max_bins=None, max_checks=50, max_nodes=100000):
+        '''
+        types : Bin objects used as templates, cost from bin.cost.
+        max_bins : most bins in a multiset, default one per item. max_checks : most packs tried.
+        '''
+        self.types = list(types)
+        self.pack_kwargs = dict(pack_kwargs or {})
+        self.max_checks = max_checks
+        self.max_nodes = max_nodes
+        self.cost = [float(t.cost) for t in self.types]
+        self.volume = [float(t.getVolume()) for t in self.types]
+        self.weight = [float(t.max_weight) for t in self.types]
+
+        # items no type can hold are left out of the search
+        self.items, self.unfittable = [], []
+        masks = set()
+        for item in items:
+            mask = 0
+            for j, t in enumerate(self.types):
+                if itemFits(item, t):
+                    mask |= 1 << j
+            if mask:
+                self.items.append(item)
+                masks.add(mask)
+            else:
+                self.unfittable.append(item)
+        self.masks = masks
+        self.item_volume = sum(float(item.getVolume()) for item in self.items)
+        self.item_weight = sum(float(item.weight) for item in self.items)
+        self.max_bins = max_bins if max_bins is not None else len(self.items)
+        # cheapest price of a unit of volume / weight
+        self.volume_price = min([c / v for c, v in zip(self.cost, self.volume) if v > 0] or [0])
+        self.weight_price = min([c / w for c, w in zip(self.cost, self.weight) if w > 0] or [0])
+        # counts -> (unfit count, packer)
+        self.cache = {}
+        self.checks = 0
+        self.nodes = 0
+
+
+    def lowerBound(self, counts):
+        ''' least extra cost needed to cover the volume and weight still missing '''
+        volume = sum(n * v for n, v in zip(counts, self.volume))
+        weight = sum(n * w for n, w in zip(counts, self.weight))
+        return max(0, (self.item_volume - volume) * self.volume_price, (self.item_weight - weight) * self.weight_price)
+
+
+    def covers(self, counts):
+        ''' volume, weight and every item's fitting types are covered '''
+        volume = sum(n * v for n, v in zip(counts, self.volume))
+        weight = sum(n * w for n, w in zip(counts, self.weight))
+        if volume < self.item_volume or weight < self.item_weight:
+            return False
+        used = 0
+        for j, n in enumerate(counts):
+            if n:
+                used |= 1 << j
+        return all(mask & used for mask in self.masks)
+
+
+    def check(self, counts):
+        ''' pack the items into that multiset, cached '''
+        if counts not in self.cache:
+            from .main import Packer
+            packer = Packer()
+            for j, n in enumerate(counts):
+                for k in range(n):
+                    b = copy.deepcopy(self.types[j])
+                    b.partno = '{}-{}'.format(self.types[j].partno, k + 1)
+                    packer.addBin(b)
+            for item in self.items:
+                packer.addItem(copy.deepcopy(item))
+            packer.pack(distribute_items=True, **self.pack_kwargs)
+            self.checks += 1
+            self.cache[counts] = (len(packer.unfit_items), packer)
+        return self.cache[counts][0]
+
+
+    def solve(self):
+        ''' (counts, packer) of the cheapest feasible multiset, else of the one with the fewest unfit items, None if nothing was packed '''
+        if not self.items:
+            return None
+        start = tuple([0] * len(self.types))
+        # (cost + bound, bins, cost, counts, first type index a child may add)
+        heap = [(self.lowerBound(start), 0, 0.0, start, 0)]
+        while heap and self.checks < self.max_checks and self.nodes < self.max_nodes:
+            _, bins, cost, counts, first = heapq.heappop(heap)
+            self.nodes += 1
+            if self.covers(counts) and self.check(counts) == 0:
+                return counts, self.cache[counts][1]
+            if bins >= self.max_bins:
+                continue
+            for j in range(first, len(self.types)):
+                child = counts[:j] + (counts[j] + 1,) + counts[j + 1:]
+                child_cost = cost + self.cost[j]
+                heapq.heappush(heap, (child_cost + self.lowerBound(child), bins + 1, child_cost, child, j))
+        if not self.cache:
+            return None
+        counts = min(self.cache, key=lambda c : (self.cache[c][0], sum(n * k for n, k in zip(c, self.cost))))
+        return counts, self.cache[counts][1]
@@ -0,0 +1,123 @@
+'''
+Loading sequence of a packed bin, used by Packer.putOrder.
+
+A box may only be put once
+    * every box it rests on is in place (gravity),
+    * and it is not blocked : the boxes touching it on the access side come after it,
+      the door side (x + w) for a general container (put_type 1), the top for an open top one (put_type 2).
+Boxes in contact are found per contact plane (z for support, x for the door) with vectorized
+overlap tests, and the order is the topological order of that precedence graph that stays closest
+to the old three sorts : x, z, y for put_type 1 and z, y, x for put_type 2. When those sorts already
+respect every precedence the order is the same.
+put_type 0 (no access side) only has the support precedences and stays closest to the packing order.
+'''
+import heapq
+
+import numpy as np
+
+# put_type -> columns of the box array compared in order, [x0,x1,y0,y1,z0,z1], none : packing order
+ORDER_KEYS = {
+    0 : (),
+    1 : (0, 4, 2),
+    2 : (4, 2, 0),
+}
+# decimals kept when matching faces, positions are rounded to the pack's number_of_decimals anyway
+PLANE_DECIMALS = 6
+
+
+def itemBoxes(items):
+    ''' float [x0,x1,y0,y1,z0,z1] rows of the items '''
+    boxes = np.zeros((len(items), 6))
+    for i, item in enumerate(items):
+        w, h, d = item.getDimension()
+        x, y, z = item.position
+        boxes[i] = [x, x + w, y, y + h, z, z + d]
+    return boxes
+
+
+def contacts(boxes, axis):
+    '''
+    (lower, upper) index arrays of boxes touching across a plane normal to axis (0 x, 1 y, 2 z) :
+    upper starts where lower ends, and their faces overlap with a positive area.
+    '''
+    lo, hi = 2 * axis, 2 * axis + 1
+    a, b = [(k, k + 1) for k in range(0, 6, 2) if k != lo]
+    ends = np.round(boxes[:, hi], PLANE_DECIMALS)
+    starts = np.round(boxes[:, lo], PLANE_DECIMALS)
+    # boxes grouped by the plane they end on / start from
+    end_order = np.argsort(ends, kind='stable')
+    start_order = np.argsort(starts, kind='stable')
+    planes, end_at = np.unique(ends[end_order], return_index=True)
+    end_at = np.append(end_at, len(end_order))
+    first = np.searchsorted(starts[start_order], planes, side='left')
+    last = np.searchsorted(starts[start_order], planes, side='right')
+    lower, upper = [], []
+    for p in range(len(planes)):
+        if first[p] == last[p]:
+            continue
+        below = end_order[end_at[p]:end_at[p + 1]]
+        above = start_order[first[p]:last[p]]
+        B, A = boxes[below], boxes[above]
+        # overlap along the first face axis, then the second one on those pairs only
+        i, j = np.nonzero((B[:, None, a[0]] < A[None, :, a[1]]) & (A[None, :, a[0]] < B[:, None, a[1]]))
+        keep = (B[i, b[0]] < A[j, b[1]]) & (A[j, b[0]] < B[i, b[1]])
+        lower.append(below[i[keep]])
+        upper.append(above[j[keep]])
+    if not lower:
+        return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+    return np.concatenate(lower), np.concatenate(upper)
+
+
+def precedence(boxes, put_type):
+    ''' (before, after) index arrays : support edges, plus door edges for put_type 1 '''
+    before, after = contacts(boxes, 2)
+    if put_type == 1:
+        # the box on the door side of another one is put after it
+        b, a = contacts(boxes, 0)
+        before, after = np.concatenate([before, b]), np.concatenate([after, a])
+    return before, after
+
+
+def loadOrder(items, put_type):
+    '''
+    indexes of items in loading order. A cycle of precedences (possible without check_stable) is
+    broken by taking the first remaining box of the sort order.
+    '''
+    n = len(items)
+    if n == 0 or put_type not in ORDER_KEYS:
+        return list(range(n))
+    boxes = itemBoxes(items)
+    keys = ORDER_KEYS[put_type]
+    # rank of every box in the old sort order, ties keep the current order
+    rank = np.empty(n, dtype=int)
+    rank[np.lexsort([np.arange(n)] + [np.round(boxes[:, k], PLANE_DECIMALS) for k in reversed(keys)])] = np.arange(n)
+
+    before, after = precedence(boxes, put_type)
+    indegree = np.bincount(after, minlength=n).tolist()
+    successors = [[] for _ in range(n)]
+    for i, j in zip(before.tolist(), after.tolist()):
+        successors[i].append(j)
+    rank = rank.tolist()
+
+    heap = [(rank[i], i) for i in range(n) if indegree[i] == 0]
+    heapq.heapify(heap)
+    done = [False] * n
+    order = []
+    # boxes left in sort order, to break cycles
+    pending = sorted(range(n), key=lambda i : rank[i])
+    cursor = 0
+    while len(order) < n:
+        if not heap:
+            while done[pending[cursor]]:
+                cursor += 1
+            heap.append((rank[pending[cursor]], pending[cursor]))
+        _, i = heapq.heappop(heap)
+        if done[i]:
+            continue
+        done[i] = True
+        order.append(i)
+        for j in successors[i]:
+            indegree[j] -= 1
+            if indegree[j] == 0 and not done[j]:
+                heapq.heappush(heap, (rank[j], j))
+    return order
@@ -0,0 +1,309 @@
+'''
+Result serialization straight from bin state, shared by the examples and api.py.
+
+Records are written from precompiled format strings, no dict is built per item, and
+Decimal / numpy values are written natively.
+
+    writeJSON(fp, bins)                     {"bins" : [{"box" : [...], "fitItem" : [...], "unfitItem" : [...]}]}
+    writeNDJSON(fp, bins)                   one placed item per line, with its bin
+    writePalletStack(fp, bin, ...)          robot pallet_stack schema (grasp points, layer ids, rotation flags)
+    dump(obj, fp) / dumps(obj)              any json-like value, RawJSON is written verbatim
+
+fp is anything with a write(str) method, e.g. a file or socket.makefile('w').
+Output is written in blocks of about BLOCK_SIZE characters.
+'''
+import json
+import math
+import re
+from decimal import Decimal
+
+import numpy as np
+
+BLOCK_SIZE = 1 << 16
+
+_encode_string = json.encoder.encode_basestring
+
+
+class RawJSON(str):
+    ''' already encoded json, dump() writes it as is '''
+
+
+
+def number(v):
+    ''' json text of an int, float, Decimal or numpy number '''
+    if isinstance(v, bool):
+        return 'true' if v else 'false'
+    if isinstance(v, (int, np.integer)):
+        return str(int(v))
+    v = float(v)
+    if math.isfinite(v):
+        return repr(v)
+    return 'NaN' if v != v else ('Infinity' if v > 0 else '-Infinity')
+
+
+def value(v):
+    ''' json text of a scalar '''
+    if v is None:
+        return 'null'
+    if isinstance(v, str):
+        return v if isinstance(v, RawJSON) else _encode_string(v)
+    return number(v)
+
+
+class _Writer:
+
+    def __init__(self, fp, block_size=BLOCK_SIZE):
+        ''' buffers small strings and writes them to fp in blocks '''
+        self.fp = fp
+        self.block_size = block_size
+        self.parts = []
+        self.size = 0
+
+
+    def write(self, s):
+        ''' '''
+        self.parts.append(s)
+        self.size += len(s)
+        if self.size >= self.block_size:
+            self.flush()
+
+
+    def flush(self):
+        ''' '''
+        if self.parts:
+            self.fp.write(''.join(self.parts))
+        self.parts = []
+        self.size = 0
+
+
+
+class Template:
+
+    _SLOT = re.compile(r'"@@(\w+)@@"')
+
+    def __init__(self, layout, indent=None, level=0):
+        '''
+        format string of one json object. layout is the object with every value replaced by
+        '@name' (a slot), nested dicts and lists of slots keep their shape.
+        level : nesting depth of the object in the document, for indent.
+        '''
+        marked = self._mark(layout)
+        text = json.dumps(marked, indent=indent, separators=(',', ':') if indent is None else (',', ': '))
+        if indent is not None and level:
+            text = text.replace('\n', '\n' + ' ' * (indent * level))
+        # slot names in output order
+        self.slots = tuple(self._SLOT.findall(text))
+        self.text = self._SLOT.sub('%s', text.replace('%', '%%'))
+
+
+    def _mark(self, layout):
+        ''' '''
+        if isinstance(layout, dict):
+            return {k : self._mark(v) for k, v in layout.items()}
+        if isinstance(layout, list):
+            return [self._mark(v) for v in layout]
+        return '@@%s@@' % layout.lstrip('@')
+
+
+    def format(self, values):
+        ''' values : json texts in slot order '''
+        return self.text % values
+
+
+
+# makeDictItem of api.py
+ITEM_LAYOUT = {
+    'partNumber' : '@partno', 'name' : '@name', 'type' : '@type', 'color' : '@color',
+    'position' : ['@x', '@y', '@z'], 'rotationType' : '@rotation',
+    'WHD' : ['@w', '@h', '@d'], 'weight' : '@weight',
+}
+# makeDictBox of api.py
+BOX_LAYOUT = {
+    'partNumber' : '@partno', 'position' : ['@x', '@y', '@z'], 'WHD' : ['@w', '@h', '@d'],
+    'weight' : '@weight', 'gravity' : '@gravity',
+}
+# one NDJSON line
+PLACEMENT_LAYOUT = dict({'bin' : '@bin'}, **ITEM_LAYOUT)
+# robot pallet_stack
+PALLET_LAYOUT = {
+    'box_id' : '@box_id',
+    'dimensions' : {'height' : '@height', 'length' : '@length', 'width' : '@width'},
+    'grasp_offset' : {'dx' : '@dx', 'dy' : '@dy', 'dz' : '@dz'},
+    'grasp_point' : {'x' : '@x', 'y' : '@y', 'z' : '@z'},
+    'layer_id' : '@layer_id',
+    'rotated' : '@rotated',
+    'rotation' : '@rotation',
+}
+
+_templates = {}
+
+
+def template(layout, indent=None, level=0):
+    ''' cached Template '''
+    key = (id(layout), indent, level)
+    if key not in _templates:
+        _templates[key] = Template(layout, indent, level)
+    return _templates[key]
+
+
+def _itemValues(item):
+    ''' ITEM_LAYOUT values of item : center position and rotated WHD as ints, like api.makeDictItem '''
+    w, h, d = int(item.width), int(item.height), int(item.depth)
+    rt = item.rotation_type
+    if rt == 0:
+        whd = (w, h, d)
+    elif rt == 1:
+        whd = (h, w, d)
+    elif rt == 2:
+        whd = (h, d, w)
+    elif rt == 3:
+        whd = (d, h, w)
+    elif rt == 4:
+        whd = (d, w, h)
+    else:
+        whd = (w, d, h)
+    x, y, z = item.position
+    return (value(item.partno), value(item.name), value(item.typeof), value(item.color),
+            str(int(x) + whd[0] // 2), str(int(y) + whd[1] // 2), str(int(z) + whd[2] // 2),
+            str(rt), str(whd[0]), str(whd[1]), str(whd[2]), str(int(item.weight)))
+
+
+def itemJSON(item, indent=None, level=0):
+    ''' api.makeDictItem shape as json text '''
+    return template(ITEM_LAYOUT, indent, level).format(_itemValues(item))
+
+
+def itemsJSON(items, indent=None, level=0):
+    ''' json array of itemJSON '''
+    if not items:
+        return '[]'
+    t = template(ITEM_LAYOUT, indent, level + 1)
+    if indent is None:
+        return '[' + ','.join([t.format(_itemValues(item)) for item in items]) + ']'
+    pad = '\n' + ' ' * (indent * (level + 1))
+    return '[' + pad + (',' + pad).join([t.format(_itemValues(item)) for item in items]) + '\n' + ' ' * (indent * level) + ']'
+
+
+def boxJSON(bin, indent=None, level=0):
+    ''' api.makeDictBox shape (one object, not wrapped in a list) as json text '''
+    w, h, d = int(bin.width), int(bin.height), int(bin.depth)
+    gravity = '[' + ','.join(number(g) for g in bin.gravity) + ']'
+    return template(BOX_LAYOUT, indent, level).format(
+        (value(bin.partno), number(w / 2), number(h / 2), number(d / 2), str(w), str(h), str(d), str(int(bin.max_weight)), gravity))
+
+
+def writeJSON(fp, bins, unfit=True, indent=None):
+    ''' {"bins" : [{"box" : [box], "fitItem" : [...], "unfitItem" : [...]}, ...]}, bins can be any iterable (e.g. Packer.packIter) '''
+    out = _Writer(fp)
+    nl = '' if indent is None else '\n'
+    colon = ':' if indent is None else ': '
+    pad = lambda level : '' if indent is None else ' ' * (indent * level)
+    out.write('{' + nl + pad(1) + '"bins"' + colon + '[')
+    for n, bin in enumerate(bins):
+        out.write((',' if n else '') + nl + pad(2) + '{' + nl)
+        out.write(pad(3) + '"box"' + colon + '[' + nl + pad(4) + boxJSON(bin, indent, 4) + nl + pad(3) + ']')
+        out.write(',' + nl + pad(3) + '"fitItem"' + colon + itemsJSON(bin.items, indent, 3))
+        if unfit:
+            out.write(',' + nl + pad(3) + '"unfitItem"' + colon + itemsJSON(bin.unfitted_items, indent, 3))
+        out.write(nl + pad(2) + '}')
+    out.write(nl + pad(1) + ']' + nl + '}' if indent is not None else ']}')
+    out.flush()
+
+
+def writeNDJSON(fp, bins):
+    ''' one line per placed item : {"bin" : partno, ...api.makeDictItem} '''
+    out = _Writer(fp)
+    t = template(PLACEMENT_LAYOUT)
+    for bin in bins:
+        partno = value(bin.partno)
+        for item in bin.items:
+            out.write(t.format((partno,) + _itemValues(item)) + '\n')
+    out.flush()
+
+
+def palletStackValues(bin, layer_height=None, reference=None):
+    '''
+    PALLET_LAYOUT values of every item of bin.
+    layer_id : z // layer_height, or the rank of the item's z among the distinct z of the bin.
+    rotated : footprint (length, width) differs from reference (W, H), or rotation_type != 0 without reference.
+    rotation : layer_id % 2, the crossed pattern alternates the layers like example_monosku_crossed did.
+    grasp_point is the center of the box, grasp_offset is 0.
+    '''
+    if layer_height is None:
+        levels = {z : i for i, z in enumerate(sorted(set(float(item.position[2]) for item in bin.items)))}
+    zero = '0'
+    for i, item in enumerate(bin.items):
+        l, w, h = (float(v) for v in item.getDimension())
+        x, y, z = (float(v) for v in item.position)
+        layer_id = int(z // layer_height) if layer_height is not None else levels[z]
+        if reference is not None:
+            rotated = (round(l), round(w)) != (round(reference[0]), round(reference[1]))
+        else:
+            rotated = item.rotation_type != 0
+        yield (str(i), repr(h), repr(l), repr(w), zero, zero, zero,
+               repr(x + l / 2), repr(y + w / 2), repr(z + h / 2),
+               str(layer_id), 'true' if rotated else 'false', str(layer_id % 2))
+
+
+def writePalletStack(fp, bin, layer_height=None, reference=None, indent=None):
+    ''' {"pallet_stack" : [...]} of bin, see palletStackValues '''
+    out = _Writer(fp)
+    t = template(PALLET_LAYOUT, indent, 2)
+    if indent is None:
+        out.write('{"pallet_stack":[')
+        pad = ''
+    else:
+        pad = '\n' + ' ' * (indent * 2)
+        out.write('{\n' + ' ' * indent + '"pallet_stack": [')
+    first = True
+    for values in palletStackValues(bin, layer_height, reference):
+        out.write(('' if first else ',') + pad + t.format(values))
+        first = False
+    if indent is None:
+        out.write(']}')
+    elif first:
+        out.write(']\n}')
+    else:
+        out.write('\n' + ' ' * indent + ']\n}')
+    out.flush()
+
+
+def dump(obj, fp):
+    ''' compact json of obj to fp : dict, list, tuple, str, numbers (Decimal, numpy), numpy arrays, RawJSON '''
+    out = _Writer(fp)
+    _dump(obj, out.write)
+    out.flush()
+
+
+def dumps(obj):
+    ''' '''
+    parts = []
+    _dump(obj, parts.append)
+    return ''.join(parts)
+
+
+def _dump(obj, write):
+    ''' '''
+    if isinstance(obj, dict):
+        write('{')
+        first = True
+        for k, v in obj.items():
+            write(('' if first else ',') + _encode_string(str(k)) + ':')
+            _dump(v, write)
+            first = False
+        write('}')
+    elif isinstance(obj, (list, tuple)):
+        write('[')
+        for n, v in enumerate(obj):
+            if n:
+                write(',')
+            _dump(v, write)
+        write(']')
+    elif isinstance(obj, np.ndarray):
+        write(json.dumps(obj.tolist(), separators=(',', ':')))
+    elif isinstance(obj, (bool, np.bool_)):
+        write('true' if obj else 'false')
+    elif obj is None or isinstance(obj, (str, int, float, Decimal, np.number)):
+        write(value(obj))
+    else:
+        raise TypeError('Object of type {} is not JSON serializable'.format(type(obj).__name__))
@@ -0,0 +1,49 @@
+import time
+
+
+class PackStats:
+
+    # counters updated in Packer.pack, Packer.pack2Bin and Bin.putItem
+    COUNTERS = (
+        'items',                  # items handed to pack2Bin
+        'placed',                 # items put in a bin
+        'pivots',                 # pivots tried
+        'rotations',              # rotations tried on a pivot
+        'collision_tests',        # intersect() calls
+        'fix_point_iterations',   # passes of Bin.dropItem until nothing moves
+        'stability_rejections',   # rejected by check_stable
+        'weight_rejections',      # rejected by max_weight
+        'loadbear_rejections',    # rejected by check_loadbear
+        'early_rejections',       # rejected by Bin.canHold or a closed bin, no pivot tried
+    )
+
+    def __init__(self):
+        ''' counters and per phase timers of one pack, enable with Packer.pack(stats=True) '''
+        for name in self.COUNTERS:
+            setattr(self, name, 0)
+        # phase -> seconds
+        self.timers = {}
+        # bytes, set when the pack ends (see main.peakMemory)
+        self.peak_memory = None
+
+
+    def addTime(self, phase, start):
+        ''' add the time since start (time.perf_counter) to phase, return now '''
+        now = time.perf_counter()
+        self.timers[phase] = self.timers.get(phase, 0) + now - start
+        return now
+
+
+    def asDict(self):
+        ''' '''
+        r = {name : getattr(self, name) for name in self.COUNTERS}
+        r['timers'] = dict(self.timers)
+        r['peak_memory'] = self.peak_memory
+        return r
+
+
+    def string(self):
+        ''' '''
+        counters = ' '.join('%s=%s' % (name, getattr(self, name)) for name in self.COUNTERS)
+        timers = ' '.join('%s=%.4fs' % (k, v) for k, v in self.timers.items())
+        return "PackStats(%s | %s | peak_memory=%s)" % (counters, timers, self.peak_memory)
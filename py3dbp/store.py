@@ -0,0 +1,369 @@
+'''
+Binary store of packed bins, read back with np.memmap and no parsing.
+
+File layout (append-only, one segment per bin) :
+    b'P3DSTORE'
+    per bin : uint64 header length + uint64 record count + json header padded to 8 bytes
+              + records of RESULT_DTYPE (little-endian), one per placed item
+
+The header holds the bin (partno, WHD, max_weight, gravity) and the string tables the records
+point to : 'partnos' (record field item) and 'skus' [name, typeof, color] (record field sku).
+A segment cut short by a crash is ignored by the reader and replaced by the next append.
+
+    appendBin('day.p3dstore', bin)               add a bin, the file is created if needed
+    store = ResultStore('day.p3dstore')
+    store[0].records['position']                 (n,3) memmap
+    store[0].toDict()                            api rows shape (box / fitItem)
+    fromDict(json.load(f)) / fromPalletStack(..) records of the existing JSON shapes
+
+    python -m py3dbp.store info day.p3dstore
+    python -m py3dbp.store json day.p3dstore --bin 0
+    python -m py3dbp.store import result.json day.p3dstore
+'''
+import argparse
+import json
+import os
+import struct
+
+import numpy as np
+
+from .serialize import RawJSON, dumps, itemsJSON
+
+MAGIC = b'P3DSTORE'
+VERSION = 1
+
+RESULT_DTYPE = np.dtype([
+    ('item','<u4'),             # index into header['partnos']
+    ('sku','<u4'),              # index into header['skus']
+    ('position','<f8',(3,)),    # corner, as Item.position
+    ('rotation','u1'),          # Item.rotation_type
+    ('layer','<u2'),
+    ('dims','<f8',(3,)),        # rotated, as Item.getDimension()
+    ('weight','<f8'),
+])
+
+_SEGMENT = struct.Struct('<QQ')
+
+
+def layerIds(z, layer_height=None):
+    ''' layer of every z : z // layer_height, or the rank of z among the distinct values '''
+    z = np.asarray(z, dtype=float)
+    if layer_height is not None:
+        return (z // layer_height).astype(np.int64)
+    return np.unique(z, return_inverse=True)[1].reshape(-1)
+
+
+def binRecords(bin, layer_height=None):
+    ''' (header, records) of a packed bin '''
+    items = bin.items
+    records = np.zeros(len(items), dtype=RESULT_DTYPE)
+    skus, sku_index = [], {}
+    for i, item in enumerate(items):
+        key = (item.name, item.typeof, item.color)
+        if key not in sku_index:
+            sku_index[key] = len(skus)
+            skus.append(list(key))
+        records[i]['item'] = i
+        records[i]['sku'] = sku_index[key]
+        records[i]['position'] = [float(v) for v in item.position]
+        records[i]['rotation'] = item.rotation_type
+        records[i]['dims'] = [float(v) for v in item.getDimension()]
+        records[i]['weight'] = float(item.weight)
+    records['layer'] = layerIds(records['position'][:, 2], layer_height)
+    header = {
+        'version' : VERSION,
+        'partno' : bin.partno,
+        'WHD' : [float(bin.width), float(bin.height), float(bin.depth)],
+        'max_weight' : float(bin.max_weight),
+        'gravity' : [float(g) for g in bin.gravity],
+        'partnos' : [str(item.partno) for item in items],
+        'skus' : skus,
+    }
+    return header, records
+
+
+def appendRecords(path, header, records):
+    ''' append one segment, the file is created with its magic if it does not exist '''
+    records = np.ascontiguousarray(records, dtype=RESULT_DTYPE)
+    js = json.dumps(header).encode('utf-8')
+    js += b' ' * (-len(js) % 8)
+    ok = _validSize(path) if os.path.exists(path) else None
+    with open(path, 'r+b' if ok is not None else 'wb') as f:
+        if ok is None:
+            f.write(MAGIC)
+        else:
+            # drop a segment left half written
+            f.truncate(ok)
+            f.seek(ok)
+        f.write(_SEGMENT.pack(len(js), len(records)) + js)
+        f.write(records.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def appendBin(path, bin, layer_height=None):
+    ''' append a packed bin to the store at path '''
+    header, records = binRecords(bin, layer_height)
+    appendRecords(path, header, records)
+
+
+def _segments(path):
+    ''' (header, record offset, record count) of every complete segment, and the size they cover '''
+    size = os.path.getsize(path)
+    segments = []
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError('{} is not a py3dbp result store'.format(path))
+        offset = len(MAGIC)
+        while offset + _SEGMENT.size <= size:
+            n, count = _SEGMENT.unpack(f.read(_SEGMENT.size))
+            start = offset + _SEGMENT.size + n
+            end = start + count * RESULT_DTYPE.itemsize
+            if end > size:
+                break
+            header = json.loads(f.read(n))
+            segments.append((header, start, count))
+            f.seek(end)
+            offset = end
+    return segments, offset
+
+
+def _validSize(path):
+    ''' '''
+    return _segments(path)[1]
+
+
+
+class StoredBin:
+
+    def __init__(self, header, records):
+        ''' one bin of a ResultStore : header dict and records (memmap of RESULT_DTYPE) '''
+        self.header = header
+        self.records = records
+
+
+    def __len__(self):
+        return len(self.records)
+
+
+    def partno(self, i):
+        ''' partno of record i '''
+        return self.header['partnos'][int(self.records[i]['item'])]
+
+
+    def itemsJSON(self):
+        ''' fitItem rows (api shape) as json text '''
+        return itemsJSON(_RecordItems(self))
+
+
+    def toDict(self):
+        ''' api rows shape : {"box" : [...], "fitItem" : [...]} '''
+        w, h, d = self.header['WHD']
+        box = {
+            'partNumber' : self.header['partno'],
+            'position' : [int(w) / 2, int(h) / 2, int(d) / 2],
+            'WHD' : [int(w), int(h), int(d)],
+            'weight' : int(self.header['max_weight']),
+            'gravity' : self.header['gravity'],
+        }
+        return json.loads(dumps({'box' : [box], 'fitItem' : RawJSON(self.itemsJSON())}))
+
+
+    def toPalletStack(self):
+        ''' pallet_stack rows, as py3dbp.serialize.writePalletStack without reference '''
+        r = self.records
+        stack = []
+        for i in range(len(r)):
+            l, w, h = (float(v) for v in r['dims'][i])
+            x, y, z = (float(v) for v in r['position'][i])
+            stack.append({
+                'box_id' : i,
+                'dimensions' : {'height' : h, 'length' : l, 'width' : w},
+                'grasp_offset' : {'dx' : 0, 'dy' : 0, 'dz' : 0},
+                'grasp_point' : {'x' : x + l / 2, 'y' : y + w / 2, 'z' : z + h / 2},
+                'layer_id' : int(r['layer'][i]),
+                'rotated' : bool(r['rotation'][i] != 0),
+                'rotation' : 0 if l >= w else 1,
+            })
+        return {'pallet_stack' : stack}
+
+
+
+class _RecordItems:
+
+    def __init__(self, stored):
+        ''' records of a StoredBin seen as Items, for py3dbp.serialize '''
+        self.stored = stored
+
+
+    def __len__(self):
+        return len(self.stored)
+
+
+    def __iter__(self):
+        header, r = self.stored.header, self.stored.records
+        for i in range(len(r)):
+            name, typeof, color = header['skus'][int(r['sku'][i])]
+            yield _RecordItem(header['partnos'][int(r['item'][i])], name, typeof, color,
+                              r['position'][i].tolist(), int(r['rotation'][i]), r['dims'][i].tolist(), float(r['weight'][i]))
+
+
+
+class _RecordItem:
+
+    def __init__(self, partno, name, typeof, color, position, rotation_type, dims, weight):
+        ''' an Item with rotation already applied : width, height, depth are set so that rotation_type gives back dims '''
+        self.partno = partno
+        self.name = name
+        self.typeof = typeof
+        self.color = color
+        self.position = position
+        self.rotation_type = rotation_type
+        self.weight = weight
+        self.width, self.height, self.depth = _unrotate(dims, rotation_type)
+
+
+
+def _unrotate(dims, rotation_type):
+    ''' WHD of an item whose getDimension() is dims under rotation_type '''
+    a, b, c = dims
+    if rotation_type == 0:
+        return a, b, c
+    elif rotation_type == 1:
+        return b, a, c
+    elif rotation_type == 2:
+        return c, a, b
+    elif rotation_type == 3:
+        return c, b, a
+    elif rotation_type == 4:
+        return b, c, a
+    return a, c, b
+
+
+
+class ResultStore:
+
+    def __init__(self, path):
+        ''' read-only view of a store file, records are memory-mapped on access '''
+        self.path = path
+        self.segments, self.size = _segments(path)
+
+
+    def __len__(self):
+        return len(self.segments)
+
+
+    def __getitem__(self, i):
+        header, offset, count = self.segments[i]
+        if count:
+            records = np.memmap(self.path, dtype=RESULT_DTYPE, mode='r', offset=offset, shape=(count,))
+        else:
+            records = np.zeros(0, dtype=RESULT_DTYPE)
+        return StoredBin(header, records)
+
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+    def find(self, partno):
+        ''' indices of the bins with that partno '''
+        return [i for i, (header, _, _) in enumerate(self.segments) if header['partno'] == partno]
+
+
+
+def fromDict(data, layer_height=None):
+    '''
+    (header, records) of an api result in rows shape ({"box" : [...], "fitItem" : [...]}).
+    Positions there are centers rounded down, the corner is center - WHD // 2.
+    '''
+    box = data['box'][0]
+    rows = data['fitItem']
+    records = np.zeros(len(rows), dtype=RESULT_DTYPE)
+    skus, sku_index = [], {}
+    for i, row in enumerate(rows):
+        key = (row['name'], row['type'], row['color'])
+        if key not in sku_index:
+            sku_index[key] = len(skus)
+            skus.append(list(key))
+        whd = [int(v) for v in row['WHD']]
+        records[i]['item'] = i
+        records[i]['sku'] = sku_index[key]
+        records[i]['position'] = [int(c) - v // 2 for c, v in zip(row['position'], whd)]
+        records[i]['rotation'] = row['rotationType']
+        records[i]['dims'] = whd
+        records[i]['weight'] = row['weight']
+    records['layer'] = layerIds(records['position'][:, 2], layer_height)
+    header = {
+        'version' : VERSION,
+        'partno' : box['partNumber'],
+        'WHD' : [float(v) for v in box['WHD']],
+        'max_weight' : float(box['weight']),
+        'gravity' : box.get('gravity', []),
+        'partnos' : [str(row['partNumber']) for row in rows],
+        'skus' : skus,
+    }
+    return header, records
+
+
+def fromPalletStack(data, partno='pallet', WHD=(0, 0, 0), max_weight=0):
+    ''' (header, records) of a pallet_stack document, the pallet itself is not in that schema '''
+    rows = data['pallet_stack']
+    records = np.zeros(len(rows), dtype=RESULT_DTYPE)
+    for i, row in enumerate(rows):
+        d, g = row['dimensions'], row['grasp_point']
+        dims = [d['length'], d['width'], d['height']]
+        records[i]['item'] = i
+        records[i]['position'] = [g['x'] - dims[0] / 2, g['y'] - dims[1] / 2, g['z'] - dims[2] / 2]
+        records[i]['rotation'] = 1 if row.get('rotated') else 0
+        records[i]['layer'] = row.get('layer_id', 0)
+        records[i]['dims'] = dims
+    header = {
+        'version' : VERSION,
+        'partno' : partno,
+        'WHD' : [float(v) for v in WHD],
+        'max_weight' : float(max_weight),
+        'gravity' : [],
+        'partnos' : [str(row['box_id']) for row in rows],
+        'skus' : [['box', 'cube', 'skyblue']],
+    }
+    return header, records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='inspect py3dbp result stores')
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    p = sub.add_parser('info')
+    p.add_argument('path')
+    p = sub.add_parser('json')
+    p.add_argument('path')
+    p.add_argument('--bin', type=int, default=0)
+    p.add_argument('--pallet-stack', action='store_true')
+    p = sub.add_parser('import', help='append a json result (api rows shape or pallet_stack) to a store')
+    p.add_argument('json')
+    p.add_argument('path')
+    args = parser.parse_args(argv)
+
+    if args.cmd == 'info':
+        store = ResultStore(args.path)
+        print("%s : %d bins, %d bytes" % (args.path, len(store), store.size))
+        for i, (header, _, count) in enumerate(store.segments):
+            print("  %d %s WHD=%s items=%d" % (i, header['partno'], header['WHD'], count))
+    elif args.cmd == 'json':
+        b = ResultStore(args.path)[args.bin]
+        print(json.dumps(b.toPalletStack() if args.pallet_stack else b.toDict(), ensure_ascii=False))
+    elif args.cmd == 'import':
+        with open(args.json, encoding='utf-8') as f:
+            data = json.load(f)
+        if 'pallet_stack' in data:
+            appendRecords(args.path, *fromPalletStack(data))
+        else:
+            # a calPacking response or its data
+            data = data.get('data', data)
+            for r in data.get('bins', [data]):
+                appendRecords(args.path, *fromDict(r))
+
+
+if __name__ == '__main__':
+    main()
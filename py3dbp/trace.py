@@ -0,0 +1,249 @@
+'''
+Binary placement trace of Packer.pack, for record and replay.
+
+Recording : packer.pack(trace='run.p3dtrace')
+
+File layout :
+    b'P3DTRACE' + uint64 header length + json header (bins, items) padded to 8 bytes,
+    then fixed-width little-endian records of TRACE_DTYPE, one per decision.
+
+Replay reads the records with np.memmap, no parsing and no collision checks :
+    r = TraceReader('run.p3dtrace')
+    r.stateAt(step)        placed boxes per bin after record `step`
+    r.firstDifference(other)
+
+    python -m py3dbp.trace summary run.p3dtrace
+    python -m py3dbp.trace state run.p3dtrace --step 120
+    python -m py3dbp.trace diff a.p3dtrace b.p3dtrace
+'''
+import argparse
+import json
+import os
+import struct
+
+import numpy as np
+
+from .constants import TraceKind, TraceReason
+
+MAGIC = b'P3DTRACE'
+VERSION = 1
+
+NO_INDEX = 0xFFFFFFFF
+NO_AXIS = 0xFF
+
+TRACE_DTYPE = np.dtype([
+    ('kind','u1'),
+    ('reason','u1'),
+    ('rotation','u1'),
+    ('axis','u1'),
+    ('bin','<u4'),
+    ('item','<u4'),
+    ('pivot','<f8',(3,)),
+    ('position','<f8',(3,)),
+    ('dims','<f8',(3,)),
+])
+_RECORD = struct.Struct('<BBBBII9d')
+assert _RECORD.size == TRACE_DTYPE.itemsize
+
+
+class PackTrace:
+
+    def __init__(self, path, buffer_records=4096):
+        ''' trace writer, records are buffered and written in blocks '''
+        self.path = path
+        self.buffer_records = buffer_records
+        self.file = None
+        self.buf = bytearray()
+        self.pending = 0
+        self.steps = 0
+        # index of the current bin / item, set by Packer
+        self.bin_index = 0
+        self.item_index = NO_INDEX
+        self._item_index = {}
+
+
+    def open(self, bins, items):
+        ''' write the header, items are indexed by their position in `items` '''
+        self._item_index = {id(item) : i for i, item in enumerate(items)}
+        header = json.dumps({
+            'version' : VERSION,
+            'bins' : [{'partno' : b.partno, 'WHD' : [float(b.width), float(b.height), float(b.depth)]} for b in bins],
+            'items' : [{'partno' : i.partno, 'name' : i.name, 'WHD' : [float(i.width), float(i.height), float(i.depth)]} for i in items],
+        }).encode('utf-8')
+        header += b' ' * (-len(header) % 8)
+        self.file = open(self.path, 'wb')
+        self.file.write(MAGIC + struct.pack('<Q', len(header)) + header)
+
+
+    def setBin(self, index):
+        ''' '''
+        self.bin_index = index
+        self.write(TraceKind.BIN, TraceReason.OK)
+
+
+    def setItem(self, item):
+        ''' '''
+        self.item_index = self._item_index.get(id(item), NO_INDEX)
+
+
+    def write(self, kind, reason, rotation=0, axis=None, pivot=(0,0,0), position=(0,0,0), dims=(0,0,0)):
+        ''' one record '''
+        self.buf += _RECORD.pack(kind, reason, rotation, NO_AXIS if axis is None else axis,
+                                 self.bin_index, self.item_index,
+                                 float(pivot[0]), float(pivot[1]), float(pivot[2]),
+                                 float(position[0]), float(position[1]), float(position[2]),
+                                 float(dims[0]), float(dims[1]), float(dims[2]))
+        self.steps += 1
+        self.pending += 1
+        if self.pending >= self.buffer_records:
+            self.flush()
+
+
+    def reject(self, reason, rotation, axis, pivot, dims):
+        ''' '''
+        self.write(TraceKind.REJECT, reason, rotation, axis, pivot, pivot, dims)
+
+
+    def commit(self, item, axis, pivot):
+        ''' '''
+        self.write(TraceKind.COMMIT, TraceReason.OK, item.rotation_type, axis, pivot, item.position, item.getDimension())
+
+
+    def corner(self, box):
+        ''' static box [x0,x1,y0,y1,z0,z1] of the bin (corner post, obstacle) '''
+        self.item_index = NO_INDEX
+        position = box[0::2]
+        self.write(TraceKind.CORNER, TraceReason.OK, 0, None, position, position, [box[1] - box[0], box[3] - box[2], box[5] - box[4]])
+
+
+    def flush(self):
+        ''' '''
+        if self.file is not None and self.buf:
+            self.file.write(self.buf)
+        self.buf = bytearray()
+        self.pending = 0
+
+
+    def close(self):
+        ''' '''
+        self.flush()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+
+class TraceReader:
+
+    def __init__(self, path):
+        ''' memory-map a trace file '''
+        self.path = path
+        with open(path, 'rb') as f:
+            if f.read(8) != MAGIC:
+                raise ValueError('{} is not a py3dbp trace'.format(path))
+            n = struct.unpack('<Q', f.read(8))[0]
+            self.header = json.loads(f.read(n))
+        offset = 16 + n
+        size = (os.path.getsize(path) - offset) // TRACE_DTYPE.itemsize
+        if size:
+            self.records = np.memmap(path, dtype=TRACE_DTYPE, mode='r', offset=offset, shape=(size,))
+        else:
+            self.records = np.zeros(0, dtype=TRACE_DTYPE)
+
+
+    def __len__(self):
+        return len(self.records)
+
+
+    def summary(self):
+        ''' record counts by kind and reject reason '''
+        r = self.records
+        kinds = np.bincount(r['kind'], minlength=len(TraceKind.NAMES))
+        rejects = np.bincount(r['reason'][r['kind'] == TraceKind.REJECT], minlength=len(TraceReason.NAMES))
+        return {
+            'records' : len(r),
+            'bins' : len(self.header['bins']),
+            'items' : len(self.header['items']),
+            'kinds' : {TraceKind.NAMES[i] : int(kinds[i]) for i in range(len(TraceKind.NAMES))},
+            'rejects' : {TraceReason.NAMES[i] : int(rejects[i]) for i in range(1, len(TraceReason.NAMES))},
+        }
+
+
+    def stateAt(self, step=None):
+        '''
+        boxes placed in each bin once record `step` is applied (default : the end).
+        Returns {bin index : records of the corner / commit boxes}, position and dims give the geometry.
+        '''
+        r = self.records if step is None else self.records[:step + 1]
+        state = {}
+        for b in np.unique(r['bin']):
+            mine = r[r['bin'] == b]
+            # a reset drops everything placed before it
+            resets = np.nonzero(mine['kind'] == TraceKind.RESET)[0]
+            if len(resets):
+                mine = mine[resets[-1] + 1:]
+            placed = mine[(mine['kind'] == TraceKind.COMMIT) | (mine['kind'] == TraceKind.CORNER)]
+            state[int(b)] = np.array(placed)
+        return state
+
+
+    def itemName(self, index):
+        ''' '''
+        return 'corner' if index == NO_INDEX else self.header['items'][index]['partno']
+
+
+    def firstDifference(self, other):
+        ''' index of the first record that differs from other trace, None if they are equal '''
+        n = min(len(self), len(other))
+        a = self.records[:n].view(np.uint8).reshape(n, -1)
+        b = other.records[:n].view(np.uint8).reshape(n, -1)
+        diff = np.nonzero((a != b).any(axis=1))[0]
+        if len(diff):
+            return int(diff[0])
+        return None if len(self) == len(other) else n
+
+
+    def describe(self, step):
+        ''' one record as text '''
+        r = self.records[step]
+        return "%d %s %s bin=%d item=%s rt=%d axis=%s pivot=%s pos=%s dims=%s" % (
+            step, TraceKind.NAMES[r['kind']], TraceReason.NAMES[r['reason']], r['bin'], self.itemName(int(r['item'])),
+            r['rotation'], '-' if r['axis'] == NO_AXIS else r['axis'],
+            r['pivot'].tolist(), r['position'].tolist(), r['dims'].tolist())
+
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='inspect py3dbp placement traces')
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    p = sub.add_parser('summary')
+    p.add_argument('path')
+    p = sub.add_parser('state')
+    p.add_argument('path')
+    p.add_argument('--step', type=int, default=None)
+    p = sub.add_parser('diff')
+    p.add_argument('a')
+    p.add_argument('b')
+    args = parser.parse_args(argv)
+
+    if args.cmd == 'summary':
+        print(json.dumps(TraceReader(args.path).summary(), indent=2))
+    elif args.cmd == 'state':
+        r = TraceReader(args.path)
+        for b, placed in r.stateAt(args.step).items():
+            print("bin %d %s : %d boxes" % (b, r.header['bins'][b]['partno'], len(placed)))
+            for p in placed:
+                print("  %s pos=%s dims=%s rt=%d" % (r.itemName(int(p['item'])), p['position'].tolist(), p['dims'].tolist(), p['rotation']))
+    elif args.cmd == 'diff':
+        a, b = TraceReader(args.a), TraceReader(args.b)
+        step = a.firstDifference(b)
+        if step is None:
+            print("traces are identical (%d records)" % len(a))
+        else:
+            print("first difference at record %d" % step)
+            for r in (a, b):
+                print("  %s: %s" % (r.path, r.describe(step) if step < len(r) else 'end of trace'))
+
+
+if __name__ == '__main__':
+    main()